@@ -3,30 +3,103 @@
 from __future__ import annotations
 
 import logging
+import math
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform, ATTR_ENTITY_ID
-from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, Platform, ATTR_ENTITY_ID
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    Event,
+    EventStateChangedData,
+    EventStateReportedData,
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    State,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import entity_registry as er
-from collections import deque
+from homeassistant.helpers.event import (
+    async_track_state_change_event,
+    async_track_state_report_event,
+)
+from homeassistant.util.hass_dict import HassKey
+from collections.abc import Callable, Coroutine, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, NamedTuple
 from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from time import perf_counter, time
 import voluptuous as vol
 import homeassistant.helpers.config_validation as cv
 
-from .coordinator import PIDDataCoordinator
+from .autotune import AUTOTUNE_HYSTERESIS, AutotuneResult, RelayAutotuner
+from .coordinator import PIDDataCoordinator, scheduling_options
+from .entity import PublishFilterMixin
+from .export import async_register_export_view
+from .filters import InputFilter
+from .fusion import InputFusion, parse_weights
+from .history import HistoryBuffer
+from .metrics import OSCILLATION_DEADBAND, LoopMetrics
+from .persistence import ControllerStateStore
+from .pid import PID, PIDState
+from .profiling import PhaseProfiler
+from .search import (
+    MAX_WORKERS,
+    OBJECTIVES,
+    SEARCH_METHODS,
+    SEARCH_REFINE,
+    create_search_pool,
+    default_bounds,
+    default_workers,
+    search_gains,
+)
+from .simulation import FOPDTModel, Trace, replay, simulate
+from .tracelog import TraceWriter, remove_trace
 
 from .const import (
     DOMAIN,
     CONF_NAME,
     CONF_SENSOR_ENTITY_ID,
+    CONF_EXTRA_SENSOR_ENTITY_IDS,
+    CONF_FUSION_MODE,
+    CONF_FUSION_WEIGHTS,
+    CONF_FUSION_MAX_AGE,
+    DEFAULT_FUSION_MODE,
+    DEFAULT_FUSION_WEIGHTS,
+    DEFAULT_FUSION_MAX_AGE,
+    CONF_FILTER_SPIKE_THRESHOLD,
+    CONF_FILTER_MEDIAN_SIZE,
+    CONF_FILTER_EMA_TIME_CONSTANT,
+    CONF_FILTER_RATE_LIMIT,
+    DEFAULT_FILTER_SPIKE_THRESHOLD,
+    DEFAULT_FILTER_MEDIAN_SIZE,
+    DEFAULT_FILTER_EMA_TIME_CONSTANT,
+    DEFAULT_FILTER_RATE_LIMIT,
+    FILTER_OPTIONS,
     CONF_INPUT_RANGE_MIN,
     CONF_INPUT_RANGE_MAX,
     CONF_OUTPUT_RANGE_MIN,
     CONF_OUTPUT_RANGE_MAX,
+    CONF_HISTORY_SIZE,
+    CONF_TRACE_ENABLED,
+    CONF_TRACE_MAX_SIZE,
+    CONF_METRICS_WINDOW,
+    CONF_PROFILING,
+    DEFAULT_HISTORY_SIZE,
+    DEFAULT_TRACE_ENABLED,
+    DEFAULT_TRACE_MAX_SIZE,
+    DEFAULT_METRICS_WINDOW,
+    DEFAULT_PROFILING,
     DEFAULT_INPUT_RANGE_MIN,
     DEFAULT_INPUT_RANGE_MAX,
     DEFAULT_OUTPUT_RANGE_MIN,
     DEFAULT_OUTPUT_RANGE_MAX,
+    PARAMETER_ENTITIES,
+    OPTION_DEFAULTS,
+    RELOAD_OPTIONS,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -43,6 +116,31 @@ ATTR_VALUE = "value"
 ATTR_PRESET = "preset"
 PRESET_OPTIONS = ["zero_start", "last_known_value", "startup_value"]
 
+SERVICE_SIMULATE = "simulate"
+ATTR_KP = "kp"
+ATTR_KI = "ki"
+ATTR_KD = "kd"
+ATTR_MODE = "mode"
+ATTR_SOURCE = "source"
+ATTR_SETPOINT = "setpoint"
+ATTR_DURATION = "duration"
+ATTR_INCLUDE_SAMPLES = "include_samples"
+MODE_REPLAY = "replay"
+MODE_CLOSED_LOOP = "closed_loop"
+SOURCE_HISTORY = "history"
+SOURCE_TRACE = "trace"
+SERVICE_TUNE = "tune"
+ATTR_METHOD = "method"
+ATTR_SAMPLES = "samples"
+ATTR_OBJECTIVE = "objective"
+ATTR_KP_MAX = "kp_max"
+ATTR_KI_MAX = "ki_max"
+ATTR_KD_MAX = "kd_max"
+ATTR_WORKERS = "workers"
+ATTR_APPLY = "apply"
+# resolution of the gain number entities
+GAIN_DECIMALS = 4
+
 SET_OUTPUT_SCHEMA = cv.make_entity_service_schema(
     {
         vol.Optional(ATTR_ENTITY_ID): cv.entity_id,
@@ -51,6 +149,128 @@ SET_OUTPUT_SCHEMA = cv.make_entity_service_schema(
     }
 )
 
+SIMULATE_SCHEMA = cv.make_entity_service_schema(
+    {
+        vol.Optional(ATTR_ENTITY_ID): cv.entity_id,
+        vol.Optional(ATTR_KP): vol.Coerce(float),
+        vol.Optional(ATTR_KI): vol.Coerce(float),
+        vol.Optional(ATTR_KD): vol.Coerce(float),
+        vol.Optional(ATTR_MODE, default=MODE_CLOSED_LOOP): vol.In(
+            [MODE_CLOSED_LOOP, MODE_REPLAY]
+        ),
+        vol.Optional(ATTR_SOURCE, default=SOURCE_HISTORY): vol.In(
+            [SOURCE_HISTORY, SOURCE_TRACE]
+        ),
+        vol.Optional(ATTR_SETPOINT): vol.Coerce(float),
+        vol.Optional(ATTR_DURATION, default=600.0): vol.All(
+            vol.Coerce(float), vol.Range(min=1)
+        ),
+        vol.Optional(ATTR_INCLUDE_SAMPLES, default=False): cv.boolean,
+    }
+)
+
+TUNE_SCHEMA = cv.make_entity_service_schema(
+    {
+        vol.Optional(ATTR_ENTITY_ID): cv.entity_id,
+        vol.Optional(ATTR_METHOD, default=SEARCH_REFINE): vol.In(SEARCH_METHODS),
+        vol.Optional(ATTR_SAMPLES, default=2000): vol.All(
+            vol.Coerce(int), vol.Range(min=8, max=100000)
+        ),
+        vol.Optional(ATTR_OBJECTIVE, default="iae"): vol.In(OBJECTIVES),
+        vol.Optional(ATTR_SOURCE, default=SOURCE_HISTORY): vol.In(
+            [SOURCE_HISTORY, SOURCE_TRACE]
+        ),
+        vol.Optional(ATTR_SETPOINT): vol.Coerce(float),
+        vol.Optional(ATTR_DURATION, default=600.0): vol.All(
+            vol.Coerce(float), vol.Range(min=1)
+        ),
+        vol.Optional(ATTR_KP_MAX): vol.Coerce(float),
+        vol.Optional(ATTR_KI_MAX): vol.Coerce(float),
+        vol.Optional(ATTR_KD_MAX): vol.Coerce(float),
+        vol.Optional(ATTR_WORKERS): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MAX_WORKERS)
+        ),
+        vol.Optional(ATTR_APPLY, default=False): cv.boolean,
+    }
+)
+
+
+def trace_path(hass: HomeAssistant, entry_id: str) -> Path:
+    """Return the path of the trace file of a config entry."""
+    return Path(hass.config.path(DOMAIN, f"{entry_id}.trace"))
+
+
+SEARCH_POOL: HassKey[ProcessPoolExecutor] = HassKey(f"{DOMAIN}_search_pool")
+
+
+@callback
+def async_get_search_pool(hass: HomeAssistant) -> ProcessPoolExecutor:
+    """Return the process pool shared by all gain searches, creating it when needed.
+
+    The pool has ``default_workers()`` processes and is shut down when the
+    last entry is unloaded or Home Assistant stops.
+    """
+    if (pool := hass.data.get(SEARCH_POOL)) is None:
+        pool = hass.data[SEARCH_POOL] = create_search_pool(default_workers())
+        hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, partial(async_shutdown_search_pool, hass)
+        )
+    return pool
+
+
+@callback
+def async_shutdown_search_pool(
+    hass: HomeAssistant, _event: Event | None = None
+) -> None:
+    """Shut down the shared search pool without waiting for its processes."""
+    if (pool := hass.data.pop(SEARCH_POOL, None)) is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+@dataclass(slots=True)
+class PIDParameters:
+    """Current values of the parameter entities, pushed by the entities themselves."""
+
+    kp: float | None = None
+    ki: float | None = None
+    kd: float | None = None
+    setpoint: float | None = None
+    starting_output: float | None = None
+    sample_time: float | None = None
+    output_min: float | None = None
+    output_max: float | None = None
+    auto_mode: bool = True
+    proportional_on_measurement: bool = False
+    windup_protection: bool = True
+    start_mode: str | None = None
+
+    def set(self, key: str, value: float | bool | str | None) -> None:
+        """Store a parameter value, ignoring keys that are not part of the snapshot."""
+        if key in self.__slots__:
+            setattr(self, key, value)
+
+
+class PIDStepResult(NamedTuple):
+    """Immutable result of one PID step, shared by all sensors.
+
+    ``error`` is the input fed to the PID minus setpoint, from the same input
+    and setpoint that produced the output. ``input`` is the measured value and
+    ``filtered_input`` the value fed to the PID, None without input filters.
+    The terms are None while the autotune relay drives the output.
+    """
+
+    timestamp: float
+    input: float
+    setpoint: float | None
+    output: float
+    p: float | None
+    i: float | None
+    d: float | None
+    i_delta: float | None
+    error: float | None
+    dt: float | None
+    filtered_input: float | None = None
+
 
 @dataclass
 class MyData:
@@ -65,87 +285,481 @@ class PIDDeviceHandle:
         self.hass = hass
         self.entry = entry
         self.name = entry.data.get(CONF_NAME)
-        self.input_range_min = entry.options.get(
+        # the options currently applied, compared against on an options update
+        self.options = dict(entry.options)
+        self._read_ranges()
+        self.sensor_entity_id = entry.options.get(
+            CONF_SENSOR_ENTITY_ID, entry.data.get(CONF_SENSOR_ENTITY_ID)
+        )
+        # fuses the sensor entity with the extra input sensors, if any
+        self.input_entity_ids: list[str] = [self.sensor_entity_id]
+        self.fusion: InputFusion | None = None
+        self._configure_inputs(entry.options)
+        # filters between the input and the PID, None when none is configured
+        self.input_filter: InputFilter | None = None
+        self._configure_filter(entry.options)
+        self.params = PIDParameters()
+        self.last_step: PIDStepResult | None = None
+        # the publish filtered sensors by key, set up by the sensor platform
+        self.published_sensors: dict[str, PublishFilterMixin] = {}
+        self.last_known_output = None
+
+        self.history = HistoryBuffer(
+            int(entry.options.get(CONF_HISTORY_SIZE, DEFAULT_HISTORY_SIZE))
+        )
+        self.metrics = LoopMetrics(
+            float(entry.options.get(CONF_METRICS_WINDOW, DEFAULT_METRICS_WINDOW)),
+            deadband=(self.input_range_max - self.input_range_min)
+            * OSCILLATION_DEADBAND,
+        )
+        self.profiler: PhaseProfiler | None = None
+        if entry.options.get(CONF_PROFILING, DEFAULT_PROFILING):
+            self.profiler = PhaseProfiler()
+        self.trace: TraceWriter | None = None
+        if entry.options.get(CONF_TRACE_ENABLED, DEFAULT_TRACE_ENABLED):
+            self.trace = TraceWriter(
+                hass,
+                trace_path(hass, entry.entry_id),
+                int(
+                    entry.options.get(CONF_TRACE_MAX_SIZE, DEFAULT_TRACE_MAX_SIZE)
+                    * 1024
+                    * 1024
+                ),
+            )
+        self.last_update_timestamp: float | None = None
+        self.last_measured_sample_time: float | None = None
+
+        # internal PID state saved across restarts, set up by the sensor platform
+        self.pid: PID | None = None
+        self.state_store = ControllerStateStore(
+            hass, entry.entry_id, self.controller_state
+        )
+        self.state_restored = False
+
+        # relay experiment replacing the PID while it runs, and its last result
+        self.autotuner: RelayAutotuner | None = None
+        self.autotune_result: AutotuneResult | None = None
+
+        # (platform, key) -> entity_id, filled on first lookup
+        self._entity_id_index: dict[tuple[str, str], str] = {}
+        self.entity_id_cache_hits = 0
+        self.entity_id_cache_misses = 0
+
+        # entity_id -> key of the subscribed parameter entities
+        self._parameter_index: dict[str, str] = {}
+        self._parameter_action: Callable[[], Coroutine[Any, Any, None]] | None = None
+        self._unsub_parameters: CALLBACK_TYPE | None = None
+        self._input_action: Callable[[], None] | None = None
+        self._unsub_input: CALLBACK_TYPE | None = None
+        self._options_listeners: list[Callable[[Mapping[str, Any]], None]] = []
+
+    def _read_ranges(self) -> None:
+        """Read the input and output ranges from the options or the entry data."""
+        options, data = self.entry.options, self.entry.data
+        self.input_range_min = options.get(
             CONF_INPUT_RANGE_MIN,
-            entry.data.get(CONF_INPUT_RANGE_MIN, DEFAULT_INPUT_RANGE_MIN),
+            data.get(CONF_INPUT_RANGE_MIN, DEFAULT_INPUT_RANGE_MIN),
         )
-        self.input_range_max = entry.options.get(
+        self.input_range_max = options.get(
             CONF_INPUT_RANGE_MAX,
-            entry.data.get(CONF_INPUT_RANGE_MAX, DEFAULT_INPUT_RANGE_MAX),
+            data.get(CONF_INPUT_RANGE_MAX, DEFAULT_INPUT_RANGE_MAX),
         )
-        self.output_range_min = entry.options.get(
+        self.output_range_min = options.get(
             CONF_OUTPUT_RANGE_MIN,
-            entry.data.get(CONF_OUTPUT_RANGE_MIN, DEFAULT_OUTPUT_RANGE_MIN),
+            data.get(CONF_OUTPUT_RANGE_MIN, DEFAULT_OUTPUT_RANGE_MIN),
         )
-        self.output_range_max = entry.options.get(
+        self.output_range_max = options.get(
             CONF_OUTPUT_RANGE_MAX,
-            entry.data.get(CONF_OUTPUT_RANGE_MAX, DEFAULT_OUTPUT_RANGE_MAX),
+            data.get(CONF_OUTPUT_RANGE_MAX, DEFAULT_OUTPUT_RANGE_MAX),
         )
-        self.sensor_entity_id = entry.options.get(
-            CONF_SENSOR_ENTITY_ID, entry.data.get(CONF_SENSOR_ENTITY_ID)
+
+    def changed_options(self, options: Mapping[str, Any]) -> set[str]:
+        """Return the keys whose value differs from the applied options.
+
+        A missing option counts as its default, so writing the defaults of
+        options that were never edited is not a change.
+        """
+        return {
+            key
+            for key in self.options.keys() | options.keys()
+            if self.options.get(key, OPTION_DEFAULTS.get(key))
+            != options.get(key, OPTION_DEFAULTS.get(key))
+        }
+
+    @callback
+    def async_add_options_listener(
+        self, listener: Callable[[Mapping[str, Any]], None]
+    ) -> CALLBACK_TYPE:
+        """Call ``listener`` with the new options when they are applied in place."""
+        self._options_listeners.append(listener)
+        return partial(self._options_listeners.remove, listener)
+
+    @callback
+    def async_apply_options(self, options: Mapping[str, Any]) -> None:
+        """Apply changed options to the running controller without a reload.
+
+        The PID, its integrator and all subscriptions are kept; only changed
+        input sensors are resubscribed and the input filters only restart when
+        one of their options or the inputs changed. New inputs also clear the
+        last input of the PID, so the jump to the new value is no derivative
+        kick.
+        """
+        restart_filter = bool(self.changed_options(options) & FILTER_OPTIONS)
+        self.options = dict(options)
+        self._read_ranges()
+        self.metrics.window = float(
+            options.get(CONF_METRICS_WINDOW, DEFAULT_METRICS_WINDOW)
         )
-        self.last_contributions = (None, None, None)  # (P, I, D)
-        self.last_known_output = None
+        self.metrics.deadband = (
+            self.input_range_max - self.input_range_min
+        ) * OSCILLATION_DEADBAND
 
-        self.input_history: deque[float] = deque(maxlen=10)
-        self.output_history: deque[float] = deque(maxlen=10)
-        self.pid_parameter_history: deque[dict[str, float | None]] = deque(maxlen=10)
-        self.pid_contribution_history: deque[dict[str, float | None]] = deque(maxlen=10)
-        self.sample_time_history: deque[float | None] = deque(maxlen=10)
-        self.last_update_timestamp: float | None = None
-        self.last_measured_sample_time: float | None = None
+        previous_inputs = self.input_entity_ids
+        self.sensor_entity_id = options.get(
+            CONF_SENSOR_ENTITY_ID, self.entry.data.get(CONF_SENSOR_ENTITY_ID)
+        )
+        self._configure_inputs(options)
+        if self.input_entity_ids != previous_inputs:
+            _LOGGER.debug(
+                "Inputs of %s changed from %s to %s",
+                self.name,
+                previous_inputs,
+                self.input_entity_ids,
+            )
+            restart_filter = True
+            if self.pid is not None:
+                self.pid.clear_last_input()
+        if restart_filter:
+            self._configure_filter(options)
+        if self._unsub_input is not None:
+            self._unsub_input()
+            self._unsub_input = self._async_track_input()
+
+        for listener in list(self._options_listeners):
+            listener(options)
 
     def _get_entity_id(self, platform: str, key: str) -> str | None:
-        """Lookup the real entity_id in the registry by unique_id == '<entry_id>_<key>'."""
+        """Lookup the real entity_id in the registry by unique_id == '<entry_id>_<key>'.
+
+        Resolved ids are kept in an index until the entity registry reports a
+        rename or removal, so the registry is only queried once per entity.
+        """
+        entity_id = self._entity_id_index.get((platform, key))
+        if entity_id is not None:
+            self.entity_id_cache_hits += 1
+            return entity_id
+
+        self.entity_id_cache_misses += 1
         registry = er.async_get(self.hass)
         unique = f"{self.entry.entry_id}_{key}"
         entity_id = registry.async_get_entity_id(platform, DOMAIN, unique)
         if not entity_id:
             _LOGGER.debug("No %s entity found for unique_id '%s'", platform, unique)
+            return None
+        self._entity_id_index[(platform, key)] = entity_id
         return entity_id
 
-    def get_number(self, key: str) -> float | None:
-        """Return the current value of the number entity, or None."""
-        entity_id = self._get_entity_id("number", key)
-        if not entity_id:
+    def resolve_entity_ids(self) -> None:
+        """Resolve the entity_ids of all parameter entities into the index."""
+        for platform, key in PARAMETER_ENTITIES:
+            self._get_entity_id(platform, key)
+
+    def entity_id_cache_stats(self) -> dict[str, int]:
+        """Return size and hit/miss counters of the entity_id index."""
+        return {
+            "size": len(self._entity_id_index),
+            "hits": self.entity_id_cache_hits,
+            "misses": self.entity_id_cache_misses,
+        }
+
+    @callback
+    def async_handle_entity_registry_updated(self, event: Event) -> None:
+        """Drop index entries for entities that were renamed or removed."""
+        action = event.data["action"]
+        if action != "remove" and (
+            action != "update" or "entity_id" not in event.data.get("changes", {})
+        ):
+            return
+        entity_id = event.data.get("old_entity_id", event.data["entity_id"])
+        stale = [
+            index_key
+            for index_key, indexed_id in self._entity_id_index.items()
+            if indexed_id == entity_id
+        ]
+        for index_key in stale:
+            _LOGGER.debug("Invalidating cached entity_id %s", entity_id)
+            del self._entity_id_index[index_key]
+        if stale and self._unsub_parameters is not None:
+            self._async_resubscribe_parameters()
+
+    @callback
+    def async_subscribe_parameters(
+        self, action: Callable[[], Coroutine[Any, Any, None]]
+    ) -> CALLBACK_TYPE:
+        """Run ``action`` whenever one of the parameter entities changes state.
+
+        Only the resolved parameter entity_ids are tracked, so unrelated state
+        changes in Home Assistant never reach this controller.
+        """
+        self._parameter_action = action
+        self._async_resubscribe_parameters()
+        return self._async_unsubscribe_parameters
+
+    @callback
+    def _async_resubscribe_parameters(self) -> None:
+        """(Re)build the dispatch index and the state change subscription."""
+        if self._unsub_parameters is not None:
+            self._unsub_parameters()
+        self._parameter_index = {}
+        for platform, key in PARAMETER_ENTITIES:
+            if entity_id := self._get_entity_id(platform, key):
+                self._parameter_index[entity_id] = key
+        self._unsub_parameters = async_track_state_change_event(
+            self.hass, list(self._parameter_index), self._async_parameter_changed
+        )
+
+    @callback
+    def _async_unsubscribe_parameters(self) -> None:
+        """Stop tracking the parameter entities."""
+        if self._unsub_parameters is not None:
+            self._unsub_parameters()
+            self._unsub_parameters = None
+        self._parameter_index = {}
+
+    @callback
+    def _async_parameter_changed(self, event: Event[EventStateChangedData]) -> None:
+        """Dispatch a state change of a parameter entity."""
+        entity_id = event.data["entity_id"]
+        if (key := self._parameter_index.get(entity_id)) is None:
+            return
+        _LOGGER.debug("Update detected on %s (%s)", entity_id, key)
+        if self._parameter_action is not None:
+            self.hass.async_create_task(self._parameter_action())
+
+    def _configure_inputs(self, options: Mapping[str, Any]) -> None:
+        """Set up fusion of the input sensors, seeded with their current states."""
+        extra = options.get(CONF_EXTRA_SENSOR_ENTITY_IDS, [])
+        self.input_entity_ids = list(dict.fromkeys([self.sensor_entity_id, *extra]))
+        if len(self.input_entity_ids) == 1:
+            self.fusion = None
+            return
+        try:
+            weights = parse_weights(
+                options.get(CONF_FUSION_WEIGHTS, DEFAULT_FUSION_WEIGHTS),
+                len(self.input_entity_ids),
+            )
+        except ValueError as err:
+            _LOGGER.warning("Ignoring fusion weights of %s: %s", self.name, err)
+            weights = None
+        self.fusion = InputFusion(
+            self.input_entity_ids,
+            options.get(CONF_FUSION_MODE, DEFAULT_FUSION_MODE),
+            weights,
+            float(options.get(CONF_FUSION_MAX_AGE, DEFAULT_FUSION_MAX_AGE)),
+        )
+        for entity_id in self.input_entity_ids:
+            if (state := self.hass.states.get(entity_id)) is not None:
+                self.fusion.update(
+                    entity_id, self._state_value(state), state.last_reported_timestamp
+                )
+
+    def _configure_filter(self, options: Mapping[str, Any]) -> None:
+        """Build the input filters from the options; they start empty."""
+        input_filter = InputFilter(
+            float(
+                options.get(CONF_FILTER_SPIKE_THRESHOLD, DEFAULT_FILTER_SPIKE_THRESHOLD)
+            ),
+            int(options.get(CONF_FILTER_MEDIAN_SIZE, DEFAULT_FILTER_MEDIAN_SIZE)),
+            float(
+                options.get(
+                    CONF_FILTER_EMA_TIME_CONSTANT, DEFAULT_FILTER_EMA_TIME_CONSTANT
+                )
+            ),
+            float(options.get(CONF_FILTER_RATE_LIMIT, DEFAULT_FILTER_RATE_LIMIT)),
+        )
+        self.input_filter = input_filter if input_filter else None
+
+    @staticmethod
+    def _state_value(state: State) -> float | None:
+        """Return the numeric value of a state, or None."""
+        if state.state in ("unknown", "unavailable"):
             return None
-        state = self.hass.states.get(entity_id)
-        _LOGGER.debug("get_number(%s) → %s = %s", key, entity_id, state and state.state)
-        if state and state.state not in ("unknown", "unavailable"):
+        try:
+            value = float(state.state)
+        except ValueError:
+            return None
+        return value if math.isfinite(value) else None
+
+    @callback
+    def async_subscribe_input(self, action: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call ``action`` whenever the input sensor reports a usable state."""
+        self._input_action = action
+        self._unsub_input = self._async_track_input()
+        return self._async_unsubscribe_input
+
+    @callback
+    def _async_track_input(self) -> CALLBACK_TYPE:
+        """Track the input sensors, and their unchanged reports for stale checks."""
+        unsubs = [
+            async_track_state_change_event(
+                self.hass, self.input_entity_ids, self._async_input_changed
+            )
+        ]
+        if self.fusion is not None and self.fusion.max_age > 0:
+            unsubs.append(
+                async_track_state_report_event(
+                    self.hass, self.input_entity_ids, self._async_input_reported
+                )
+            )
+
+        @callback
+        def unsubscribe() -> None:
+            for unsub in unsubs:
+                unsub()
+
+        return unsubscribe
+
+    @callback
+    def _async_unsubscribe_input(self) -> None:
+        """Stop tracking the input sensor."""
+        if self._unsub_input is not None:
+            self._unsub_input()
+            self._unsub_input = None
+
+    @callback
+    def _async_input_changed(self, event: Event[EventStateChangedData]) -> None:
+        """Forward a new input sample to the subscribed action."""
+        new_state = event.data["new_state"]
+        if (fusion := self.fusion) is not None:
+            if new_state is None:
+                fusion.update(event.data["entity_id"], None, time())
+            else:
+                fusion.update(
+                    new_state.entity_id,
+                    self._state_value(new_state),
+                    new_state.last_reported_timestamp,
+                )
+            if fusion.value(time()) is None:
+                return
+        elif new_state is None or new_state.state in ("unknown", "unavailable"):
+            return
+        if self._input_action is not None:
+            self._input_action()
+
+    @callback
+    def _async_input_reported(self, event: Event[EventStateReportedData]) -> None:
+        """Keep a fused input that reports an unchanged value from going stale."""
+        if self.fusion is not None:
+            new_state = event.data["new_state"]
+            self.fusion.report(new_state.entity_id, new_state.last_reported_timestamp)
+
+    def start_autotune(self, rule: str) -> None:
+        """Start a relay experiment that drives the output from the next step."""
+        params = self.params
+        if not params.auto_mode:
+            raise HomeAssistantError("Autotune requires auto mode")
+        if None in (params.setpoint, params.output_min, params.output_max):
+            raise HomeAssistantError("Setpoint and output limits are required")
+        if params.output_max <= params.output_min:
+            raise HomeAssistantError(
+                translation_domain=DOMAIN,
+                translation_key="autotune_output_limits",
+                translation_placeholders={
+                    "output_min": str(params.output_min),
+                    "output_max": str(params.output_max),
+                },
+            )
+        self.autotuner = RelayAutotuner(
+            rule,
+            params.setpoint,
+            params.output_min,
+            params.output_max,
+            hysteresis=(self.input_range_max - self.input_range_min)
+            * AUTOTUNE_HYSTERESIS,
+            now=perf_counter(),
+            # negative gains mean the output lowers the input
+            reverse=(params.kp or 0.0) < 0,
+        )
+
+    def stop_autotune(self) -> None:
+        """Abort a running relay experiment."""
+        self.autotuner = None
+
+    async def async_apply_autotune(self, tuner: RelayAutotuner, output: float) -> None:
+        """Write the gains of a finished experiment and resume from ``output``."""
+        if self.pid.auto_mode:
+            self.pid.set_auto_mode(False)
+            self.pid.set_auto_mode(True, output)
+        if tuner.result is None:
+            _LOGGER.warning("Autotune of %s found no steady oscillation", self.name)
+            return
+        self.autotune_result = tuner.result
+        gains = tuner.result.gains(tuner.rule)
+        _LOGGER.info(
+            "Autotune of %s: Ku=%.4g Pu=%.4gs, %s gains kp=%.4g ki=%.4g kd=%.4g",
+            self.name,
+            tuner.result.ultimate_gain,
+            tuner.result.ultimate_period,
+            tuner.rule,
+            *gains,
+        )
+        for key, gain in zip(("kp", "ki", "kd"), gains):
+            if (entity_id := self._get_entity_id("number", key)) is None:
+                continue
+            value = round(gain, GAIN_DECIMALS)
+            # keep the gain within the range of its number entity
+            if (state := self.hass.states.get(entity_id)) is not None:
+                attributes = state.attributes
+                value = min(max(value, attributes["min"]), attributes["max"])
+                if value != round(gain, GAIN_DECIMALS):
+                    _LOGGER.warning(
+                        "Autotune %s of %s limited from %.4g to %s",
+                        key,
+                        self.name,
+                        gain,
+                        value,
+                    )
             try:
-                return float(state.state)
-            except ValueError:
+                await self.hass.services.async_call(
+                    "number",
+                    "set_value",
+                    {ATTR_ENTITY_ID: entity_id, "value": value},
+                    blocking=True,
+                )
+            except HomeAssistantError as err:
                 _LOGGER.error(
-                    "Could not parse state '%s' of %s as float", state.state, entity_id
+                    "Unable to apply autotune %s of %s: %s", key, self.name, err
                 )
-        return None
 
-    def get_select(self, key: str) -> str | None:
-        """Return the current value of the select entity, or None."""
-        entity_id = self._get_entity_id("select", key)
-        if not entity_id:
+    def controller_state(self) -> dict[str, Any] | None:
+        """Return the PID state to persist, or None before the first step."""
+        if self.pid is None or self.last_step is None:
             return None
-        state = self.hass.states.get(entity_id)
-        _LOGGER.debug("get_select(%s) → %s = %s", key, entity_id, state and state.state)
-
-        if state and state.state not in ("unknown", "unavailable"):
-            return state.state  # Selects geven strings terug, geen conversie nodig
-
-        return None
+        return {**self.pid.state._asdict(), "dt": self.last_measured_sample_time}
 
-    def get_switch(self, key: str) -> bool:
-        """Return True/False of switch entity, default True if missing."""
-        entity_id = self._get_entity_id("switch", key)
-        if not entity_id:
-            return True
-        state = self.hass.states.get(entity_id)
-        _LOGGER.debug("get_switch(%s) → %s = %s", key, entity_id, state and state.state)
-        if state and state.state not in ("unknown", "unavailable"):
-            return state.state == "on"
-        return True
+    async def async_restore_state(self) -> None:
+        """Resume the PID from the state saved before the last shutdown."""
+        if (data := await self.state_store.async_load()) is None:
+            return
+        try:
+            state = PIDState(
+                float(data["integral"]),
+                data["last_input"],
+                data["last_output"],
+                bool(data["auto_mode"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            _LOGGER.warning("Ignoring invalid saved state of %s", self.name)
+            return
+        _LOGGER.debug("Restoring state of %s: %s", self.name, data)
+        self.pid.restore(state, data.get("dt"))
+        self.last_known_output = state.last_output
+        self.state_restored = True
 
     def get_input_sensor_value(self) -> float | None:
         """Return the input value from configured sensor."""
+        if self.fusion is not None:
+            return self.fusion.value(time())
         state = self.hass.states.get(self.sensor_entity_id)
         if state and state.state not in ("unknown", "unavailable"):
             try:
@@ -156,44 +770,202 @@ class PIDDeviceHandle:
                 )
         return None
 
+    def get_input_sample_time(self) -> float | None:
+        """Return when the input last reported a reading, also an unchanged one."""
+        if self.fusion is not None:
+            return self.fusion.last_report
+        if (state := self.hass.states.get(self.sensor_entity_id)) is None:
+            return None
+        return state.last_reported_timestamp
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up Simple PID Controller from a config entry."""
 
-    sensor_entity_id = entry.options.get(
-        CONF_SENSOR_ENTITY_ID, entry.data.get(CONF_SENSOR_ENTITY_ID)
+@callback
+def _async_get_target_entry(hass: HomeAssistant, call: ServiceCall) -> ConfigEntry:
+    """Return the loaded config entry of the single entity targeted by a call."""
+    entity_id: str | list[str] | None = call.data.get(ATTR_ENTITY_ID)
+    if entity_id is None:
+        raise HomeAssistantError("entity_id is required")
+    if isinstance(entity_id, list):
+        if len(entity_id) != 1:
+            raise HomeAssistantError("Exactly one entity_id is required")
+        entity_id = entity_id[0]
+
+    registry = er.async_get(hass)
+    ent = registry.async_get(entity_id)
+    if ent is None:
+        raise HomeAssistantError(f"Unknown entity {entity_id}")
+    config_entry = hass.config_entries.async_get_entry(ent.config_entry_id)
+    if config_entry is None or config_entry.runtime_data is None:
+        raise HomeAssistantError("PID controller not loaded")
+    return config_entry
+
+
+async def _async_load_trace(
+    hass: HomeAssistant, handle: PIDDeviceHandle, source: str
+) -> Trace:
+    """Load the recorded history or trace file of a controller."""
+    try:
+        if source == SOURCE_TRACE:
+            if handle.trace is None:
+                raise HomeAssistantError("Trace is not enabled")
+            await handle.trace.async_flush()
+            return await hass.async_add_executor_job(
+                Trace.from_trace_file, handle.trace.path
+            )
+        return Trace.from_history(handle.history)
+    except ValueError as err:
+        raise HomeAssistantError(f"No usable recording: {err}") from err
+
+
+async def _async_fit_model(hass: HomeAssistant, trace: Trace) -> FOPDTModel:
+    """Fit the process model to a recording in the executor."""
+    try:
+        return await hass.async_add_executor_job(FOPDTModel.fit, trace)
+    except ValueError as err:
+        raise HomeAssistantError(f"Could not fit a process model: {err}") from err
+
+
+async def _async_simulate(
+    hass: HomeAssistant, handle: PIDDeviceHandle, data: dict[str, Any]
+) -> ServiceResponse:
+    """Replay or simulate the recorded history with the current and new gains."""
+    params = handle.params
+    current = (params.kp or 0.0, params.ki or 0.0, params.kd or 0.0)
+    candidate = (
+        data.get(ATTR_KP, current[0]),
+        data.get(ATTR_KI, current[1]),
+        data.get(ATTR_KD, current[2]),
+    )
+    limits = (params.output_min, params.output_max)
+    p_on_m = params.proportional_on_measurement
+
+    trace = await _async_load_trace(hass, handle, data[ATTR_SOURCE])
+    response: dict[str, Any] = {"samples": len(trace)}
+    try:
+        if data[ATTR_MODE] == MODE_REPLAY:
+            result = await hass.async_add_executor_job(
+                partial(
+                    replay,
+                    trace,
+                    (current, candidate),
+                    limits,
+                    p_on_m,
+                    params.starting_output or 0.0,
+                )
+            )
+        else:
+            model = await _async_fit_model(hass, trace)
+            response["model"] = model.as_dict()
+            setpoint = data.get(ATTR_SETPOINT, params.setpoint)
+            if setpoint is None:
+                raise HomeAssistantError("setpoint is required")
+            result = await hass.async_add_executor_job(
+                partial(
+                    simulate,
+                    model,
+                    (current, candidate),
+                    setpoint,
+                    data[ATTR_DURATION],
+                    float(trace.input[-1]),
+                    limits,
+                    p_on_m,
+                )
+            )
+    except ValueError as err:
+        raise HomeAssistantError(f"Simulation failed: {err}") from err
+
+    response["current"] = result.summary(0)
+    response["candidate"] = result.summary(1)
+    if data[ATTR_INCLUDE_SAMPLES]:
+        response["series"] = {
+            "time": result.time.tolist(),
+            "measured": result.measured[1].tolist(),
+            "output": result.output[1].tolist(),
+            "p": result.p[1].tolist(),
+            "i": result.i[1].tolist(),
+            "d": result.d[1].tolist(),
+        }
+    return response
+
+
+async def _async_tune(
+    hass: HomeAssistant, handle: PIDDeviceHandle, data: dict[str, Any]
+) -> ServiceResponse:
+    """Search the gains for a simulated setpoint step and optionally apply them."""
+    params = handle.params
+    trace = await _async_load_trace(hass, handle, data[ATTR_SOURCE])
+    model = await _async_fit_model(hass, trace)
+    setpoint = data.get(ATTR_SETPOINT, params.setpoint)
+    if setpoint is None:
+        raise HomeAssistantError("setpoint is required")
+
+    try:
+        bounds = default_bounds(model)
+    except ValueError as err:
+        raise HomeAssistantError(f"Could not derive search bounds: {err}") from err
+    bounds = tuple(
+        (
+            bound
+            if (limit := data.get(key)) is None
+            else (min(0.0, limit), max(0.0, limit))
+        )
+        for bound, key in zip(bounds, (ATTR_KP_MAX, ATTR_KI_MAX, ATTR_KD_MAX))
     )
-    state = hass.states.get(sensor_entity_id)
-    if state is None or state.state in ("unknown", "unavailable"):
-        _LOGGER.warning("Sensor %s not ready; delaying setup", sensor_entity_id)
-        raise ConfigEntryNotReady(f"Sensor {sensor_entity_id} not ready")
+    # the searches share one pool, of at most its size; one worker needs none
+    workers = min(data.get(ATTR_WORKERS, MAX_WORKERS), default_workers())
+    result = await hass.async_add_executor_job(
+        partial(
+            search_gains,
+            model,
+            setpoint,
+            data[ATTR_DURATION],
+            bounds,
+            method=data[ATTR_METHOD],
+            samples=data[ATTR_SAMPLES],
+            objective=data[ATTR_OBJECTIVE],
+            initial=float(trace.input[-1]),
+            output_limits=(params.output_min, params.output_max),
+            proportional_on_measurement=params.proportional_on_measurement,
+            workers=workers,
+            executor=async_get_search_pool(hass) if workers > 1 else None,
+        )
+    )
+
+    if data[ATTR_APPLY]:
+        for key in ("kp", "ki", "kd"):
+            if (entity_id := handle._get_entity_id("number", key)) is None:
+                raise HomeAssistantError(f"No {key} entity to apply the result to")
+            await hass.services.async_call(
+                "number",
+                "set_value",
+                {
+                    ATTR_ENTITY_ID: entity_id,
+                    "value": round(getattr(result, key), GAIN_DECIMALS),
+                },
+                blocking=True,
+            )
+    return {"model": model.as_dict(), **result.as_dict()}
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up Simple PID Controller from a config entry."""
 
     handle = PIDDeviceHandle(hass, entry)
     entry.runtime_data = MyData(handle=handle)
+    if handle.trace is not None:
+        entry.async_on_unload(handle.trace.async_close)
+    async_register_export_view(hass)
 
     if not hass.services.has_service(DOMAIN, SERVICE_SET_OUTPUT):
 
         async def async_set_output(call: ServiceCall) -> None:
-            entity_id: str | list[str] | None = call.data.get(ATTR_ENTITY_ID)
-            if entity_id is None:
-                raise HomeAssistantError("entity_id is required")
-            if isinstance(entity_id, list):
-                if len(entity_id) != 1:
-                    raise HomeAssistantError("Exactly one entity_id is required")
-                entity_id = entity_id[0]
             preset: str | None = call.data.get(ATTR_PRESET)
             value: float | None = call.data.get(ATTR_VALUE)
 
-            registry = er.async_get(hass)
-            ent = registry.async_get(entity_id)
-            if ent is None:
-                raise HomeAssistantError(f"Unknown entity {entity_id}")
-            config_entry = hass.config_entries.async_get_entry(ent.config_entry_id)
-            if config_entry is None or config_entry.runtime_data is None:
-                raise HomeAssistantError("PID controller not loaded")
+            config_entry = _async_get_target_entry(hass, call)
             dev_handle: PIDDeviceHandle = config_entry.runtime_data.handle
-            out_min = dev_handle.get_number("output_min") or 0.0
-            out_max = dev_handle.get_number("output_max") or 0.0
+            out_min = dev_handle.params.output_min or 0.0
+            out_max = dev_handle.params.output_max or 0.0
 
             if (preset is None and value is None) or (
                 preset is not None and value is not None
@@ -206,7 +978,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 elif preset == "last_known_value":
                     target = dev_handle.last_known_output or 0.0
                 elif preset == "startup_value":
-                    target = dev_handle.get_number("starting_output") or 0.0
+                    target = dev_handle.params.starting_output or 0.0
                 else:
                     raise HomeAssistantError("Invalid preset")
             else:
@@ -229,31 +1001,125 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 coordinator.async_set_updated_data(target)
                 # Update the internal PID output when in manual mode so that
                 # future calls to the controller return the newly set target.
-                dev_handle.pid._last_output = target
+                dev_handle.pid.last_output = target
 
         hass.services.async_register(
             DOMAIN, SERVICE_SET_OUTPUT, async_set_output, schema=SET_OUTPUT_SCHEMA
         )
 
+    if not hass.services.has_service(DOMAIN, SERVICE_TUNE):
+
+        async def async_tune(call: ServiceCall) -> ServiceResponse:
+            config_entry = _async_get_target_entry(hass, call)
+            return await _async_tune(hass, config_entry.runtime_data.handle, call.data)
+
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_TUNE,
+            async_tune,
+            schema=TUNE_SCHEMA,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
+    if not hass.services.has_service(DOMAIN, SERVICE_SIMULATE):
+
+        async def async_simulate(call: ServiceCall) -> ServiceResponse:
+            config_entry = _async_get_target_entry(hass, call)
+            return await _async_simulate(
+                hass, config_entry.runtime_data.handle, call.data
+            )
+
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_SIMULATE,
+            async_simulate,
+            schema=SIMULATE_SCHEMA,
+            supports_response=SupportsResponse.ONLY,
+        )
+
     # register updatelistener for optionsflow
     entry.async_on_unload(entry.add_update_listener(_async_update_options_listener))
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    # keep the entity_id index in sync with renames and removals
+    entry.async_on_unload(
+        hass.bus.async_listen(
+            er.EVENT_ENTITY_REGISTRY_UPDATED,
+            handle.async_handle_entity_registry_updated,
+        )
+    )
+
+    # the sensor platform creates the coordinator the other platforms attach to
+    await hass.config_entries.async_forward_entry_setups(entry, [Platform.SENSOR])
+    await hass.config_entries.async_forward_entry_setups(
+        entry, [platform for platform in PLATFORMS if platform != Platform.SENSOR]
+    )
+
+    # all parameter entities are registered now
+    handle.resolve_entity_ids()
+    coordinator: PIDDataCoordinator = entry.runtime_data.coordinator
+    entry.async_on_unload(
+        handle.async_subscribe_parameters(coordinator.async_request_refresh)
+    )
+    entry.async_on_unload(
+        handle.async_subscribe_input(coordinator.async_handle_input_change)
+    )
+    if handle.get_input_sensor_value() is None:
+        # no retry backoff: the first usable sample starts the control loop
+        _LOGGER.info(
+            "Sensor %s not ready; %s waits for the first sample",
+            handle.sensor_entity_id,
+            handle.name,
+        )
+        coordinator.waiting_for_input = True
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
+    # a reload resumes from the state of the last step
+    await entry.runtime_data.handle.state_store.async_save()
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         # reset runtime_data zodat tests slagen
         entry.runtime_data = None
         if not hass.config_entries.async_entries(DOMAIN):
             hass.services.async_remove(DOMAIN, SERVICE_SET_OUTPUT)
+            hass.services.async_remove(DOMAIN, SERVICE_SIMULATE)
+            hass.services.async_remove(DOMAIN, SERVICE_TUNE)
+        # the entry being unloaded still counts as loaded
+        if all(
+            other is entry for other in hass.config_entries.async_loaded_entries(DOMAIN)
+        ):
+            async_shutdown_search_pool(hass)
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the saved controller state and the trace of a removed entry."""
+    await ControllerStateStore(hass, entry.entry_id, lambda: None).async_remove()
+    await hass.async_add_executor_job(remove_trace, trace_path(hass, entry.entry_id))
+
+
 async def _async_update_options_listener(
     hass: HomeAssistant, entry: ConfigEntry
 ) -> None:
-    """Update after options are changed in optionsflow"""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """Apply changed options in place; reload only for options read at setup."""
+    runtime_data: MyData | None = getattr(entry, "runtime_data", None)
+    if runtime_data is None or runtime_data.coordinator is None:
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    handle = runtime_data.handle
+    changed = handle.changed_options(entry.options)
+    if not changed:
+        return
+    if changed & RELOAD_OPTIONS:
+        _LOGGER.debug("Reloading %s for changed %s", handle.name, sorted(changed))
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    _LOGGER.debug("Applying changed %s to %s", sorted(changed), handle.name)
+    handle.async_apply_options(entry.options)
+    coordinator = runtime_data.coordinator
+    coordinator.async_configure(**scheduling_options(entry.options))
+    # the step picks up the new control mode and reschedules
+    await coordinator.async_request_refresh()
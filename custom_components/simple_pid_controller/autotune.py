@@ -0,0 +1,185 @@
+"""Relay autotune after Åström and Hägglund."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import math
+
+AUTOTUNE_OFF = "Off"
+AUTOTUNE_ZIEGLER_NICHOLS = "Ziegler-Nichols"
+AUTOTUNE_TYREUS_LUYBEN = "Tyreus-Luyben"
+AUTOTUNE_OPTIONS = [AUTOTUNE_OFF, AUTOTUNE_ZIEGLER_NICHOLS, AUTOTUNE_TYREUS_LUYBEN]
+
+AUTOTUNE_RUNNING = "running"
+AUTOTUNE_DONE = "done"
+AUTOTUNE_FAILED = "failed"
+
+# full oscillation cycles measured after the first, transient one
+AUTOTUNE_CYCLES = 3
+# the periods of the measured cycles may differ this much from their mean
+AUTOTUNE_PERIOD_TOLERANCE = 0.2
+# give up when no steady oscillation was found within this time (s)
+AUTOTUNE_TIMEOUT = 4 * 3600.0
+# relay hysteresis as a fraction of the input range
+AUTOTUNE_HYSTERESIS = 0.005
+
+
+@dataclass(slots=True, frozen=True)
+class AutotuneResult:
+    """Ultimate gain and period with the gains proposed by both rules."""
+
+    ultimate_gain: float
+    ultimate_period: float
+    amplitude: float
+
+    def gains(self, rule: str) -> tuple[float, float, float]:
+        """Return (kp, ki, kd) of a tuning rule."""
+        ku, pu = self.ultimate_gain, self.ultimate_period
+        if rule == AUTOTUNE_ZIEGLER_NICHOLS:
+            kp, ti, td = 0.6 * ku, pu / 2, pu / 8
+        elif rule == AUTOTUNE_TYREUS_LUYBEN:
+            kp, ti, td = ku / 2.2, 2.2 * pu, pu / 6.3
+        else:
+            raise ValueError(f"Unknown tuning rule {rule}")
+        return kp, kp / ti, kp * td
+
+    def as_dict(self) -> dict[str, float | dict[str, float]]:
+        proposals: dict[str, float | dict[str, float]] = {
+            "ultimate_gain": self.ultimate_gain,
+            "ultimate_period": self.ultimate_period,
+            "amplitude": self.amplitude,
+        }
+        for rule in (AUTOTUNE_ZIEGLER_NICHOLS, AUTOTUNE_TYREUS_LUYBEN):
+            kp, ki, kd = self.gains(rule)
+            proposals[rule] = {"kp": kp, "ki": ki, "kd": kd}
+        return proposals
+
+
+class RelayAutotuner:
+    """Drive the output as a relay around the setpoint and measure the cycle.
+
+    The output switches to ``output_max`` when the input drops below the
+    setpoint minus ``hysteresis`` and to ``output_min`` when it rises above
+    the setpoint plus ``hysteresis`` (reversed for reverse acting loops). The
+    detector keeps the extremes of the current half cycle and the time of
+    the last upward switch, so every step is O(1).
+
+    From the peak to peak amplitude ``2a`` of the input and the relay
+    amplitude ``d`` the ultimate gain is ``4d / (pi * sqrt(a² - h²))``; the
+    ultimate period is the time between two upward switches.
+    """
+
+    __slots__ = (
+        "_amplitudes",
+        "_cycle_start",
+        "_cycles",
+        "_high",
+        "_low",
+        "_peak_max",
+        "_peak_min",
+        "_periods",
+        "_relay_high",
+        "hysteresis",
+        "result",
+        "reverse",
+        "rule",
+        "setpoint",
+        "started",
+        "state",
+    )
+
+    def __init__(
+        self,
+        rule: str,
+        setpoint: float,
+        output_min: float,
+        output_max: float,
+        hysteresis: float,
+        now: float,
+        reverse: bool = False,
+    ) -> None:
+        if output_max <= output_min:
+            raise ValueError("output_max must be larger than output_min")
+        self.rule = rule
+        self.setpoint = setpoint
+        self.hysteresis = hysteresis
+        self.reverse = reverse
+        self.started = now
+        self.state = AUTOTUNE_RUNNING
+        self.result: AutotuneResult | None = None
+        self._high = output_max
+        self._low = output_min
+        self._relay_high = True
+        self._cycle_start: float | None = None
+        self._peak_max = -math.inf
+        self._peak_min = math.inf
+        self._cycles = 0
+        self._periods: list[float] = []
+        self._amplitudes: list[float] = []
+
+    @property
+    def relay_amplitude(self) -> float:
+        return (self._high - self._low) / 2
+
+    @property
+    def output(self) -> float:
+        """Return the current relay output."""
+        return self._high if self._relay_high != self.reverse else self._low
+
+    def step(self, value: float, now: float) -> float:
+        """Feed one input sample and return the relay output."""
+        if self.state != AUTOTUNE_RUNNING:
+            return self.output
+        if now - self.started > AUTOTUNE_TIMEOUT:
+            self.state = AUTOTUNE_FAILED
+            return self.output
+
+        self._peak_max = max(self._peak_max, value)
+        self._peak_min = min(self._peak_min, value)
+        if self._relay_high and value > self.setpoint + self.hysteresis:
+            self._relay_high = False
+        elif not self._relay_high and value < self.setpoint - self.hysteresis:
+            self._relay_high = True
+            self._complete_cycle(now)
+        return self.output
+
+    def _complete_cycle(self, now: float) -> None:
+        """Record the cycle that ended with an upward switch."""
+        if self._cycle_start is not None:
+            self._cycles += 1
+            # the first cycle starts from an arbitrary state
+            if self._cycles > 1:
+                self._periods.append(now - self._cycle_start)
+                self._amplitudes.append((self._peak_max - self._peak_min) / 2)
+        self._cycle_start = now
+        self._peak_max = -math.inf
+        self._peak_min = math.inf
+        if len(self._periods) < AUTOTUNE_CYCLES:
+            return
+
+        periods = self._periods[-AUTOTUNE_CYCLES:]
+        period = sum(periods) / len(periods)
+        if any(abs(p - period) > AUTOTUNE_PERIOD_TOLERANCE * period for p in periods):
+            return
+        amplitude = sum(self._amplitudes[-AUTOTUNE_CYCLES:]) / AUTOTUNE_CYCLES
+        effective = math.sqrt(max(amplitude**2 - self.hysteresis**2, 0.0))
+        if effective == 0.0:
+            self.state = AUTOTUNE_FAILED
+            return
+        gain = 4 * self.relay_amplitude / (math.pi * effective)
+        self.result = AutotuneResult(
+            ultimate_gain=-gain if self.reverse else gain,
+            ultimate_period=period,
+            amplitude=amplitude,
+        )
+        self.state = AUTOTUNE_DONE
+
+    def stats(self) -> dict[str, object]:
+        """Return the progress of the experiment."""
+        return {
+            "rule": self.rule,
+            "state": self.state,
+            "cycles": self._cycles,
+            "periods": list(self._periods),
+            "result": self.result.as_dict() if self.result else None,
+        }
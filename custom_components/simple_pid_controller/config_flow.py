@@ -21,17 +21,62 @@ from .const import (
     CONF_NAME,
     DEFAULT_NAME,
     CONF_SENSOR_ENTITY_ID,
+    CONF_EXTRA_SENSOR_ENTITY_IDS,
+    CONF_FUSION_MODE,
+    CONF_FUSION_WEIGHTS,
+    CONF_FUSION_MAX_AGE,
+    DEFAULT_FUSION_MODE,
+    DEFAULT_FUSION_WEIGHTS,
+    DEFAULT_FUSION_MAX_AGE,
+    CONF_FILTER_SPIKE_THRESHOLD,
+    CONF_FILTER_MEDIAN_SIZE,
+    CONF_FILTER_EMA_TIME_CONSTANT,
+    CONF_FILTER_RATE_LIMIT,
+    DEFAULT_FILTER_SPIKE_THRESHOLD,
+    DEFAULT_FILTER_MEDIAN_SIZE,
+    DEFAULT_FILTER_EMA_TIME_CONSTANT,
+    DEFAULT_FILTER_RATE_LIMIT,
     CONF_INPUT_RANGE_MIN,
     CONF_INPUT_RANGE_MAX,
     CONF_OUTPUT_RANGE_MIN,
     CONF_OUTPUT_RANGE_MAX,
     CONF_STEP_PREFIX,
+    CONF_CONTROL_MODE,
+    CONF_MIN_INTERVAL,
+    CONF_MAX_INTERVAL,
+    CONF_COALESCE_WINDOW,
+    CONF_SCHEDULE_POLICY,
+    CONF_HISTORY_SIZE,
+    CONF_TRACE_ENABLED,
+    CONF_TRACE_MAX_SIZE,
+    CONF_METRICS_WINDOW,
+    CONF_PROFILING,
+    CONF_OUTPUT_DEADBAND,
+    CONF_DIAGNOSTIC_DEADBAND,
+    CONF_MIN_PUBLISH_INTERVAL,
+    CONTROL_MODES,
+    FUSION_MODES,
+    SCHEDULE_POLICIES,
+    DEFAULT_CONTROL_MODE,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_SCHEDULE_POLICY,
+    DEFAULT_HISTORY_SIZE,
+    DEFAULT_TRACE_ENABLED,
+    DEFAULT_TRACE_MAX_SIZE,
+    DEFAULT_METRICS_WINDOW,
+    DEFAULT_PROFILING,
+    DEFAULT_OUTPUT_DEADBAND,
+    DEFAULT_DIAGNOSTIC_DEADBAND,
+    DEFAULT_MIN_PUBLISH_INTERVAL,
     DEFAULT_INPUT_RANGE_MIN,
     DEFAULT_INPUT_RANGE_MAX,
     DEFAULT_OUTPUT_RANGE_MIN,
     DEFAULT_OUTPUT_RANGE_MAX,
     DEFAULT_STEPS,
 )
+from .fusion import parse_weights
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -166,6 +211,67 @@ class PIDControllerOptionsFlowHandler(OptionsFlow):
                     CONF_SENSOR_ENTITY_ID,
                     default=current_sensor,
                 ): selector({"entity": {"domain": "sensor"}}),
+                vol.Optional(
+                    CONF_EXTRA_SENSOR_ENTITY_IDS,
+                    default=self.config_entry.options.get(
+                        CONF_EXTRA_SENSOR_ENTITY_IDS, []
+                    ),
+                ): selector({"entity": {"domain": "sensor", "multiple": True}}),
+                vol.Optional(
+                    CONF_FUSION_MODE,
+                    default=self.config_entry.options.get(
+                        CONF_FUSION_MODE, DEFAULT_FUSION_MODE
+                    ),
+                ): selector(
+                    {
+                        "select": {
+                            "options": FUSION_MODES,
+                            "translation_key": CONF_FUSION_MODE,
+                        }
+                    }
+                ),
+                vol.Optional(
+                    CONF_FUSION_WEIGHTS,
+                    default=self.config_entry.options.get(
+                        CONF_FUSION_WEIGHTS, DEFAULT_FUSION_WEIGHTS
+                    ),
+                ): selector({"text": {}}),
+                vol.Optional(
+                    CONF_FUSION_MAX_AGE,
+                    default=self.config_entry.options.get(
+                        CONF_FUSION_MAX_AGE, DEFAULT_FUSION_MAX_AGE
+                    ),
+                ): selector(
+                    {"number": {"min": 0, "max": 86400, "step": 1, "mode": "box"}}
+                ),
+                vol.Optional(
+                    CONF_FILTER_SPIKE_THRESHOLD,
+                    default=self.config_entry.options.get(
+                        CONF_FILTER_SPIKE_THRESHOLD, DEFAULT_FILTER_SPIKE_THRESHOLD
+                    ),
+                ): selector({"number": {"min": 0, "step": "any", "mode": "box"}}),
+                vol.Optional(
+                    CONF_FILTER_MEDIAN_SIZE,
+                    default=self.config_entry.options.get(
+                        CONF_FILTER_MEDIAN_SIZE, DEFAULT_FILTER_MEDIAN_SIZE
+                    ),
+                ): selector(
+                    {"number": {"min": 1, "max": 101, "step": 1, "mode": "box"}}
+                ),
+                vol.Optional(
+                    CONF_FILTER_EMA_TIME_CONSTANT,
+                    default=self.config_entry.options.get(
+                        CONF_FILTER_EMA_TIME_CONSTANT, DEFAULT_FILTER_EMA_TIME_CONSTANT
+                    ),
+                ): selector(
+                    {"number": {"min": 0, "max": 86400, "step": 0.1, "mode": "box"}}
+                ),
+                vol.Optional(
+                    CONF_FILTER_RATE_LIMIT,
+                    default=self.config_entry.options.get(
+                        CONF_FILTER_RATE_LIMIT, DEFAULT_FILTER_RATE_LIMIT
+                    ),
+                ): selector({"number": {"min": 0, "step": "any", "mode": "box"}}),
                 vol.Required(
                     CONF_INPUT_RANGE_MIN,
                     default=current_input_min,
@@ -183,6 +289,131 @@ class PIDControllerOptionsFlowHandler(OptionsFlow):
                     default=current_output_max,
                 ): vol.Coerce(float),
                 **step_fields,
+                vol.Optional(
+                    CONF_CONTROL_MODE,
+                    default=self.config_entry.options.get(
+                        CONF_CONTROL_MODE, DEFAULT_CONTROL_MODE
+                    ),
+                ): selector(
+                    {
+                        "select": {
+                            "options": CONTROL_MODES,
+                            "translation_key": CONF_CONTROL_MODE,
+                        }
+                    }
+                ),
+                vol.Optional(
+                    CONF_MIN_INTERVAL,
+                    default=self.config_entry.options.get(
+                        CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL
+                    ),
+                ): selector(
+                    {"number": {"min": 0.0, "max": 600.0, "step": 0.01, "mode": "box"}}
+                ),
+                vol.Optional(
+                    CONF_MAX_INTERVAL,
+                    default=self.config_entry.options.get(
+                        CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL
+                    ),
+                ): selector(
+                    {
+                        "number": {
+                            "min": 0.01,
+                            "max": 3600.0,
+                            "step": 0.01,
+                            "mode": "box",
+                        }
+                    }
+                ),
+                vol.Optional(
+                    CONF_SCHEDULE_POLICY,
+                    default=self.config_entry.options.get(
+                        CONF_SCHEDULE_POLICY, DEFAULT_SCHEDULE_POLICY
+                    ),
+                ): selector(
+                    {
+                        "select": {
+                            "options": SCHEDULE_POLICIES,
+                            "translation_key": CONF_SCHEDULE_POLICY,
+                        }
+                    }
+                ),
+                vol.Optional(
+                    CONF_COALESCE_WINDOW,
+                    default=self.config_entry.options.get(
+                        CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW
+                    ),
+                ): selector(
+                    {"number": {"min": 0.0, "max": 60.0, "step": 0.01, "mode": "box"}}
+                ),
+                vol.Optional(
+                    CONF_HISTORY_SIZE,
+                    default=self.config_entry.options.get(
+                        CONF_HISTORY_SIZE, DEFAULT_HISTORY_SIZE
+                    ),
+                ): selector(
+                    {"number": {"min": 10, "max": 100000, "step": 1, "mode": "box"}}
+                ),
+                vol.Optional(
+                    CONF_TRACE_ENABLED,
+                    default=self.config_entry.options.get(
+                        CONF_TRACE_ENABLED, DEFAULT_TRACE_ENABLED
+                    ),
+                ): selector({"boolean": {}}),
+                vol.Optional(
+                    CONF_TRACE_MAX_SIZE,
+                    default=self.config_entry.options.get(
+                        CONF_TRACE_MAX_SIZE, DEFAULT_TRACE_MAX_SIZE
+                    ),
+                ): selector(
+                    {"number": {"min": 0.1, "max": 1000, "step": 0.1, "mode": "box"}}
+                ),
+                vol.Optional(
+                    CONF_METRICS_WINDOW,
+                    default=self.config_entry.options.get(
+                        CONF_METRICS_WINDOW, DEFAULT_METRICS_WINDOW
+                    ),
+                ): selector(
+                    {"number": {"min": 60, "max": 604800, "step": 1, "mode": "box"}}
+                ),
+                vol.Optional(
+                    CONF_OUTPUT_DEADBAND,
+                    default=self.config_entry.options.get(
+                        CONF_OUTPUT_DEADBAND, DEFAULT_OUTPUT_DEADBAND
+                    ),
+                ): selector(
+                    {"number": {"min": 0, "max": 1000, "step": 0.01, "mode": "box"}}
+                ),
+                vol.Optional(
+                    CONF_DIAGNOSTIC_DEADBAND,
+                    default=self.config_entry.options.get(
+                        CONF_DIAGNOSTIC_DEADBAND, DEFAULT_DIAGNOSTIC_DEADBAND
+                    ),
+                ): selector(
+                    {
+                        "number": {
+                            "min": 0,
+                            "max": 100,
+                            "step": 0.1,
+                            "unit_of_measurement": "%",
+                            "mode": "box",
+                        }
+                    }
+                ),
+                vol.Optional(
+                    CONF_MIN_PUBLISH_INTERVAL,
+                    default=self.config_entry.options.get(
+                        CONF_MIN_PUBLISH_INTERVAL, DEFAULT_MIN_PUBLISH_INTERVAL
+                    ),
+                ): selector(
+                    {"number": {"min": 0, "max": 3600, "step": 0.1, "mode": "box"}}
+                ),
+                vol.Optional(
+                    CONF_PROFILING,
+                    default=self.config_entry.options.get(
+                        CONF_PROFILING, DEFAULT_PROFILING
+                    ),
+                ): selector({"boolean": {}}),
             }
         )
 
@@ -214,6 +445,24 @@ class PIDControllerOptionsFlowHandler(OptionsFlow):
                     errors={"base": "output_range_min_max"},
                 )
 
+            inputs = dict.fromkeys(
+                [
+                    user_input.get(CONF_SENSOR_ENTITY_ID),
+                    *user_input.get(CONF_EXTRA_SENSOR_ENTITY_IDS, []),
+                ]
+            )
+            try:
+                parse_weights(
+                    user_input.get(CONF_FUSION_WEIGHTS, DEFAULT_FUSION_WEIGHTS),
+                    len(inputs),
+                )
+            except ValueError:
+                return self.async_show_form(
+                    step_id="init",
+                    data_schema=options_schema,
+                    errors={"base": "fusion_weights"},
+                )
+
             return self.async_create_entry(
                 title=self.config_entry.title,
                 data=user_input,
@@ -7,6 +7,47 @@ DEFAULT_NAME = "sPID-x"
 
 CONF_SENSOR_ENTITY_ID = "sensor_entity_id"
 
+# extra input sensors fused with the sensor entity into one process value
+CONF_EXTRA_SENSOR_ENTITY_IDS = "extra_sensor_entity_ids"
+CONF_FUSION_MODE = "fusion_mode"
+CONF_FUSION_WEIGHTS = "fusion_weights"
+# inputs that did not report for this many seconds are left out (0: never)
+CONF_FUSION_MAX_AGE = "fusion_max_age"
+FUSION_MEAN = "mean"
+FUSION_WEIGHTED_MEAN = "weighted_mean"
+FUSION_MEDIAN = "median"
+FUSION_MIN = "min"
+FUSION_MAX = "max"
+FUSION_MODES = [
+    FUSION_MEAN,
+    FUSION_WEIGHTED_MEAN,
+    FUSION_MEDIAN,
+    FUSION_MIN,
+    FUSION_MAX,
+]
+DEFAULT_FUSION_MODE = FUSION_MEAN
+DEFAULT_FUSION_WEIGHTS = ""
+DEFAULT_FUSION_MAX_AGE = 0.0
+
+# filters applied to the input before the PID step; 0 (1 for the median
+# size) disables a stage
+CONF_FILTER_SPIKE_THRESHOLD = "filter_spike_threshold"
+CONF_FILTER_MEDIAN_SIZE = "filter_median_size"
+CONF_FILTER_EMA_TIME_CONSTANT = "filter_ema_time_constant"
+CONF_FILTER_RATE_LIMIT = "filter_rate_limit"
+DEFAULT_FILTER_SPIKE_THRESHOLD = 0.0
+DEFAULT_FILTER_MEDIAN_SIZE = 1
+DEFAULT_FILTER_EMA_TIME_CONSTANT = 0.0
+DEFAULT_FILTER_RATE_LIMIT = 0.0
+FILTER_OPTIONS = frozenset(
+    {
+        CONF_FILTER_SPIKE_THRESHOLD,
+        CONF_FILTER_MEDIAN_SIZE,
+        CONF_FILTER_EMA_TIME_CONSTANT,
+        CONF_FILTER_RATE_LIMIT,
+    }
+)
+
 CONF_INPUT_RANGE_MIN = "input_range_min"
 CONF_INPUT_RANGE_MAX = "input_range_max"
 CONF_OUTPUT_RANGE_MIN = "output_range_min"
@@ -19,6 +60,68 @@ DEFAULT_OUTPUT_RANGE_MAX = 100.0
 
 CONF_STEP_PREFIX = "step_"
 
+CONF_CONTROL_MODE = "control_mode"
+CONTROL_MODE_PERIODIC = "periodic"
+CONTROL_MODE_ON_INPUT_CHANGE = "on_input_change"
+CONTROL_MODE_HYBRID = "hybrid"
+CONTROL_MODES = [
+    CONTROL_MODE_PERIODIC,
+    CONTROL_MODE_ON_INPUT_CHANGE,
+    CONTROL_MODE_HYBRID,
+]
+DEFAULT_CONTROL_MODE = CONTROL_MODE_PERIODIC
+
+# minimum time between input triggered steps and heartbeat of the hybrid mode
+CONF_MIN_INTERVAL = "min_interval"
+CONF_MAX_INTERVAL = "max_interval"
+DEFAULT_MIN_INTERVAL = 0.5
+DEFAULT_MAX_INTERVAL = 60.0
+
+# what to do with deadlines of the fixed-rate scheduler that were missed
+CONF_SCHEDULE_POLICY = "schedule_policy"
+SCHEDULE_POLICY_SKIP = "skip"
+SCHEDULE_POLICY_CATCH_UP = "catch_up"
+SCHEDULE_POLICIES = [SCHEDULE_POLICY_SKIP, SCHEDULE_POLICY_CATCH_UP]
+DEFAULT_SCHEDULE_POLICY = SCHEDULE_POLICY_SKIP
+
+# bursts of parameter changes within this window run a single PID step
+CONF_COALESCE_WINDOW = "coalesce_window"
+DEFAULT_COALESCE_WINDOW = 0.2
+
+# number of ticks kept in the history ring buffer
+CONF_HISTORY_SIZE = "history_size"
+DEFAULT_HISTORY_SIZE = 1000
+
+# optional binary trace of every PID step, rotated at the size in MB
+CONF_TRACE_ENABLED = "trace_enabled"
+CONF_TRACE_MAX_SIZE = "trace_max_size"
+DEFAULT_TRACE_ENABLED = False
+DEFAULT_TRACE_MAX_SIZE = 10.0
+
+# sliding window of the performance metrics sensors, in seconds
+CONF_METRICS_WINDOW = "metrics_window"
+DEFAULT_METRICS_WINDOW = 3600.0
+
+# sensor states are only written when they change by more than the deadband,
+# and at most once per minimum publish interval (s); the output deadband is in
+# output units, the diagnostic one in % of the last written value of a sensor
+CONF_OUTPUT_DEADBAND = "output_deadband"
+CONF_DIAGNOSTIC_DEADBAND = "diagnostic_deadband"
+CONF_MIN_PUBLISH_INTERVAL = "min_publish_interval"
+DEFAULT_OUTPUT_DEADBAND = 0.0
+DEFAULT_DIAGNOSTIC_DEADBAND = 0.0
+DEFAULT_MIN_PUBLISH_INTERVAL = 0.0
+
+# record per-phase durations of every PID step
+CONF_PROFILING = "profiling"
+DEFAULT_PROFILING = False
+
+# options only read while setting up; changing one of them reloads the entry,
+# all other options are applied to the running controller
+RELOAD_OPTIONS = frozenset(
+    {CONF_HISTORY_SIZE, CONF_TRACE_ENABLED, CONF_TRACE_MAX_SIZE, CONF_PROFILING}
+)
+
 DEFAULT_STEPS: dict[str, float] = {
     "kp": 0.0001,
     "ki": 0.0001,
@@ -29,3 +132,46 @@ DEFAULT_STEPS: dict[str, float] = {
     "output_max": 1.0,
     "starting_output": 1.0,
 }
+
+# value of every option that is missing from the entry options, so an options
+# flow submit that writes the defaults of untouched options changes nothing
+OPTION_DEFAULTS: dict[str, object] = {
+    CONF_EXTRA_SENSOR_ENTITY_IDS: [],
+    CONF_FUSION_MODE: DEFAULT_FUSION_MODE,
+    CONF_FUSION_WEIGHTS: DEFAULT_FUSION_WEIGHTS,
+    CONF_FUSION_MAX_AGE: DEFAULT_FUSION_MAX_AGE,
+    CONF_FILTER_SPIKE_THRESHOLD: DEFAULT_FILTER_SPIKE_THRESHOLD,
+    CONF_FILTER_MEDIAN_SIZE: DEFAULT_FILTER_MEDIAN_SIZE,
+    CONF_FILTER_EMA_TIME_CONSTANT: DEFAULT_FILTER_EMA_TIME_CONSTANT,
+    CONF_FILTER_RATE_LIMIT: DEFAULT_FILTER_RATE_LIMIT,
+    CONF_CONTROL_MODE: DEFAULT_CONTROL_MODE,
+    CONF_MIN_INTERVAL: DEFAULT_MIN_INTERVAL,
+    CONF_MAX_INTERVAL: DEFAULT_MAX_INTERVAL,
+    CONF_SCHEDULE_POLICY: DEFAULT_SCHEDULE_POLICY,
+    CONF_COALESCE_WINDOW: DEFAULT_COALESCE_WINDOW,
+    CONF_HISTORY_SIZE: DEFAULT_HISTORY_SIZE,
+    CONF_TRACE_ENABLED: DEFAULT_TRACE_ENABLED,
+    CONF_TRACE_MAX_SIZE: DEFAULT_TRACE_MAX_SIZE,
+    CONF_METRICS_WINDOW: DEFAULT_METRICS_WINDOW,
+    CONF_OUTPUT_DEADBAND: DEFAULT_OUTPUT_DEADBAND,
+    CONF_DIAGNOSTIC_DEADBAND: DEFAULT_DIAGNOSTIC_DEADBAND,
+    CONF_MIN_PUBLISH_INTERVAL: DEFAULT_MIN_PUBLISH_INTERVAL,
+    CONF_PROFILING: DEFAULT_PROFILING,
+    **{f"{CONF_STEP_PREFIX}{key}": step for key, step in DEFAULT_STEPS.items()},
+}
+
+# (platform, key) of every parameter entity read by the control loop
+PARAMETER_ENTITIES: tuple[tuple[str, str], ...] = (
+    ("number", "kp"),
+    ("number", "ki"),
+    ("number", "kd"),
+    ("number", "setpoint"),
+    ("number", "starting_output"),
+    ("number", "sample_time"),
+    ("number", "output_min"),
+    ("number", "output_max"),
+    ("switch", "auto_mode"),
+    ("switch", "proportional_on_measurement"),
+    ("switch", "windup_protection"),
+    ("select", "start_mode"),
+)
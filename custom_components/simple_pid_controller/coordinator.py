@@ -1,21 +1,64 @@
 """Coordinator for Simple PID Controller."""
 
+from collections.abc import Coroutine, Mapping
 from datetime import timedelta
 import logging
+from time import perf_counter_ns
+from typing import Any
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .const import DOMAIN
+from .const import (
+    CONF_COALESCE_WINDOW,
+    CONF_CONTROL_MODE,
+    CONF_MAX_INTERVAL,
+    CONF_MIN_INTERVAL,
+    CONF_SCHEDULE_POLICY,
+    CONTROL_MODE_HYBRID,
+    CONTROL_MODE_ON_INPUT_CHANGE,
+    CONTROL_MODE_PERIODIC,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_CONTROL_MODE,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_SCHEDULE_POLICY,
+    DOMAIN,
+)
+from .profiling import PhaseProfiler
+from .scheduler import TickMember, async_get_tick_scheduler
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def scheduling_options(options: Mapping[str, Any]) -> dict[str, Any]:
+    """Return the scheduling keyword arguments of the coordinator from options."""
+    return {
+        "control_mode": options.get(CONF_CONTROL_MODE, DEFAULT_CONTROL_MODE),
+        "min_interval": options.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL),
+        "max_interval": options.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL),
+        "coalesce_window": options.get(CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW),
+        "schedule_policy": options.get(CONF_SCHEDULE_POLICY, DEFAULT_SCHEDULE_POLICY),
+    }
+
+
 class PIDDataCoordinator(DataUpdateCoordinator[float]):
     """Coordinator responsible for scheduling PID controller updates."""
 
     def __init__(
-        self, hass: HomeAssistant, name: str, update_method, interval: float = 10
+        self,
+        hass: HomeAssistant,
+        name: str,
+        update_method,
+        interval: float = 10,
+        control_mode: str = DEFAULT_CONTROL_MODE,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        coalesce_window: float = DEFAULT_COALESCE_WINDOW,
+        schedule_policy: str = DEFAULT_SCHEDULE_POLICY,
+        profiler: PhaseProfiler | None = None,
     ):
         """Initialize the coordinator."""
         super().__init__(
@@ -25,10 +68,212 @@ class PIDDataCoordinator(DataUpdateCoordinator[float]):
             update_interval=timedelta(seconds=interval),
         )
         self.update_method = update_method
+        self.coalesce_window = coalesce_window
+        self._coalescer = self._create_coalescer()
+        self.requested_refreshes = 0
+        self.executed_refreshes = 0
+        self.control_mode = control_mode
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.schedule_policy = schedule_policy
+        self._last_step: float | None = None
+        self._unsub_input_step: CALLBACK_TYPE | None = None
+        self._tick_member: TickMember | None = None
+        self.profiler = profiler
+        # set while the input has no usable state; its first sample runs a step
+        self.waiting_for_input = False
+
+    def _create_coalescer(self) -> Debouncer[Coroutine[Any, Any, None]]:
+        """Return the debouncer that coalesces requested refreshes."""
+        # not immediate: a burst of requests runs one step after the window
+        return Debouncer(
+            self.hass,
+            _LOGGER,
+            cooldown=self.coalesce_window,
+            immediate=False,
+            function=self._async_coalesced_refresh,
+        )
 
     async def _async_update_data(self) -> float:
         """Perform the PID calculation and return the new output value."""
+        self._last_step = self.hass.loop.time()
+        # this step serves the requests that are waiting to be coalesced
+        self._coalescer.async_cancel()
         try:
             return await self.update_method()
+        except UpdateFailed:
+            raise
         except Exception as err:
             raise UpdateFailed(f"PID update failed: {err}") from err
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Write the entity states, timed as the publish phase when profiling."""
+        if self.profiler is None:
+            super().async_update_listeners()
+            return
+        start = perf_counter_ns()
+        super().async_update_listeners()
+        self.profiler.record_publish(perf_counter_ns() - start)
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        """Wait for the next tick of the shared group of our sample time."""
+        if self._update_interval_seconds is None:
+            self._async_leave_tick_group()
+            return
+        if self.config_entry and self.config_entry.pref_disable_polling:
+            return
+        if self._retry_after is not None:
+            # a failed update asked for a later retry; the controller leaves
+            # its group until then and rejoins on the next schedule
+            self._async_leave_tick_group()
+            super()._schedule_refresh()
+            return
+        member = self._tick_member
+        if (
+            member is None
+            or member.period != self._update_interval_seconds
+            or member.policy != self.schedule_policy
+        ):
+            self._async_leave_tick_group()
+            member = self._tick_member = async_get_tick_scheduler(
+                self.hass
+            ).async_register(
+                self._update_interval_seconds,
+                self.schedule_policy,
+                self._async_on_tick,
+            )
+        self._unsub_refresh = member.disarm
+        member.arm()
+
+    async def _async_on_tick(self) -> None:
+        """Run the PID step of a group tick."""
+        self._unsub_refresh = None
+        await self._handle_refresh_interval()
+
+    @callback
+    def _async_leave_tick_group(self) -> None:
+        """Stop receiving ticks from the shared scheduler."""
+        if self._tick_member is not None:
+            self._tick_member.remove()
+            self._tick_member = None
+
+    @callback
+    def _unschedule_refresh(self) -> None:
+        """Leave the tick group when the last listener is removed."""
+        super()._unschedule_refresh()
+        self._coalescer.async_cancel()
+        self._async_leave_tick_group()
+
+    def scheduler_stats(self) -> dict[str, float | int | str | None]:
+        """Return the statistics of the tick group this controller is in."""
+        if self._tick_member is None:
+            return {"period": None, "policy": self.schedule_policy}
+        return {
+            **self._tick_member.group.stats(),
+            "missed_ticks": self._tick_member.missed_ticks,
+        }
+
+    async def async_request_refresh(self) -> None:
+        """Request a PID step, coalesced with other requests in the window."""
+        self.requested_refreshes += 1
+        await self._coalescer.async_call()
+
+    async def _async_coalesced_refresh(self) -> None:
+        """Run the single step that serves all coalesced requests."""
+        self.executed_refreshes += 1
+        await self.async_refresh()
+
+    def coalescing_stats(self) -> dict[str, float | int]:
+        """Return the coalescing window and requested/executed counters."""
+        return {
+            "window": self.coalesce_window,
+            "requested": self.requested_refreshes,
+            "executed": self.executed_refreshes,
+        }
+
+    @callback
+    def async_configure(
+        self,
+        control_mode: str,
+        min_interval: float,
+        max_interval: float,
+        coalesce_window: float,
+        schedule_policy: str,
+    ) -> None:
+        """Change the scheduling of a running coordinator.
+
+        The interval follows the control mode on the next step, and a new
+        schedule policy moves the controller to another tick group when it
+        is rescheduled.
+        """
+        self.control_mode = control_mode
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        if coalesce_window != self.coalesce_window:
+            self.coalesce_window = coalesce_window
+            self._coalescer.async_shutdown()
+            self._coalescer = self._create_coalescer()
+        self.schedule_policy = schedule_policy
+        if (
+            control_mode not in (CONTROL_MODE_ON_INPUT_CHANGE, CONTROL_MODE_HYBRID)
+            and self._unsub_input_step is not None
+        ):
+            self._unsub_input_step()
+            self._unsub_input_step = None
+
+    def set_sample_time(self, sample_time: float) -> None:
+        """Apply the sample time to the polling interval of the control mode."""
+        if self.control_mode == CONTROL_MODE_PERIODIC:
+            interval = timedelta(seconds=sample_time)
+        elif self.control_mode == CONTROL_MODE_HYBRID:
+            interval = timedelta(seconds=self.max_interval)
+        else:
+            interval = None
+        if self.update_interval != interval:
+            _LOGGER.debug("Updating coordinator interval to %s", interval)
+            self.update_interval = interval
+
+    @callback
+    def async_handle_input_change(self) -> None:
+        """Run a PID step for a new input sample, at most once per min_interval.
+
+        While waiting for input the first sample runs a step in every control
+        mode, so a late input sensor starts the loop without delay.
+        """
+        if self.waiting_for_input:
+            self.waiting_for_input = False
+            _LOGGER.debug("First input sample for %s, starting control", self.name)
+            self.hass.async_create_task(self.async_refresh())
+            return
+        if self.control_mode not in (CONTROL_MODE_ON_INPUT_CHANGE, CONTROL_MODE_HYBRID):
+            return
+        if self._unsub_input_step is not None:
+            # a step is already pending and will pick up the latest sample
+            return
+
+        elapsed = None
+        if self._last_step is not None:
+            elapsed = self.hass.loop.time() - self._last_step
+        if elapsed is None or elapsed >= self.min_interval:
+            self.hass.async_create_task(self.async_refresh())
+            return
+
+        self._unsub_input_step = async_call_later(
+            self.hass, self.min_interval - elapsed, self._async_input_step_later
+        )
+
+    async def _async_input_step_later(self, _now) -> None:
+        """Run the input triggered step that was held back by min_interval."""
+        self._unsub_input_step = None
+        await self.async_refresh()
+
+    async def async_shutdown(self) -> None:
+        """Cancel pending input triggered steps and scheduled refreshes."""
+        if self._unsub_input_step is not None:
+            self._unsub_input_step()
+            self._unsub_input_step = None
+        self._coalescer.async_shutdown()
+        await super().async_shutdown()
+        self._async_leave_tick_group()
@@ -2,16 +2,24 @@
 
 from __future__ import annotations
 
+from time import time
 from typing import Any
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
 
+from .engine import PID_ENGINE
+from .export import EXPORT_URL
+from .tracelog import trace_summary
+
+DIAGNOSTICS_HISTORY = 100
+
 
 async def async_get_config_entry_diagnostics(
     hass: HomeAssistant, entry: ConfigEntry
 ) -> dict[str, Any]:
     """Return diagnostics for a config entry."""
     handle = entry.runtime_data.handle
+    coordinator = entry.runtime_data.coordinator
 
     sensor_state = hass.states.get(handle.sensor_entity_id)
     input_sensor_info: dict[str, Any] | None = None
@@ -24,6 +32,16 @@ async def async_get_config_entry_diagnostics(
             "last_updated": sensor_state.last_updated.isoformat(),
         }
 
+    trace: dict[str, Any] | None = None
+    if handle.trace is not None:
+        await handle.trace.async_flush()
+        trace = {
+            **handle.trace.stats(),
+            **await hass.async_add_executor_job(trace_summary, handle.trace.path),
+        }
+
+    engine = hass.data.get(PID_ENGINE)
+
     return {
         "entry_data": entry.as_dict(),
         "data": {
@@ -34,11 +52,34 @@ async def async_get_config_entry_diagnostics(
             "output_range_min": handle.output_range_min,
             "output_range_max": handle.output_range_max,
             "input_sensor": input_sensor_info,
-            "history": {
-                "input": list(handle.input_history),
-                "output": list(handle.output_history),
-                "pid_contributions": list(handle.pid_contribution_history),
-                "sample_time": list(handle.sample_time_history),
+            "input_fusion": handle.fusion and handle.fusion.stats(time()),
+            "input_filter": handle.input_filter and handle.input_filter.stats(),
+            # the full history is available from the streaming export
+            "history": handle.history.as_dict(last=DIAGNOSTICS_HISTORY),
+            "export_url": EXPORT_URL.format(entry_id=entry.entry_id),
+            "entity_id_cache": handle.entity_id_cache_stats(),
+            "refresh_coalescing": coordinator.coalescing_stats(),
+            "scheduler": coordinator.scheduler_stats(),
+            "pid_engine": engine and engine.stats(),
+            "suppressed_writes": {
+                key: sensor.suppressed_writes
+                for key, sensor in handle.published_sensors.items()
+            },
+            "waiting_for_input": coordinator.waiting_for_input,
+            "controller_state": {
+                "restored": handle.state_restored,
+                **(handle.controller_state() or {}),
             },
+            "metrics": handle.metrics.values(),
+            "profiling": handle.profiler and handle.profiler.stats(),
+            "trace": trace,
+            "autotune": (
+                handle.autotuner.stats()
+                if handle.autotuner is not None
+                else {
+                    "result": handle.autotune_result
+                    and handle.autotune_result.as_dict()
+                }
+            ),
         },
     }
@@ -0,0 +1,336 @@
+"""Vectorized PID engine stepping many controllers at once.
+
+The controllers of all config entries live in the slots of one shared
+engine. The steps they request in the same event loop iteration, such as
+those of the controllers woken by one scheduler tick, run in a single
+vectorized pass. The offline simulation, replay and gain search step their
+candidate tunings with the same engine.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Generator, Sequence
+from contextlib import contextmanager
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util.hass_dict import HassKey
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from .const import DOMAIN
+
+# simple_pid replaces a zero time step by this value to avoid dividing by zero
+MIN_DT = 1e-16
+
+# output (None before the first one) and the P, I and D terms of a step
+StepValues = tuple[float | None, float, float, float]
+
+
+class BatchPIDEngine:
+    """Gains, limits and state of many PID controllers in contiguous arrays.
+
+    Each controller occupies a slot. ``step`` computes the P, I and D terms,
+    the integral and output clamping and the bookkeeping of all given slots in
+    one vectorized pass, with the same arithmetic as ``simple_pid.PID`` (with
+    derivative on measurement and without an error map). Values that are
+    ``None`` in simple_pid are stored as NaN; open output limits as +/-inf.
+    """
+
+    _ARRAYS = (
+        "_in_use",
+        "kp",
+        "ki",
+        "kd",
+        "setpoint",
+        "sample_time",
+        "output_min",
+        "output_max",
+        "auto_mode",
+        "proportional_on_measurement",
+        "proportional",
+        "integral",
+        "derivative",
+        "last_time",
+        "last_output",
+        "last_input",
+    )
+
+    def __init__(
+        self,
+        capacity: int = 16,
+        time_fn: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.time_fn = time_fn
+        self._size = 0
+        self._free: list[int] = []
+        # steps requested with async_step inside a batch block
+        self._batching = False
+        self._queued: dict[int, tuple[float, asyncio.Future[StepValues]]] = {}
+        self.batches = 0
+        self.batched_steps = 0
+        self._in_use = np.zeros(0, dtype=bool)
+        self.kp = np.zeros(0)
+        self.ki = np.zeros(0)
+        self.kd = np.zeros(0)
+        self.setpoint = np.zeros(0)
+        self.sample_time = np.zeros(0)
+        self.output_min = np.zeros(0)
+        self.output_max = np.zeros(0)
+        self.auto_mode = np.zeros(0, dtype=bool)
+        self.proportional_on_measurement = np.zeros(0, dtype=bool)
+        self.proportional = np.zeros(0)
+        self.integral = np.zeros(0)
+        self.derivative = np.zeros(0)
+        self.last_time = np.zeros(0)
+        self.last_output = np.zeros(0)
+        self.last_input = np.zeros(0)
+        self._grow(max(capacity, 1))
+
+    def _grow(self, capacity: int) -> None:
+        """Enlarge all arrays to ``capacity`` slots, keeping their content."""
+        old = len(self.kp)
+        for name in self._ARRAYS:
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:old] = array
+            setattr(self, name, grown)
+        self._free.extend(range(capacity - 1, old - 1, -1))
+
+    def __len__(self) -> int:
+        """Return the number of controllers in the engine."""
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        """Return the number of allocated slots."""
+        return len(self.kp)
+
+    def add(
+        self,
+        kp: float = 1.0,
+        ki: float = 0.0,
+        kd: float = 0.0,
+        setpoint: float = 0.0,
+        sample_time: float | None = None,
+        output_limits: tuple[float | None, float | None] = (None, None),
+        auto_mode: bool = True,
+        proportional_on_measurement: bool = False,
+        starting_output: float = 0.0,
+    ) -> int:
+        """Add a controller and return its slot."""
+        if not self._free:
+            self._grow(self.capacity * 2)
+        slot = self._free.pop()
+        self._in_use[slot] = True
+        self._size += 1
+        self.kp[slot], self.ki[slot], self.kd[slot] = kp, ki, kd
+        self.setpoint[slot] = setpoint
+        self.sample_time[slot] = np.nan if sample_time is None else sample_time
+        self.auto_mode[slot] = auto_mode
+        self.proportional_on_measurement[slot] = proportional_on_measurement
+        self.output_min[slot], self.output_max[slot] = -np.inf, np.inf
+        self.reset(slot)
+        self.set_output_limits(slot, output_limits)
+        self.integral[slot] = self._clamp(slot, starting_output)
+        return slot
+
+    def remove(self, slot: int) -> None:
+        """Free the slot of a controller."""
+        if not self._in_use[slot]:
+            raise KeyError(slot)
+        if (queued := self._queued.pop(slot, None)) is not None:
+            queued[1].cancel()
+        self._in_use[slot] = False
+        self._size -= 1
+        self._free.append(slot)
+
+    def _clamp(self, slot: int, value: float) -> float:
+        """Clamp a value to the output limits of a slot, keeping NaN."""
+        return float(np.clip(value, self.output_min[slot], self.output_max[slot]))
+
+    def reset(self, slot: int) -> None:
+        """Clear the terms, the last output and the last input of a slot."""
+        self.proportional[slot] = 0.0
+        self.integral[slot] = self._clamp(slot, 0.0)
+        self.derivative[slot] = 0.0
+        self.last_time[slot] = self.time_fn()
+        self.last_output[slot] = np.nan
+        self.last_input[slot] = np.nan
+
+    def set_tunings(self, slot: int, kp: float, ki: float, kd: float) -> None:
+        """Set the gains of a slot."""
+        self.kp[slot], self.ki[slot], self.kd[slot] = kp, ki, kd
+
+    def set_output_limits(
+        self, slot: int, limits: tuple[float | None, float | None]
+    ) -> None:
+        """Set the output limits of a slot and clamp its integral and output."""
+        lower, upper = limits
+        if lower is not None and upper is not None and upper < lower:
+            raise ValueError("lower limit must be less than upper limit")
+        self.output_min[slot] = -np.inf if lower is None else lower
+        self.output_max[slot] = np.inf if upper is None else upper
+        self.integral[slot] = self._clamp(slot, self.integral[slot])
+        self.last_output[slot] = self._clamp(slot, self.last_output[slot])
+
+    def set_auto_mode(
+        self, slot: int, enabled: bool, last_output: float | None = None
+    ) -> None:
+        """Enable or disable a slot; switching to auto starts from last_output."""
+        if enabled and not self.auto_mode[slot]:
+            self.reset(slot)
+            self.integral[slot] = self._clamp(
+                slot, 0.0 if last_output is None else last_output
+            )
+        self.auto_mode[slot] = enabled
+
+    def last_output_of(self, slot: int) -> float | None:
+        """Return the last output of a slot, None before the first one."""
+        output = float(self.last_output[slot])
+        return None if np.isnan(output) else output
+
+    def components(self, slot: int) -> tuple[float, float, float]:
+        """Return the P, I and D terms of the last step of a slot."""
+        return (
+            float(self.proportional[slot]),
+            float(self.integral[slot]),
+            float(self.derivative[slot]),
+        )
+
+    def step(
+        self,
+        slots: Sequence[int] | NDArray[np.intp],
+        inputs: ArrayLike,
+        dt: ArrayLike | None = None,
+    ) -> NDArray[np.float64]:
+        """Step the controllers in ``slots`` with ``inputs`` and return the outputs.
+
+        ``dt`` overrides the measured time step, like the ``dt`` argument of
+        ``simple_pid.PID.__call__``. Slots in manual mode, or whose sample time
+        has not passed yet, return their last output (NaN before the first one).
+        """
+        idx = np.asarray(slots, dtype=np.intp)
+        input_ = np.asarray(inputs, dtype=np.float64)
+        now = self.time_fn()
+        if dt is None:
+            elapsed = now - self.last_time[idx]
+            step_dt = np.where(elapsed != 0, elapsed, MIN_DT)
+        else:
+            step_dt = np.broadcast_to(np.asarray(dt, dtype=np.float64), idx.shape)
+            if np.any(step_dt <= 0):
+                raise ValueError("dt must be positive")
+
+        last_output = self.last_output[idx]
+        # NaN comparisons are False, so slots without a sample time always run
+        waiting = (step_dt < self.sample_time[idx]) & ~np.isnan(last_output)
+        run = self.auto_mode[idx] & ~waiting
+        if not run.all():
+            idx, input_, step_dt = idx[run], input_[run], step_dt[run]
+
+        kp = self.kp[idx]
+        last_input = self.last_input[idx]
+        error = self.setpoint[idx] - input_
+        d_input = input_ - np.where(np.isnan(last_input), input_, last_input)
+
+        p_on_m = self.proportional_on_measurement[idx]
+        proportional = np.where(
+            p_on_m, self.proportional[idx] - kp * d_input, kp * error
+        )
+        lower, upper = self.output_min[idx], self.output_max[idx]
+        integral = np.clip(
+            self.integral[idx] + self.ki[idx] * error * step_dt, lower, upper
+        )
+        derivative = -self.kd[idx] * d_input / step_dt
+        output = np.clip(proportional + integral + derivative, lower, upper)
+
+        self.proportional[idx] = proportional
+        self.integral[idx] = integral
+        self.derivative[idx] = derivative
+        self.last_output[idx] = output
+        self.last_input[idx] = input_
+        self.last_time[idx] = now
+
+        last_output[run] = output
+        return last_output
+
+    @contextmanager
+    def batch(self) -> Generator[None]:
+        """Queue the steps requested in the block and run them in one ``step``.
+
+        Callers awaiting ``async_step`` inside the block get their result when
+        the block ends.
+        """
+        self._batching = True
+        try:
+            yield
+        finally:
+            self._batching = False
+            self._run_queued()
+
+    async def async_step(self, slot: int, input_: float) -> StepValues:
+        """Step one controller, in the batch that is being collected if any."""
+        if not self._batching:
+            return self._values(slot, self.step([slot], [input_])[0])
+        if slot in self._queued:
+            # a second step of the same controller starts a new batch
+            self._run_queued()
+        future: asyncio.Future[StepValues] = asyncio.get_running_loop().create_future()
+        self._queued[slot] = (input_, future)
+        return await future
+
+    def _run_queued(self) -> None:
+        """Run the queued steps and hand every caller its result."""
+        queued, self._queued = self._queued, {}
+        if not queued:
+            return
+        slots = list(queued)
+        try:
+            outputs = self.step(slots, [input_ for input_, _ in queued.values()])
+        except Exception as err:
+            for _, future in queued.values():
+                if not future.done():
+                    future.set_exception(err)
+            return
+        self.batches += 1
+        self.batched_steps += len(slots)
+        for slot, output, (_, future) in zip(slots, outputs, queued.values()):
+            if not future.done():
+                future.set_result(self._values(slot, output))
+
+    def _values(self, slot: int, output: float) -> StepValues:
+        """Return the output and the terms of the last step of a slot."""
+        return (None if np.isnan(output) else float(output), *self.components(slot))
+
+    def stats(self) -> dict[str, float | int]:
+        """Return the number of controllers and how their steps were batched."""
+        return {
+            "controllers": self._size,
+            "batches": self.batches,
+            "batched_steps": self.batched_steps,
+            "mean_batch_size": (
+                self.batched_steps / self.batches if self.batches else 0.0
+            ),
+        }
+
+
+PID_ENGINE: HassKey[BatchPIDEngine] = HassKey(f"{DOMAIN}_pid_engine")
+
+
+@callback
+def async_get_pid_engine(hass: HomeAssistant) -> BatchPIDEngine:
+    """Return the engine shared by all controllers, creating it when needed."""
+    if (engine := hass.data.get(PID_ENGINE)) is None:
+        engine = hass.data[PID_ENGINE] = BatchPIDEngine()
+    return engine
+
+
+@callback
+def async_release_pid_engine(hass: HomeAssistant, slot: int) -> None:
+    """Free the slot of a controller and forget the engine once it is empty."""
+    if (engine := hass.data.get(PID_ENGINE)) is None:
+        return
+    engine.remove(slot)
+    if not engine:
+        hass.data.pop(PID_ENGINE, None)
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+from typing import Any
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.entity import Entity, DeviceInfo
+from homeassistant.helpers.event import async_call_later
 
 from .const import DOMAIN
 
+_UNSET = object()
+
 
 class BasePIDEntity(Entity):
     """Base entity for Simple PID Controller integration."""
@@ -31,3 +36,99 @@ class BasePIDEntity(Entity):
             identifiers={(DOMAIN, entry.entry_id)},
             name=self._handle.name,
         )
+
+
+class PublishFilterMixin:
+    """Write coordinator updates only when the state changed significantly.
+
+    Mix in before ``CoordinatorEntity``. A numeric state is written when it
+    differs from the last written one by more than ``publish_deadband``, in
+    the unit of the state or, for a relative deadband, in % of the last
+    written value; other states and the attributes when they differ at all,
+    unless ``publish_attributes`` is False. Writes are at least
+    ``publish_interval`` seconds apart: a change within the interval is
+    written when it ends, with the value at that time. Availability changes
+    are always written immediately.
+    """
+
+    publish_deadband: float = 0.0
+    publish_relative: bool = False
+    publish_interval: float = 0.0
+    # False when the attributes change with every update, e.g. statistics
+    publish_attributes: bool = True
+    suppressed_writes: int = 0
+    _published_value: Any = _UNSET
+    _published_attributes: Any = None
+    _published_available: bool | None = None
+    _published_at: float | None = None
+    _unsub_publish: CALLBACK_TYPE | None = None
+
+    def set_publish_filter(
+        self, deadband: float, interval: float, relative: bool = False
+    ) -> None:
+        """Configure the deadband and the minimum time between writes."""
+        self.publish_deadband = deadband
+        self.publish_relative = relative
+        self.publish_interval = interval
+
+    def _is_significant(self, value: Any) -> bool:
+        published = self._published_value
+        if published is _UNSET:
+            return True
+        if (
+            self.publish_attributes
+            and self.extra_state_attributes != self._published_attributes
+        ):
+            return True
+        if isinstance(value, (int, float)) and isinstance(published, (int, float)):
+            deadband = self.publish_deadband
+            if self.publish_relative:
+                deadband *= abs(published) / 100
+            return abs(value - published) > deadband
+        return value != published
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state if it changed enough and the interval has passed."""
+        if self.available != self._published_available:
+            self._async_publish()
+            return
+        if self._unsub_publish is not None or not self._is_significant(
+            self.native_value
+        ):
+            self.suppressed_writes += 1
+            return
+        now = self.hass.loop.time()
+        if self._published_at is not None:
+            wait = self._published_at + self.publish_interval - now
+            if wait > 0:
+                self.suppressed_writes += 1
+                self._unsub_publish = async_call_later(
+                    self.hass, wait, self._async_publish_later
+                )
+                return
+        self._async_publish()
+
+    @callback
+    def _async_publish_later(self, _now: Any) -> None:
+        self._unsub_publish = None
+        if self._is_significant(self.native_value):
+            self._async_publish()
+
+    @callback
+    def _async_publish(self) -> None:
+        if self._unsub_publish is not None:
+            self._unsub_publish()
+            self._unsub_publish = None
+        self._published_value = self.native_value
+        self._published_attributes = self.extra_state_attributes
+        self._published_available = self.available
+        self._published_at = self.hass.loop.time()
+        self.async_write_ha_state()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel a pending write."""
+        if self._unsub_publish is not None:
+            self._unsub_publish()
+            self._unsub_publish = None
+        await super().async_will_remove_from_hass()
@@ -0,0 +1,213 @@
+"""Streaming export of the controller history."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Iterable, Sequence
+import csv
+from http import HTTPStatus
+import io
+import math
+from pathlib import Path
+
+from aiohttp import web
+from homeassistant.components.http import KEY_HASS, HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import Unauthorized
+from homeassistant.helpers.json import json_bytes
+from homeassistant.util import slugify
+import homeassistant.util.dt as dt_util
+
+from .const import DOMAIN
+from .history import HISTORY_FIELDS, HistoryBuffer
+from .tracelog import TRACE_FIELDS, TraceReader, rotated_paths
+
+EXPORT_URL = f"/api/{DOMAIN}/{{entry_id}}/export"
+EXPORT_FORMATS = ("jsonl", "csv")
+EXPORT_SOURCES = ("history", "trace")
+
+# rows per chunk written to the response
+EXPORT_CHUNK_ROWS = 1000
+
+DATA_EXPORT_VIEW = f"{DOMAIN}_export_view"
+
+
+def _parse_time(value: str | None) -> float | None:
+    """Parse an ISO datetime or a UNIX timestamp."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    if (parsed := dt_util.parse_datetime(value)) is None:
+        raise ValueError(f"Invalid time: {value}")
+    return dt_util.as_utc(parsed).timestamp()
+
+
+def format_rows(
+    fields: Sequence[str], rows: Iterable[Sequence[float | None]], fmt: str
+) -> bytes:
+    """Format rows as JSON lines or CSV lines."""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(
+            ("" if value is None else value for value in row) for row in rows
+        )
+        return buffer.getvalue().encode()
+    return b"".join(json_bytes(dict(zip(fields, row))) + b"\n" for row in rows)
+
+
+def format_header(fields: Sequence[str], fmt: str) -> bytes:
+    """Return the CSV header line, or nothing for JSON lines."""
+    if fmt == "csv":
+        return (",".join(fields) + "\n").encode()
+    return b""
+
+
+async def async_iter_history(
+    history: HistoryBuffer,
+    fields: tuple[str, ...],
+    start: float | None,
+    end: float | None,
+    fmt: str,
+) -> AsyncIterator[bytes]:
+    """Yield formatted chunks of the in-memory history.
+
+    The buffer is read on the event loop in pages of sequence numbers, so the
+    controller keeps appending between chunks.
+    """
+    time_index = fields.index("timestamp")
+    seq = history.first_seq
+    while seq < history.total:
+        seq, rows = history.rows(fields, seq, EXPORT_CHUNK_ROWS)
+        rows = [
+            row
+            for row in rows
+            if (start is None or row[time_index] >= start)
+            and (end is None or row[time_index] < end)
+        ]
+        if rows:
+            yield format_rows(fields, rows, fmt)
+
+
+def _read_trace_chunk(
+    path: Path,
+    fields: tuple[str, ...],
+    start: float | None,
+    end: float | None,
+    offset: int,
+    fmt: str,
+) -> tuple[bytes, int | None]:
+    """Format one chunk of a trace file; return it with the next offset."""
+    with TraceReader(path) as reader:
+        selected = reader.between(start, end)
+        total = len(selected)
+        rows = [
+            tuple(None if math.isnan(value) else value for value in row)
+            for row in selected[offset : offset + EXPORT_CHUNK_ROWS][
+                list(fields)
+            ].tolist()
+        ]
+        del selected
+    next_offset = offset + len(rows)
+    return format_rows(fields, rows, fmt), next_offset if next_offset < total else None
+
+
+async def async_iter_trace(
+    hass: HomeAssistant,
+    path: Path,
+    fields: tuple[str, ...],
+    start: float | None,
+    end: float | None,
+    fmt: str,
+) -> AsyncIterator[bytes]:
+    """Yield formatted chunks of the trace files, oldest file first.
+
+    Every chunk is read from the memory-mapped file and formatted in the
+    executor.
+    """
+    for file_path in rotated_paths(path):
+        if not await hass.async_add_executor_job(file_path.exists):
+            continue
+        offset: int | None = 0
+        while offset is not None:
+            data, offset = await hass.async_add_executor_job(
+                _read_trace_chunk, file_path, fields, start, end, offset, fmt
+            )
+            if data:
+                yield data
+
+
+class PIDExportView(HomeAssistantView):
+    """Stream the history of a controller as JSON lines or CSV.
+
+    Query parameters: ``format`` (jsonl or csv), ``source`` (history or
+    trace), ``fields`` (comma separated) and ``start``/``end`` (ISO datetime
+    or UNIX timestamp). Like the diagnostics, the export is for admins only.
+    """
+
+    url = EXPORT_URL
+    name = f"api:{DOMAIN}:export"
+
+    async def get(self, request: web.Request, entry_id: str) -> web.StreamResponse:
+        """Stream the requested records."""
+        if not request["hass_user"].is_admin:
+            raise Unauthorized
+        hass = request.app[KEY_HASS]
+        entry = hass.config_entries.async_get_entry(entry_id)
+        if (
+            entry is None
+            or entry.domain != DOMAIN
+            or not getattr(entry, "runtime_data", None)
+        ):
+            return self.json_message("Controller not found", HTTPStatus.NOT_FOUND)
+        handle = entry.runtime_data.handle
+
+        query = request.query
+        fmt = query.get("format", "jsonl")
+        source = query.get("source", "history")
+        if fmt not in EXPORT_FORMATS or source not in EXPORT_SOURCES:
+            return self.json_message("Invalid format or source", HTTPStatus.BAD_REQUEST)
+        available = HISTORY_FIELDS if source == "history" else TRACE_FIELDS
+        requested = [f for f in query.get("fields", "").split(",") if f]
+        if any(field not in available for field in requested):
+            return self.json_message("Unknown field", HTTPStatus.BAD_REQUEST)
+        fields = ("timestamp", *(f for f in requested or available if f != "timestamp"))
+        try:
+            start = _parse_time(query.get("start"))
+            end = _parse_time(query.get("end"))
+        except ValueError as err:
+            return self.json_message(str(err), HTTPStatus.BAD_REQUEST)
+
+        if source == "trace":
+            if handle.trace is None:
+                return self.json_message("Trace is not enabled", HTTPStatus.NOT_FOUND)
+            await handle.trace.async_flush()
+            chunks = async_iter_trace(hass, handle.trace.path, fields, start, end, fmt)
+        else:
+            chunks = async_iter_history(handle.history, fields, start, end, fmt)
+
+        response = web.StreamResponse(
+            headers={
+                "Content-Type": "text/csv" if fmt == "csv" else "application/x-ndjson",
+                "Content-Disposition": (
+                    f'attachment; filename="{slugify(handle.name)}_{source}.{fmt}"'
+                ),
+            }
+        )
+        await response.prepare(request)
+        if header := format_header(fields, fmt):
+            await response.write(header)
+        async for chunk in chunks:
+            await response.write(chunk)
+        await response.write_eof()
+        return response
+
+
+@callback
+def async_register_export_view(hass: HomeAssistant) -> None:
+    """Register the export view once, when the HTTP server is available."""
+    if hass.http is None or hass.data.get(DATA_EXPORT_VIEW):
+        return
+    hass.http.register_view(PIDExportView())
+    hass.data[DATA_EXPORT_VIEW] = True
@@ -0,0 +1,192 @@
+"""Incremental filters applied to the input before the PID step."""
+
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from collections import deque
+import math
+
+# a spike is accepted as a real step change after this many rejections in a row
+SPIKE_MAX_REJECTIONS = 3
+
+
+class SpikeFilter:
+    """Reject samples that jump more than ``threshold`` from the last accepted.
+
+    A jump that persists for ``SPIKE_MAX_REJECTIONS`` samples is a real
+    change of the process and is accepted.
+    """
+
+    __slots__ = ("_last", "_run", "rejected", "threshold")
+
+    def __init__(self, threshold: float) -> None:
+        self.threshold = threshold
+        self.rejected = 0
+        self._last: float | None = None
+        self._run = 0
+
+    def update(self, value: float, timestamp: float) -> float:
+        last = self._last
+        if (
+            last is not None
+            and abs(value - last) > self.threshold
+            and self._run < SPIKE_MAX_REJECTIONS
+        ):
+            self._run += 1
+            self.rejected += 1
+            return last
+        self._run = 0
+        self._last = value
+        return value
+
+
+class MedianFilter:
+    """Median of the last ``size`` samples.
+
+    The window is kept both in arrival order and sorted. Bisection finds the
+    sample that leaves and the place of the new one in O(log N); the list
+    insert and delete shift up to N items, which is cheap for the windows of
+    at most a hundred samples the options allow.
+    """
+
+    __slots__ = ("_sorted", "_window", "size")
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._window: deque[float] = deque()
+        self._sorted: list[float] = []
+
+    def update(self, value: float, timestamp: float) -> float:
+        if len(self._window) == self.size:
+            old = self._window.popleft()
+            del self._sorted[bisect_left(self._sorted, old)]
+        self._window.append(value)
+        insort(self._sorted, value)
+        values = self._sorted
+        middle = len(values) // 2
+        if len(values) % 2:
+            return values[middle]
+        return (values[middle - 1] + values[middle]) / 2
+
+
+class EMAFilter:
+    """Exponential moving average with a time constant in seconds.
+
+    The weight of a new sample follows from the time since the previous one,
+    so the smoothing does not depend on the sample rate.
+    """
+
+    __slots__ = ("_timestamp", "_value", "time_constant")
+
+    def __init__(self, time_constant: float) -> None:
+        self.time_constant = time_constant
+        self._value: float | None = None
+        self._timestamp: float | None = None
+
+    def update(self, value: float, timestamp: float) -> float:
+        if self._value is None or self._timestamp is None:
+            self._value = value
+        else:
+            dt = max(timestamp - self._timestamp, 0.0)
+            alpha = 1.0 - math.exp(-dt / self.time_constant)
+            self._value += alpha * (value - self._value)
+        self._timestamp = timestamp
+        return self._value
+
+
+class RateLimiter:
+    """Let the value change at most ``max_rate`` units per second."""
+
+    __slots__ = ("_timestamp", "_value", "max_rate")
+
+    def __init__(self, max_rate: float) -> None:
+        self.max_rate = max_rate
+        self._value: float | None = None
+        self._timestamp: float | None = None
+
+    def update(self, value: float, timestamp: float) -> float:
+        if self._value is None or self._timestamp is None:
+            self._value = value
+        else:
+            limit = self.max_rate * max(timestamp - self._timestamp, 0.0)
+            self._value += min(max(value - self._value, -limit), limit)
+        self._timestamp = timestamp
+        return self._value
+
+
+class InputFilter:
+    """Spike rejection, median, moving average and rate limit, in that order.
+
+    Spike rejection and the median count readings of the input: they only
+    take a value when the input reported since the previous step, so steps
+    in between do not repeat the last reading. The moving average and the
+    rate limit are based on time and run on every step. Stages that are not
+    configured are left out.
+    """
+
+    __slots__ = (
+        "_raw",
+        "_sample_time",
+        "_sampled",
+        "sample_stages",
+        "spike",
+        "time_stages",
+    )
+
+    def __init__(
+        self,
+        spike_threshold: float = 0.0,
+        median_size: int = 1,
+        ema_time_constant: float = 0.0,
+        rate_limit: float = 0.0,
+    ) -> None:
+        self.spike = SpikeFilter(spike_threshold) if spike_threshold > 0 else None
+        self.sample_stages: list[SpikeFilter | MedianFilter] = []
+        if self.spike is not None:
+            self.sample_stages.append(self.spike)
+        if median_size > 1:
+            self.sample_stages.append(MedianFilter(median_size))
+        self.time_stages: list[EMAFilter | RateLimiter] = []
+        if ema_time_constant > 0:
+            self.time_stages.append(EMAFilter(ema_time_constant))
+        if rate_limit > 0:
+            self.time_stages.append(RateLimiter(rate_limit))
+        # the last reading, when it was reported and its filtered value
+        self._raw: float | None = None
+        self._sample_time: float | None = None
+        self._sampled: float | None = None
+
+    def __bool__(self) -> bool:
+        return bool(self.sample_stages or self.time_stages)
+
+    def update(
+        self, value: float, timestamp: float, sample_time: float | None = None
+    ) -> float:
+        """Filter the input of a step taken at ``timestamp`` seconds.
+
+        ``sample_time`` is when the input reported ``value``; a step without a
+        new report or a new value reuses the filtered previous reading.
+        """
+        if (
+            self._sampled is None
+            or sample_time is None
+            or sample_time != self._sample_time
+            or value != self._raw
+        ):
+            self._raw = value
+            self._sample_time = sample_time
+            for sample_stage in self.sample_stages:
+                value = sample_stage.update(value, timestamp)
+            self._sampled = value
+        value = self._sampled
+        for time_stage in self.time_stages:
+            value = time_stage.update(value, timestamp)
+        return value
+
+    def stats(self) -> dict[str, object]:
+        """Return the active stages and the number of rejected spikes."""
+        stages = [*self.sample_stages, *self.time_stages]
+        return {
+            "stages": [type(stage).__name__ for stage in stages],
+            "rejected_spikes": self.spike.rejected if self.spike is not None else 0,
+        }
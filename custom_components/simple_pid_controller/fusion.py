@@ -0,0 +1,185 @@
+"""Fusion of several input sensors into one process value."""
+
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+
+from .const import (
+    FUSION_MAX,
+    FUSION_MEAN,
+    FUSION_MIN,
+    FUSION_MODES,
+    FUSION_WEIGHTED_MEAN,
+)
+
+
+def parse_weights(text: str, count: int) -> list[float]:
+    """Parse comma separated weights, one per input; empty means all equal.
+
+    Raises ValueError for a wrong count, a negative weight or a zero sum.
+    """
+    if not text.strip():
+        return [1.0] * count
+    weights = [float(part) for part in text.split(",")]
+    if len(weights) != count:
+        raise ValueError(f"Expected {count} weights, got {len(weights)}")
+    if any(weight < 0 for weight in weights) or not sum(weights):
+        raise ValueError("Weights must be non-negative with a positive sum")
+    return weights
+
+
+class InputFusion:
+    """Combine the latest values of the member entities into one value.
+
+    Every state change updates the running sums of the means and a sorted
+    list of the values for the median, minimum and maximum, so reading the
+    fused value does not iterate the members. Members that did not report
+    for ``max_age`` seconds are dropped until they report again; members are
+    kept in order of their last report, so only the stale ones are visited.
+    """
+
+    __slots__ = (
+        "_members",
+        "_sorted",
+        "_sum",
+        "_weight_total",
+        "_weighted_sum",
+        "_weights",
+        "max_age",
+        "mode",
+    )
+
+    def __init__(
+        self,
+        entity_ids: Sequence[str],
+        mode: str = FUSION_MEAN,
+        weights: Sequence[float] | None = None,
+        max_age: float = 0.0,
+    ) -> None:
+        if mode not in FUSION_MODES:
+            raise ValueError(f"Unknown fusion mode {mode}")
+        if weights is None:
+            weights = [1.0] * len(entity_ids)
+        self.mode = mode
+        self.max_age = max_age
+        self._weights: Mapping[str, float] = dict(zip(entity_ids, weights))
+        # entity_id -> (value, timestamp of the last report), oldest first
+        self._members: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._sorted: list[float] = []
+        self._sum = 0.0
+        self._weighted_sum = 0.0
+        self._weight_total = 0.0
+
+    @property
+    def entity_ids(self) -> list[str]:
+        return list(self._weights)
+
+    @property
+    def last_report(self) -> float | None:
+        """Return the time of the newest report of a member, or None."""
+        if not self._members:
+            return None
+        return next(reversed(self._members.values()))[1]
+
+    def __len__(self) -> int:
+        """Return the number of members with a usable value."""
+        return len(self._members)
+
+    def update(self, entity_id: str, value: float | None, timestamp: float) -> None:
+        """Set the value of a member; None removes it until it reports again."""
+        if entity_id not in self._weights:
+            return
+        self._remove(entity_id)
+        if value is None:
+            return
+        weight = self._weights[entity_id]
+        self._store(entity_id, value, timestamp)
+        insort(self._sorted, value)
+        self._sum += value
+        self._weighted_sum += weight * value
+        self._weight_total += weight
+
+    def report(self, entity_id: str, timestamp: float) -> None:
+        """Refresh the age of a member that reported an unchanged value."""
+        if (member := self._members.pop(entity_id, None)) is not None:
+            self._store(entity_id, member[0], timestamp)
+
+    def _store(self, entity_id: str, value: float, timestamp: float) -> None:
+        """Add a member, keeping the members in order of their last report."""
+        members = self._members
+        newest = self.last_report
+        members[entity_id] = (value, timestamp)
+        if newest is None or newest <= timestamp:
+            return
+        # the states seeded at setup are not in time order; move the members
+        # that reported later behind this one
+        for other in [
+            other for other, (_, reported) in members.items() if reported > timestamp
+        ]:
+            members.move_to_end(other)
+
+    def _remove(self, entity_id: str) -> None:
+        if (member := self._members.pop(entity_id, None)) is None:
+            return
+        value = member[0]
+        weight = self._weights[entity_id]
+        del self._sorted[bisect_left(self._sorted, value)]
+        self._sum -= value
+        self._weighted_sum -= weight * value
+        self._weight_total -= weight
+        if not self._members:
+            # drop the rounding errors of the running sums
+            self._sum = self._weighted_sum = self._weight_total = 0.0
+
+    def expire(self, now: float) -> None:
+        """Drop the members that did not report within ``max_age``."""
+        if self.max_age <= 0:
+            return
+        horizon = now - self.max_age
+        members = self._members
+        while members:
+            entity_id, (_, timestamp) = next(iter(members.items()))
+            if timestamp >= horizon:
+                break
+            self._remove(entity_id)
+
+    def value(self, now: float) -> float | None:
+        """Return the fused value of the members that are not stale."""
+        self.expire(now)
+        if not self._members:
+            return None
+        mode = self.mode
+        if mode == FUSION_MEAN:
+            return self._sum / len(self._members)
+        if mode == FUSION_WEIGHTED_MEAN:
+            if self._weight_total <= 0:
+                return None
+            return self._weighted_sum / self._weight_total
+        if mode == FUSION_MIN:
+            return self._sorted[0]
+        if mode == FUSION_MAX:
+            return self._sorted[-1]
+        values = self._sorted
+        middle = len(values) // 2
+        if len(values) % 2:
+            return values[middle]
+        return (values[middle - 1] + values[middle]) / 2
+
+    def stats(self, now: float) -> dict[str, object]:
+        """Return the mode, the fused value and the value and age per member."""
+        value = self.value(now)
+        return {
+            "mode": self.mode,
+            "value": value,
+            "members": {
+                entity_id: {"value": member[0], "age": now - member[1]}
+                for entity_id, member in self._members.items()
+            },
+            "excluded": [
+                entity_id
+                for entity_id in self._weights
+                if entity_id not in self._members
+            ],
+        }
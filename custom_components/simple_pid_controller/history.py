@@ -0,0 +1,131 @@
+"""Columnar ring buffer for the controller history."""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterator
+import math
+
+# one column per field, in the order of HistoryBuffer.append
+HISTORY_FIELDS = (
+    "timestamp",
+    "input",
+    "output",
+    "setpoint",
+    "kp",
+    "ki",
+    "kd",
+    "p",
+    "i",
+    "d",
+    "i_delta",
+    "sample_time",
+)
+
+_NAN = float("nan")
+
+
+class HistoryBuffer:
+    """Fixed capacity ring buffer with one ``array('d')`` column per field.
+
+    Appending writes one float per column in place, so a tick allocates no
+    containers. Missing values are stored as NaN. ``segments`` returns
+    zero-copy memoryviews of a column in chronological order. Every sample
+    has a sequence number, so readers can page through the buffer while new
+    samples arrive.
+    """
+
+    __slots__ = ("_columns", "_next", "_size", "capacity", "total")
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._columns = {
+            field: array("d", [_NAN]) * capacity for field in HISTORY_FIELDS
+        }
+        self._next = 0
+        self._size = 0
+        # number of samples ever appended; the next sequence number
+        self.total = 0
+
+    def __len__(self) -> int:
+        """Return the number of stored samples."""
+        return self._size
+
+    def append(self, *values: float | None) -> None:
+        """Store one sample, given in the order of ``HISTORY_FIELDS``."""
+        if len(values) != len(HISTORY_FIELDS):
+            raise ValueError(f"expected {len(HISTORY_FIELDS)} values")
+        pos = self._next
+        for column, value in zip(self._columns.values(), values):
+            column[pos] = _NAN if value is None else value
+        self._next = (pos + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+        self.total += 1
+
+    def clear(self) -> None:
+        """Forget all samples."""
+        self._next = 0
+        self._size = 0
+        self.total = 0
+
+    def segments(self, field: str, last: int | None = None) -> tuple[memoryview, ...]:
+        """Return the newest ``last`` samples of a column as memoryviews.
+
+        The samples are oldest first; when they wrap around the end of the
+        buffer they are returned as two views.
+        """
+        count = self._size if last is None else max(0, min(last, self._size))
+        view = memoryview(self._columns[field])
+        start = (self._next - count) % self.capacity
+        if count == 0:
+            return ()
+        if start + count <= self.capacity:
+            return (view[start : start + count],)
+        return (view[start:], view[: self._next])
+
+    def values(self, field: str, last: int | None = None) -> Iterator[float | None]:
+        """Iterate over a column oldest first, with NaN as None."""
+        for segment in self.segments(field, last):
+            for value in segment:
+                yield None if math.isnan(value) else value
+
+    def latest(self, field: str) -> float | None:
+        """Return the newest value of a column."""
+        if not self._size:
+            return None
+        value = self._columns[field][self._next - 1]
+        return None if math.isnan(value) else value
+
+    @property
+    def first_seq(self) -> int:
+        """Return the sequence number of the oldest stored sample."""
+        return self.total - self._size
+
+    def rows(
+        self, fields: tuple[str, ...], start_seq: int, count: int
+    ) -> tuple[int, list[tuple[float | None, ...]]]:
+        """Return up to ``count`` samples from ``start_seq`` on, as tuples.
+
+        Samples that were already overwritten are skipped. The sequence number
+        to continue from is returned with the rows.
+        """
+        start_seq = max(start_seq, self.first_seq)
+        stop_seq = min(start_seq + count, self.total)
+        columns = [self._columns[field] for field in fields]
+        rows = []
+        for seq in range(start_seq, stop_seq):
+            pos = seq % self.capacity
+            rows.append(
+                tuple(
+                    None if math.isnan(value := column[pos]) else value
+                    for column in columns
+                )
+            )
+        return stop_seq, rows
+
+    def as_dict(self, last: int | None = None) -> dict[str, list[float | None]]:
+        """Return a JSON serializable copy of all columns."""
+        return {field: list(self.values(field, last)) for field in HISTORY_FIELDS}
@@ -0,0 +1,199 @@
+"""Running control performance metrics over a sliding time window."""
+
+from __future__ import annotations
+
+from collections import deque
+import math
+
+# bucket boundaries of LogHistogram grow by this factor
+HISTOGRAM_GROWTH = 1.1
+HISTOGRAM_MIN = 1e-3
+HISTOGRAM_BUCKETS = 160
+
+# errors within this fraction of the input range do not count as a sign change
+OSCILLATION_DEADBAND = 0.005
+
+
+class LogHistogram:
+    """Histogram with logarithmic buckets supporting removal of samples.
+
+    Values from ``minimum`` up to ``minimum * HISTOGRAM_GROWTH **
+    HISTOGRAM_BUCKETS`` (about 70 minutes for durations in seconds with the
+    default minimum) are binned with a relative error of at most 10%;
+    smaller and larger values go to the first and last bucket. Adding,
+    removing and quantiles take constant time.
+    """
+
+    __slots__ = ("_maximum", "count", "counts", "minimum")
+
+    def __init__(self, minimum: float = HISTOGRAM_MIN) -> None:
+        self.minimum = minimum
+        self._maximum = minimum * HISTOGRAM_GROWTH**HISTOGRAM_BUCKETS
+        self.counts = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+
+    def bucket(self, value: float) -> int:
+        if value <= self.minimum:
+            return 0
+        if value >= self._maximum:
+            return HISTOGRAM_BUCKETS - 1
+        index = int(math.log(value / self.minimum, HISTOGRAM_GROWTH))
+        return min(index, HISTOGRAM_BUCKETS - 1)
+
+    def add(self, value: float) -> None:
+        self.counts[self.bucket(value)] += 1
+        self.count += 1
+
+    def remove(self, value: float) -> None:
+        self.counts[self.bucket(value)] -= 1
+        self.count -= 1
+
+    def clear(self) -> None:
+        self.counts = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+
+    def quantile(self, q: float) -> float | None:
+        """Return the upper bound of the bucket holding quantile ``q``."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.minimum * HISTOGRAM_GROWTH ** (index + 1)
+        return None  # pragma: no cover
+
+
+class LoopMetrics:
+    """IAE, ISE, ITAE, oscillations, saturation and sample time statistics.
+
+    Every step is appended to a window of ``window`` seconds; steps that
+    leave the window are subtracted from running sums, so an update costs
+    amortized O(1) regardless of the window length. ITAE weighs the error
+    with the time since the start of the window.
+
+    An oscillation is counted every time the error changes sign, ignoring
+    errors within ``deadband`` of zero.
+    """
+
+    __slots__ = (
+        "_crossings",
+        "_dt_count",
+        "_dt_histogram",
+        "_dt_sum",
+        "_iae",
+        "_ise",
+        "_last_sign",
+        "_last_time",
+        "_origin",
+        "_samples",
+        "_saturated",
+        "_t_iae",
+        "deadband",
+        "window",
+    )
+
+    def __init__(self, window: float, deadband: float = 0.0) -> None:
+        if window <= 0:
+            raise ValueError("window must be positive")
+        self.window = window
+        self.deadband = deadband
+        self.clear()
+
+    def clear(self) -> None:
+        """Forget all steps."""
+        # (time, |e|dt, e²dt, crossing, saturated dt, sample time or None)
+        self._samples: deque[tuple[float, float, float, int, float, float | None]]
+        self._samples = deque()
+        self._origin: float | None = None
+        self._last_time: float | None = None
+        self._last_sign = 0
+        self._iae = 0.0
+        self._ise = 0.0
+        self._t_iae = 0.0
+        self._crossings = 0
+        self._saturated = 0.0
+        self._dt_sum = 0.0
+        self._dt_count = 0
+        self._dt_histogram = LogHistogram()
+
+    def update(
+        self,
+        timestamp: float,
+        error: float,
+        saturated: bool,
+        sample_time: float | None,
+    ) -> None:
+        """Add one PID step; the error is integrated over the time since the last."""
+        if self._origin is None:
+            # times are kept relative to the first step for precision
+            self._origin = timestamp
+        now = timestamp - self._origin
+        dt = 0.0 if self._last_time is None else max(now - self._last_time, 0.0)
+        self._last_time = now
+
+        abs_dt = abs(error) * dt
+        sq_dt = error * error * dt
+        crossing = 0
+        if abs(error) > self.deadband:
+            sign = 1 if error > 0 else -1
+            if self._last_sign and sign != self._last_sign:
+                crossing = 1
+            self._last_sign = sign
+        saturated_dt = dt if saturated else 0.0
+
+        self._samples.append((now, abs_dt, sq_dt, crossing, saturated_dt, sample_time))
+        self._iae += abs_dt
+        self._ise += sq_dt
+        self._t_iae += now * abs_dt
+        self._crossings += crossing
+        self._saturated += saturated_dt
+        if sample_time is not None:
+            self._dt_sum += sample_time
+            self._dt_count += 1
+            self._dt_histogram.add(sample_time)
+
+        horizon = now - self.window
+        samples = self._samples
+        while samples[0][0] < horizon:
+            time_, abs_dt, sq_dt, crossing, saturated_dt, sample_time = (
+                samples.popleft()
+            )
+            self._iae -= abs_dt
+            self._ise -= sq_dt
+            self._t_iae -= time_ * abs_dt
+            self._crossings -= crossing
+            self._saturated -= saturated_dt
+            if sample_time is not None:
+                self._dt_sum -= sample_time
+                self._dt_count -= 1
+                self._dt_histogram.remove(sample_time)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    @property
+    def span(self) -> float:
+        """Return the time covered by the steps in the window."""
+        if not self._samples:
+            return 0.0
+        return self._samples[-1][0] - self._samples[0][0]
+
+    def values(self) -> dict[str, float | int | None]:
+        """Return the metrics of the current window."""
+        start = self._samples[0][0] if self._samples else 0.0
+        span = self.span
+        return {
+            "iae": max(self._iae, 0.0),
+            "ise": max(self._ise, 0.0),
+            "itae": max(self._t_iae - start * self._iae, 0.0),
+            "oscillations": self._crossings,
+            "saturation": (
+                min(max(self._saturated / span, 0.0), 1.0) * 100.0 if span else None
+            ),
+            "mean_sample_time": (
+                self._dt_sum / self._dt_count if self._dt_count else None
+            ),
+            "p95_sample_time": self._dt_histogram.quantile(0.95),
+        }
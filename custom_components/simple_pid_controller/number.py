@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
+from collections.abc import Mapping
 import logging
+from typing import Any
 
 from homeassistant.components.number import RestoreNumber
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.entity import EntityCategory
 
@@ -146,6 +148,18 @@ class PIDParameterNumber(RestoreNumber):
                 self._attr_native_value = self._attr_native_max_value
             else:
                 self._attr_native_value = last.native_value
+        self._handle.params.set(self._key, self._attr_native_value)
+        self.async_on_remove(
+            self._handle.async_add_options_listener(self._async_options_updated)
+        )
+
+    @callback
+    def _async_options_updated(self, options: Mapping[str, Any]) -> None:
+        """Apply a changed step size without a reload."""
+        self._attr_native_step = options.get(
+            f"{CONF_STEP_PREFIX}{self._key}", DEFAULT_STEPS[self._key]
+        )
+        self.async_write_ha_state()
 
     @property
     def native_value(self) -> float:
@@ -153,6 +167,7 @@ class PIDParameterNumber(RestoreNumber):
 
     async def async_set_native_value(self, value: float) -> None:
         self._attr_native_value = value
+        self._handle.params.set(self._key, value)
         self.async_write_ha_state()
 
 
@@ -170,9 +185,29 @@ class ControlParameterNumber(RestoreNumber):
         self._attr_entity_category = desc["entity_category"]
         self._key = desc["key"]
 
-        # Compute range limits based on key
-        opts = entry.options or {}
-        data = entry.data or {}
+        self._default_step = DEFAULT_STEPS.get(self._key, desc.get("step", 1.0))
+        self._set_limits(entry.options or {}, entry.data or {})
+        input_range_min, input_range_max = self._input_range
+        output_range_min, output_range_max = self._output_range
+
+        # Initialize current value
+        if self._key == "setpoint":
+            self._attr_native_value = input_range_min + (
+                input_range_max - input_range_min
+            ) * float(desc["default"])
+        elif self._key == "starting_output":
+            self._attr_native_value = output_range_min + (
+                output_range_max - output_range_min
+            ) * float(desc["default"])
+        elif self._key == "output_min":
+            self._attr_native_value = output_range_min
+        elif self._key == "output_max":
+            self._attr_native_value = output_range_max
+        else:
+            _LOGGER.error("Unexpected error, unknown state in number.py")
+
+    def _set_limits(self, opts: Mapping[str, Any], data: Mapping[str, Any]) -> None:
+        """Compute range limits and step based on key from the options."""
         input_range_min = opts.get(
             CONF_INPUT_RANGE_MIN,
             data.get(CONF_INPUT_RANGE_MIN, DEFAULT_INPUT_RANGE_MIN),
@@ -192,11 +227,7 @@ class ControlParameterNumber(RestoreNumber):
 
         if self._key == "setpoint":
             min_val, max_val = input_range_min, input_range_max
-        elif self._key == "starting_output":
-            min_val, max_val = output_range_min, output_range_max
-        elif self._key == "output_min":
-            min_val, max_val = output_range_min, output_range_max
-        elif self._key == "output_max":
+        elif self._key in ("starting_output", "output_min", "output_max"):
             min_val, max_val = output_range_min, output_range_max
         else:
             _LOGGER.error(
@@ -212,25 +243,10 @@ class ControlParameterNumber(RestoreNumber):
         self._attr_native_min_value = min_val
         self._attr_native_max_value = max_val
         self._attr_native_step = opts.get(
-            f"{CONF_STEP_PREFIX}{self._key}",
-            DEFAULT_STEPS.get(self._key, desc.get("step", 1.0)),
+            f"{CONF_STEP_PREFIX}{self._key}", self._default_step
         )
-
-        # Initialize current value
-        if self._key == "setpoint":
-            self._attr_native_value = input_range_min + (
-                input_range_max - input_range_min
-            ) * float(desc["default"])
-        elif self._key == "starting_output":
-            self._attr_native_value = output_range_min + (
-                output_range_max - output_range_min
-            ) * float(desc["default"])
-        elif self._key == "output_min":
-            self._attr_native_value = output_range_min
-        elif self._key == "output_max":
-            self._attr_native_value = output_range_max
-        else:
-            _LOGGER.error("Unexpected error, unknown state in number.py")
+        self._input_range = (input_range_min, input_range_max)
+        self._output_range = (output_range_min, output_range_max)
 
     async def async_added_to_hass(self) -> None:
         await super().async_added_to_hass()
@@ -241,6 +257,23 @@ class ControlParameterNumber(RestoreNumber):
                 self._attr_native_value = self._attr_native_max_value
             else:
                 self._attr_native_value = last.native_value
+        self._handle.params.set(self._key, self._attr_native_value)
+        self.async_on_remove(
+            self._handle.async_add_options_listener(self._async_options_updated)
+        )
+
+    @callback
+    def _async_options_updated(self, options: Mapping[str, Any]) -> None:
+        """Apply changed ranges and step size, clamping the value to the range."""
+        self._set_limits(options, self._entry.data or {})
+        value = min(
+            max(self._attr_native_value, self._attr_native_min_value),
+            self._attr_native_max_value,
+        )
+        if value != self._attr_native_value:
+            self._attr_native_value = value
+            self._handle.params.set(self._key, value)
+        self.async_write_ha_state()
 
     @property
     def native_value(self) -> float:
@@ -248,4 +281,5 @@ class ControlParameterNumber(RestoreNumber):
 
     async def async_set_native_value(self, value: float) -> None:
         self._attr_native_value = value
+        self._handle.params.set(self._key, value)
         self.async_write_ha_state()
@@ -0,0 +1,63 @@
+"""Persistence of the internal controller state across restarts."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+STORAGE_VERSION = 1
+# the state is written at most once per this many seconds while running
+SAVE_INTERVAL = 30.0
+
+
+class ControllerStateStore:
+    """Throttled ``Store`` for the state a controller needs to resume bumpless.
+
+    ``Store.async_delay_save`` postpones the write on every call, so with a
+    step every few seconds it would only write on shutdown. Here a write is
+    scheduled by the first step after the previous write and takes the state
+    at the time it runs; Home Assistant flushes a pending write when it stops.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        data_func: Callable[[], dict[str, Any] | None],
+    ) -> None:
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}"
+        )
+        self._data_func = data_func
+        self._scheduled = False
+
+    async def async_load(self) -> dict[str, Any] | None:
+        """Return the saved state, or None."""
+        return await self._store.async_load()
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Write the state within ``SAVE_INTERVAL`` unless a write is pending."""
+        if self._scheduled:
+            return
+        self._scheduled = True
+        self._store.async_delay_save(self._data_to_save, SAVE_INTERVAL)
+
+    def _data_to_save(self) -> dict[str, Any] | None:
+        self._scheduled = False
+        return self._data_func()
+
+    async def async_save(self) -> None:
+        """Write the current state now, e.g. before the entry is unloaded."""
+        if (data := self._data_func()) is not None:
+            self._scheduled = False
+            await self._store.async_save(data)
+
+    async def async_remove(self) -> None:
+        """Delete the saved state."""
+        await self._store.async_remove()
@@ -0,0 +1,258 @@
+"""Lightweight PID core for Simple PID Controller."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import math
+import time
+from typing import NamedTuple
+
+from .engine import BatchPIDEngine
+
+
+class PIDResult(NamedTuple):
+    """Output and P, I and D terms of one controller step."""
+
+    output: float | None
+    p: float
+    i: float
+    d: float
+
+
+class PIDState(NamedTuple):
+    """Internal state that lets a controller resume without a bump."""
+
+    integral: float
+    last_input: float | None
+    last_output: float | None
+    auto_mode: bool
+
+
+def _optional(value: float) -> float | None:
+    """Return a value read from the engine, None for NaN."""
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+class PID:
+    """PID controller with the arithmetic and API of ``simple_pid.PID`` 2.0.1.
+
+    The gains, limits and state live in a slot of a ``BatchPIDEngine``, which
+    is private to the controller unless a shared engine is passed. The
+    derivative is taken on measurement and there is no error map, which is
+    how the integration uses simple_pid. ``configure`` applies a whole
+    parameter set at once and only touches the state for parameters that
+    changed; ``step`` and ``async_step`` return the output and the terms in
+    one result.
+    """
+
+    __slots__ = ("engine", "slot")
+
+    def __init__(
+        self,
+        Kp: float = 1.0,
+        Ki: float = 0.0,
+        Kd: float = 0.0,
+        setpoint: float = 0,
+        sample_time: float | None = 0.01,
+        output_limits: tuple[float | None, float | None] = (None, None),
+        auto_mode: bool = True,
+        proportional_on_measurement: bool = False,
+        time_fn: Callable[[], float] | None = None,
+        starting_output: float = 0.0,
+        engine: BatchPIDEngine | None = None,
+    ) -> None:
+        """Initialize the controller, like ``simple_pid.PID``."""
+        if engine is None:
+            engine = BatchPIDEngine(
+                capacity=1, time_fn=time_fn if time_fn is not None else time.monotonic
+            )
+        self.engine = engine
+        self.slot = engine.add(
+            Kp,
+            Ki,
+            Kd,
+            setpoint=setpoint,
+            sample_time=sample_time,
+            output_limits=output_limits,
+            auto_mode=auto_mode,
+            proportional_on_measurement=proportional_on_measurement,
+            starting_output=starting_output,
+        )
+
+    def step(self, input_: float, dt: float | None = None) -> PIDResult:
+        """Update the controller and return the output with its terms."""
+        if dt is not None and dt <= 0:
+            raise ValueError(f"dt has negative value {dt}, must be positive")
+        self._check_parameters()
+        self.engine.step([self.slot], [input_], dt)
+        return PIDResult(self.last_output, *self.components)
+
+    async def async_step(self, input_: float) -> PIDResult:
+        """Update the controller in the batch of the engine and return the result."""
+        self._check_parameters()
+        return PIDResult(*await self.engine.async_step(self.slot, input_))
+
+    def _check_parameters(self) -> None:
+        """Refuse to step in auto mode without a setpoint or gains.
+
+        A missing value would turn the integral into NaN for good.
+        """
+        if self.auto_mode and None in (self.setpoint, *self.tunings):
+            raise ValueError("The setpoint and the gains are required in auto mode")
+
+    def __call__(self, input_: float, dt: float | None = None) -> float | None:
+        """Update the controller and return the output."""
+        return self.step(input_, dt).output
+
+    def configure(
+        self,
+        tunings: tuple[float, float, float],
+        setpoint: float,
+        output_limits: tuple[float | None, float | None],
+        auto_mode: bool,
+        proportional_on_measurement: bool,
+        last_output: float | None = None,
+    ) -> bool:
+        """Apply a parameter set and return True if anything changed.
+
+        ``last_output`` is the starting output when the controller switches
+        from manual to auto mode.
+        """
+        changed = False
+        if tunings != self.tunings:
+            self.tunings = tunings
+            changed = True
+        if setpoint != self.setpoint:
+            self.setpoint = setpoint
+            changed = True
+        if output_limits != self.output_limits:
+            self.output_limits = output_limits
+            changed = True
+        if auto_mode != self.auto_mode:
+            self.set_auto_mode(auto_mode, last_output)
+            changed = True
+        if proportional_on_measurement != self.proportional_on_measurement:
+            self.proportional_on_measurement = proportional_on_measurement
+            changed = True
+        return changed
+
+    @property
+    def components(self) -> tuple[float, float, float]:
+        """Return the P, I and D terms of the last step."""
+        return self.engine.components(self.slot)
+
+    @property
+    def last_output(self) -> float | None:
+        """Return the output of the last step, None before the first one."""
+        return self.engine.last_output_of(self.slot)
+
+    @last_output.setter
+    def last_output(self, output: float | None) -> None:
+        """Replace the output returned while the controller is in manual mode."""
+        self.engine.last_output[self.slot] = math.nan if output is None else output
+
+    @property
+    def state(self) -> PIDState:
+        """Return the integral, last input and output, and the auto mode."""
+        return PIDState(
+            float(self.engine.integral[self.slot]),
+            _optional(self.engine.last_input[self.slot]),
+            self.last_output,
+            self.auto_mode,
+        )
+
+    def restore(self, state: PIDState, dt: float | None = None) -> None:
+        """Resume from a saved state as if the last step ran ``dt`` seconds ago.
+
+        The values are taken as saved; the output limits applied by the next
+        ``configure`` clamp them. Without ``dt`` the last input is dropped, so
+        the first step has no derivative kick from a time step close to zero.
+        """
+        engine, slot = self.engine, self.slot
+        engine.integral[slot] = state.integral
+        self.last_output = state.last_output
+        engine.auto_mode[slot] = state.auto_mode
+        now = engine.time_fn()
+        if dt is None:
+            engine.last_input[slot] = math.nan
+            engine.last_time[slot] = now
+        else:
+            engine.last_input[slot] = (
+                math.nan if state.last_input is None else state.last_input
+            )
+            engine.last_time[slot] = now - dt
+
+    @property
+    def tunings(self) -> tuple[float, float, float]:
+        """Return the gains as (Kp, Ki, Kd)."""
+        slot = self.slot
+        return (
+            _optional(self.engine.kp[slot]),
+            _optional(self.engine.ki[slot]),
+            _optional(self.engine.kd[slot]),
+        )
+
+    @tunings.setter
+    def tunings(self, tunings: tuple[float, float, float]) -> None:
+        """Set the gains."""
+        self.engine.set_tunings(self.slot, *tunings)
+
+    @property
+    def setpoint(self) -> float:
+        """Return the setpoint."""
+        return _optional(self.engine.setpoint[self.slot])
+
+    @setpoint.setter
+    def setpoint(self, setpoint: float) -> None:
+        """Set the setpoint."""
+        self.engine.setpoint[self.slot] = setpoint
+
+    @property
+    def proportional_on_measurement(self) -> bool:
+        """Return whether the proportional term acts on the measurement."""
+        return bool(self.engine.proportional_on_measurement[self.slot])
+
+    @proportional_on_measurement.setter
+    def proportional_on_measurement(self, enabled: bool) -> None:
+        """Take the proportional term on the measurement instead of the error."""
+        self.engine.proportional_on_measurement[self.slot] = enabled
+
+    @property
+    def auto_mode(self) -> bool:
+        """Return whether the controller is enabled."""
+        return bool(self.engine.auto_mode[self.slot])
+
+    @auto_mode.setter
+    def auto_mode(self, enabled: bool) -> None:
+        """Enable or disable the controller."""
+        self.set_auto_mode(enabled)
+
+    def set_auto_mode(self, enabled: bool, last_output: float | None = None) -> None:
+        """Enable or disable the controller, starting from last_output when enabled."""
+        self.engine.set_auto_mode(self.slot, enabled, last_output)
+
+    @property
+    def output_limits(self) -> tuple[float | None, float | None]:
+        """Return the output limits as (lower, upper)."""
+        lower = float(self.engine.output_min[self.slot])
+        upper = float(self.engine.output_max[self.slot])
+        return (
+            None if lower == -math.inf else lower,
+            None if upper == math.inf else upper,
+        )
+
+    @output_limits.setter
+    def output_limits(self, limits: tuple[float | None, float | None] | None) -> None:
+        """Set the output limits and clamp the integral and the last output."""
+        self.engine.set_output_limits(
+            self.slot, (None, None) if limits is None else limits
+        )
+
+    def clear_last_input(self) -> None:
+        """Forget the last input, so the next step has no derivative term."""
+        self.engine.last_input[self.slot] = math.nan
+
+    def reset(self) -> None:
+        """Clear the terms, the last output and the last input."""
+        self.engine.reset(self.slot)
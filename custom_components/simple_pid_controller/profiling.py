@@ -0,0 +1,91 @@
+"""Opt-in timing of the phases of a PID step."""
+
+from __future__ import annotations
+
+from .metrics import LogHistogram
+
+# phases of a step in the order they run; total covers all of them
+PHASE_INPUT = "input"
+PHASE_PARAMETERS = "parameters"
+PHASE_COMPUTE = "compute"
+PHASE_RECORD = "record"
+PHASE_PUBLISH = "publish"
+PHASE_TOTAL = "total"
+PHASES = (
+    PHASE_INPUT,
+    PHASE_PARAMETERS,
+    PHASE_COMPUTE,
+    PHASE_RECORD,
+    PHASE_PUBLISH,
+    PHASE_TOTAL,
+)
+
+# smallest duration told apart by the histograms, in nanoseconds
+PROFILE_MIN_NS = 100.0
+PROFILE_QUANTILES = (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+
+
+class PhaseProfiler:
+    """Fixed-size duration histograms per phase of ``update_pid``.
+
+    Durations are measured with ``perf_counter_ns`` by the caller and
+    binned in a ``LogHistogram`` per phase, so memory does not grow with the
+    number of steps. Quantiles are reported in microseconds.
+    """
+
+    __slots__ = ("_step_ns", "histograms", "maximum")
+
+    def __init__(self) -> None:
+        self.histograms = {phase: LogHistogram(PROFILE_MIN_NS) for phase in PHASES}
+        self.maximum = dict.fromkeys(PHASES, 0)
+        # duration of the step so far, completed by the publish phase; None
+        # when the listeners are updated without a step
+        self._step_ns: int | None = None
+
+    def record(self, phase: str, duration_ns: int) -> None:
+        """Add the duration of one phase."""
+        self.histograms[phase].add(duration_ns)
+        self.maximum[phase] = max(self.maximum[phase], duration_ns)
+
+    def record_step(
+        self,
+        start: int,
+        input_done: int,
+        parameters_done: int,
+        compute_done: int,
+        record_done: int,
+    ) -> None:
+        """Add the phases of a step from the ``perf_counter_ns`` marks."""
+        self.record(PHASE_INPUT, input_done - start)
+        self.record(PHASE_PARAMETERS, parameters_done - input_done)
+        self.record(PHASE_COMPUTE, compute_done - parameters_done)
+        self.record(PHASE_RECORD, record_done - compute_done)
+        self._step_ns = record_done - start
+
+    def record_publish(self, duration_ns: int) -> None:
+        """Add the entity writes that follow a step and complete its total.
+
+        Writes without a step before them, such as after a failed update or
+        a manual output, are not counted.
+        """
+        if self._step_ns is None:
+            return
+        self.record(PHASE_PUBLISH, duration_ns)
+        self.record(PHASE_TOTAL, self._step_ns + duration_ns)
+        self._step_ns = None
+
+    def quantile(self, phase: str, q: float) -> float | None:
+        """Return a quantile of a phase in microseconds."""
+        value = self.histograms[phase].quantile(q)
+        return None if value is None else value / 1000
+
+    def stats(self) -> dict[str, dict[str, float | int | None]]:
+        """Return count, quantiles and maximum of every phase in microseconds."""
+        return {
+            phase: {
+                "count": self.histograms[phase].count,
+                **{name: self.quantile(phase, q) for name, q in PROFILE_QUANTILES},
+                "max": self.maximum[phase] / 1000,
+            }
+            for phase in PHASES
+        }
@@ -0,0 +1,294 @@
+"""Fixed-rate scheduling for Simple PID Controller."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Coroutine
+from contextlib import nullcontext
+import logging
+import math
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util.hass_dict import HassKey
+
+from .const import DOMAIN, SCHEDULE_POLICY_CATCH_UP, SCHEDULE_POLICY_SKIP
+from .engine import PID_ENGINE
+
+_LOGGER = logging.getLogger(__name__)
+
+# after a long stall (e.g. suspend) the catch_up policy resynchronises instead
+MAX_CATCH_UP_TICKS = 10
+
+
+class FixedRateTimer:
+    """Fire an action at absolute deadlines ``start + n * period`` on the loop clock.
+
+    Unlike rescheduling ``period`` seconds after each run, the deadlines do not
+    accumulate the run time or the event loop latency, so the rate does not drift.
+    Cancelling only drops the pending wakeup; the phase of the grid is kept so
+    re-arming continues on the same deadlines. An aligned timer puts its grid on
+    multiples of the period, so all timers with the same period fire together.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        action: Callable[[], None],
+        policy: str = SCHEDULE_POLICY_SKIP,
+        aligned: bool = False,
+    ) -> None:
+        self._loop = loop
+        self._action = action
+        self.policy = policy
+        self.aligned = aligned
+        self.period: float | None = None
+        self._deadline: float | None = None
+        self._handle: asyncio.TimerHandle | None = None
+
+        self.ticks = 0
+        self.skipped_ticks = 0
+        self.last_lateness = 0.0
+        self.max_lateness = 0.0
+        self._total_lateness = 0.0
+
+    @property
+    def armed(self) -> bool:
+        """Return True when a wakeup is pending."""
+        return self._handle is not None
+
+    def arm(self, period: float) -> None:
+        """Schedule the next deadline, starting a new grid if the period changed."""
+        self.cancel()
+        now = self._loop.time()
+        if period != self.period or self._deadline is None:
+            self.period = period
+            if self.aligned:
+                self._deadline = (math.floor(now / period) + 1) * period
+            else:
+                self._deadline = now + period
+        elif self._deadline <= now:
+            missed = math.ceil((now - self._deadline) / period)
+            if self.policy != SCHEDULE_POLICY_CATCH_UP or missed > MAX_CATCH_UP_TICKS:
+                # skip the missed deadlines and continue on the same grid
+                if self._deadline + missed * period <= now:
+                    missed += 1
+                self._deadline += missed * period
+                self.skipped_ticks += missed
+        self._handle = self._loop.call_at(self._deadline, self._fire)
+
+    def cancel(self) -> None:
+        """Drop the pending wakeup, keeping the phase of the grid."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def reset(self) -> None:
+        """Drop the pending wakeup and forget the grid."""
+        self.cancel()
+        self.period = None
+        self._deadline = None
+
+    def _fire(self) -> None:
+        """Record the lateness of this wakeup and run the action."""
+        self._handle = None
+        lateness = max(self._loop.time() - self._deadline, 0.0)
+        self.ticks += 1
+        self.last_lateness = lateness
+        self.max_lateness = max(self.max_lateness, lateness)
+        self._total_lateness += lateness
+        self._deadline += self.period
+        self._action()
+
+    def stats(self) -> dict[str, float | int | str | None]:
+        """Return tick and lateness statistics."""
+        return {
+            "period": self.period,
+            "policy": self.policy,
+            "ticks": self.ticks,
+            "skipped_ticks": self.skipped_ticks,
+            "last_lateness": self.last_lateness,
+            "max_lateness": self.max_lateness,
+            "mean_lateness": self._total_lateness / self.ticks if self.ticks else 0.0,
+        }
+
+
+TICK_SCHEDULER: HassKey[TickScheduler] = HassKey(f"{DOMAIN}_tick_scheduler")
+
+
+class TickMember:
+    """Membership of one controller in a tick group.
+
+    The member is armed when its controller waits for the next tick and
+    disarmed while its step runs, mirroring a one-shot timer. Only a tick
+    that finds the step of the previous tick still running is missed; a
+    step the controller runs on its own, e.g. for a new input sample, stands
+    in for the tick it overlaps.
+    """
+
+    __slots__ = ("action", "armed", "group", "missed_ticks", "stepping")
+
+    def __init__(
+        self, group: TickGroup, action: Callable[[], Coroutine[Any, Any, None]]
+    ) -> None:
+        self.group = group
+        self.action = action
+        self.armed = False
+        self.missed_ticks = 0
+        # set while the step of a tick runs
+        self.stepping = False
+
+    @property
+    def period(self) -> float:
+        """Return the period of the group."""
+        return self.group.period
+
+    @property
+    def policy(self) -> str:
+        """Return the missed deadline policy of the group."""
+        return self.group.timer.policy
+
+    @callback
+    def arm(self) -> None:
+        """Wait for the next tick, or run now to catch up a missed one."""
+        self.stepping = False
+        if self.missed_ticks and self.policy == SCHEDULE_POLICY_CATCH_UP:
+            self.missed_ticks = 0
+            self.stepping = True
+            self.group.async_run([self])
+            return
+        self.armed = True
+
+    @callback
+    def disarm(self) -> None:
+        """Stop waiting for ticks."""
+        self.armed = False
+
+    @callback
+    def remove(self) -> None:
+        """Leave the group."""
+        self.armed = False
+        self.stepping = False
+        self.group.async_remove(self)
+
+
+class TickGroup:
+    """All controllers that share a period, woken by one aligned timer."""
+
+    def __init__(self, scheduler: TickScheduler, period: float, policy: str) -> None:
+        self._scheduler = scheduler
+        self.period = period
+        self.members: list[TickMember] = []
+        self.overruns = 0
+        self.timer = FixedRateTimer(
+            scheduler.hass.loop, self._fire, policy, aligned=True
+        )
+
+    @callback
+    def async_remove(self, member: TickMember) -> None:
+        """Remove a member and drop the group once it is empty."""
+        if member in self.members:
+            self.members.remove(member)
+        if not self.members:
+            self.timer.reset()
+            self._scheduler.async_remove_group(self)
+
+    @callback
+    def _fire(self) -> None:
+        """Run the step of every armed member in a single wakeup."""
+        self.timer.arm(self.period)
+        due: list[TickMember] = []
+        for member in self.members:
+            if member.armed:
+                member.armed = False
+                member.stepping = True
+                due.append(member)
+            elif member.stepping:
+                # the step of the previous tick is still running
+                member.missed_ticks += 1
+                self.overruns += 1
+        if due:
+            self.async_run(due)
+
+    @callback
+    def async_run(self, members: list[TickMember]) -> None:
+        """Run the steps of ``members`` together in one task."""
+        self._scheduler.hass.async_create_background_task(
+            self._async_run(members),
+            name=f"{DOMAIN} tick {self.period}s",
+            eager_start=True,
+        )
+
+    async def _async_run(self, members: list[TickMember]) -> None:
+        """Await the steps; a failing controller does not stop the others.
+
+        The steps run concurrently, so the PID steps of all members are
+        computed in one batch of the shared engine.
+        """
+        hass = self._scheduler.hass
+        tasks = []
+        engine = hass.data.get(PID_ENGINE)
+        with engine.batch() if engine is not None else nullcontext():
+            for member in members:
+                # each step runs up to its PID step before the next one starts
+                tasks.append(
+                    hass.async_create_task(
+                        member.action(), f"{DOMAIN} step", eager_start=True
+                    )
+                )
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                _LOGGER.error("Error in scheduled PID step", exc_info=result)
+
+    def stats(self) -> dict[str, float | int | str | None]:
+        """Return timer statistics of the group."""
+        return {
+            **self.timer.stats(),
+            "overruns": self.overruns,
+            "members": len(self.members),
+        }
+
+
+class TickScheduler:
+    """Process-wide scheduler grouping controllers by sample period."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._groups: dict[tuple[float, str], TickGroup] = {}
+
+    @callback
+    def async_register(
+        self,
+        period: float,
+        policy: str,
+        action: Callable[[], Coroutine[Any, Any, None]],
+    ) -> TickMember:
+        """Add a controller to the group of its period."""
+        key = (period, policy)
+        if (group := self._groups.get(key)) is None:
+            group = self._groups[key] = TickGroup(self, period, policy)
+            group.timer.arm(period)
+        member = TickMember(group, action)
+        group.members.append(member)
+        return member
+
+    @callback
+    def async_remove_group(self, group: TickGroup) -> None:
+        """Forget an empty group, and the scheduler once no groups remain."""
+        self._groups.pop((group.period, group.timer.policy), None)
+        if not self._groups:
+            self.hass.data.pop(TICK_SCHEDULER, None)
+
+    @property
+    def groups(self) -> list[TickGroup]:
+        """Return the active groups."""
+        return list(self._groups.values())
+
+
+@callback
+def async_get_tick_scheduler(hass: HomeAssistant) -> TickScheduler:
+    """Return the shared tick scheduler, creating it when needed."""
+    if (scheduler := hass.data.get(TICK_SCHEDULER)) is None:
+        scheduler = hass.data[TICK_SCHEDULER] = TickScheduler(hass)
+    return scheduler
@@ -0,0 +1,234 @@
+"""Gain search on a simulation of the recorded process."""
+
+from __future__ import annotations
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+import math
+import multiprocessing
+import os
+from typing import Any
+
+import numpy as np
+
+from .simulation import FloatArray, FOPDTModel, simulate
+
+SEARCH_GRID = "grid"
+SEARCH_RANDOM = "random"
+SEARCH_REFINE = "refine"
+SEARCH_METHODS = (SEARCH_GRID, SEARCH_RANDOM, SEARCH_REFINE)
+OBJECTIVES = ("iae", "ise")
+
+# rounds of SEARCH_REFINE; every round halves the search box around the best
+REFINE_ROUNDS = 4
+# candidates per worker task, small enough to keep all workers busy
+MIN_CHUNK = 16
+# worker processes by default, leaving the other cores to Home Assistant
+MAX_WORKERS = 4
+
+Bounds = tuple[tuple[float, float], tuple[float, float], tuple[float, float]]
+
+
+def default_bounds(model: FOPDTModel) -> Bounds:
+    """Return search bounds around the SIMC tuning of the model.
+
+    The box spans three times the SIMC gains, with the sign of the process
+    gain so reverse acting processes get negative gains. Raises ValueError
+    when the model has no usable gain or time constant, e.g. fitted on a
+    flat recording.
+    """
+    if not model.gain or not math.isfinite(model.gain):
+        raise ValueError(f"The process gain {model.gain} gives no tuning")
+    if not model.time_constant > 0 or not math.isfinite(model.time_constant):
+        raise ValueError(f"The time constant {model.time_constant} gives no tuning")
+    theta = max(model.dead_time, model.dt)
+    kp = model.time_constant / (model.gain * 2 * theta)
+    ki = kp / min(model.time_constant, 8 * theta)
+    kd = kp * theta
+    if not all(math.isfinite(gain) for gain in (kp, ki, kd)):
+        raise ValueError(f"The process gain {model.gain} is too small to tune")
+    return tuple(  # type: ignore[return-value]
+        (min(0.0, 3 * gain), max(0.0, 3 * gain)) for gain in (kp, ki, kd)
+    )
+
+
+def default_workers() -> int:
+    """Return the number of worker processes of a search without ``workers``."""
+    return min(MAX_WORKERS, os.cpu_count() or 1)
+
+
+def create_search_pool(workers: int) -> ProcessPoolExecutor:
+    """Return a process pool to run the simulations of ``search_gains``."""
+    # spawn, forking a process with running threads is unsafe
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def evaluate(
+    model: FOPDTModel,
+    tunings: FloatArray,
+    setpoint: float,
+    duration: float,
+    initial: float | None,
+    output_limits: tuple[float | None, float | None],
+    proportional_on_measurement: bool,
+    objective: str,
+) -> FloatArray:
+    """Return the cost of every tuning; unstable responses cost infinity."""
+    result = simulate(
+        model,
+        tunings,
+        setpoint,
+        duration,
+        initial=initial,
+        output_limits=output_limits,
+        proportional_on_measurement=proportional_on_measurement,
+    )
+    cost = result.metrics[objective]
+    return np.where(np.isfinite(cost), cost, np.inf)
+
+
+@dataclass(slots=True)
+class SearchResult:
+    """Best tunings of a search and the number of simulated candidates."""
+
+    kp: float
+    ki: float
+    kd: float
+    cost: float
+    objective: str
+    evaluated: int
+    top: list[dict[str, float]]
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "kp": self.kp,
+            "ki": self.ki,
+            "kd": self.kd,
+            "cost": self.cost,
+            "objective": self.objective,
+            "evaluated": self.evaluated,
+            "top": self.top,
+        }
+
+
+def _grid(bounds: Bounds, samples: int) -> FloatArray:
+    free = [lo != hi for lo, hi in bounds]
+    per_axis = max(2, round(samples ** (1 / max(sum(free), 1))))
+    axes = [
+        np.linspace(lo, hi, per_axis) if is_free else np.array([lo])
+        for (lo, hi), is_free in zip(bounds, free)
+    ]
+    return np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, 3)
+
+
+def _random(bounds: Bounds, samples: int, rng: np.random.Generator) -> FloatArray:
+    lower, upper = np.array(bounds).T
+    return rng.uniform(lower, upper, size=(samples, 3))
+
+
+def search_gains(
+    model: FOPDTModel,
+    setpoint: float,
+    duration: float,
+    bounds: Bounds | None = None,
+    method: str = SEARCH_GRID,
+    samples: int = 1000,
+    objective: str = "iae",
+    initial: float | None = None,
+    output_limits: tuple[float | None, float | None] = (None, None),
+    proportional_on_measurement: bool = False,
+    workers: int | None = None,
+    seed: int | None = None,
+    executor: Executor | None = None,
+) -> SearchResult:
+    """Search (kp, ki, kd) minimizing ``objective`` of a setpoint step.
+
+    ``grid`` evaluates an even grid, ``random`` uniform samples and
+    ``refine`` random samples in boxes that shrink around the best tuning.
+    Candidates are simulated in ``workers`` batches (``default_workers()``
+    by default) on ``executor``, or on a process pool started only when
+    there are enough candidates to split and shut down before returning;
+    otherwise they run in the calling thread. Pass an executor to reuse one
+    pool for many searches. This blocks, so run it in an executor.
+    """
+    if method not in SEARCH_METHODS:
+        raise ValueError(f"Unknown search method {method}")
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective}")
+    bounds = default_bounds(model) if bounds is None else bounds
+    rng = np.random.default_rng(seed)
+    workers = workers or default_workers()
+    args = (
+        model,
+        setpoint,
+        duration,
+        initial,
+        output_limits,
+        proportional_on_measurement,
+        objective,
+    )
+
+    pool: ProcessPoolExecutor | None = None
+
+    def run(candidates: FloatArray) -> FloatArray:
+        nonlocal executor, pool
+        chunks = np.array_split(
+            candidates, max(1, min(workers, len(candidates) // MIN_CHUNK))
+        )
+        if len(chunks) == 1:
+            return evaluate(args[0], candidates, *args[1:])
+        if executor is None:
+            executor = pool = create_search_pool(workers)
+        costs = executor.map(
+            evaluate,
+            *zip(*((args[0], chunk, *args[1:]) for chunk in chunks)),
+        )
+        return np.concatenate(list(costs))
+
+    try:
+        if method == SEARCH_GRID:
+            tunings = _grid(bounds, samples)
+            costs = run(tunings)
+        elif method == SEARCH_RANDOM:
+            tunings = _random(bounds, samples, rng)
+            costs = run(tunings)
+        else:
+            per_round = max(1, samples // REFINE_ROUNDS)
+            box = np.array(bounds, dtype=np.float64)
+            tunings = np.empty((0, 3))
+            costs = np.empty(0)
+            for _ in range(REFINE_ROUNDS):
+                batch = _random(tuple(map(tuple, box)), per_round, rng)
+                tunings = np.concatenate((tunings, batch))
+                costs = np.concatenate((costs, run(batch)))
+                best = tunings[np.argmin(costs)]
+                half = (box[:, 1] - box[:, 0]) / 4
+                box = np.column_stack(
+                    (
+                        np.maximum(box[:, 0], best - half),
+                        np.minimum(box[:, 1], best + half),
+                    )
+                )
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    order = np.argsort(costs, kind="stable")
+    kp, ki, kd = (float(v) for v in tunings[order[0]])
+    return SearchResult(
+        kp=kp,
+        ki=ki,
+        kd=kd,
+        cost=float(costs[order[0]]),
+        objective=objective,
+        evaluated=len(tunings),
+        top=[
+            {
+                "kp": float(tunings[i, 0]),
+                "ki": float(tunings[i, 1]),
+                "kd": float(tunings[i, 2]),
+                "cost": float(costs[i]),
+            }
+            for i in order[:5]
+        ],
+    )
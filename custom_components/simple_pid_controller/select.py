@@ -1,7 +1,12 @@
+from typing import Any
+
 from homeassistant.components.select import SelectEntity
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
+from .autotune import AUTOTUNE_OFF, AUTOTUNE_OPTIONS
+from .coordinator import PIDDataCoordinator
 from .entity import BasePIDEntity
 
 START_MODE_OPTIONS = [
@@ -12,10 +17,15 @@ START_MODE_OPTIONS = [
 
 
 async def async_setup_entry(hass, entry, async_add_entities):
-    """Set up the PID start mode select entity."""
+    """Set up the PID start mode and autotune select entities."""
     coordinator = entry.runtime_data.coordinator
     async_add_entities(
-        [PIDStartModeSelect(hass, entry, "start_mode", "PID Start Mode", coordinator)]
+        [
+            PIDStartModeSelect(
+                hass, entry, "start_mode", "PID Start Mode", coordinator
+            ),
+            PIDAutotuneSelect(hass, entry, "autotune", "Autotune", coordinator),
+        ]
     )
 
 
@@ -33,6 +43,7 @@ class PIDStartModeSelect(BasePIDEntity, SelectEntity, RestoreEntity):
         """Change the selected option."""
         if option in self._attr_options:
             self._attr_current_option = option
+            self._handle.params.set(self._key, option)
             self.async_write_ha_state()
 
     async def async_added_to_hass(self):
@@ -42,3 +53,43 @@ class PIDStartModeSelect(BasePIDEntity, SelectEntity, RestoreEntity):
             last_state := await self.async_get_last_state()
         ) and last_state.state in self._attr_options:
             self._attr_current_option = last_state.state
+        self._handle.params.set(self._key, self._attr_current_option)
+
+
+class PIDAutotuneSelect(
+    CoordinatorEntity[PIDDataCoordinator], BasePIDEntity, SelectEntity
+):
+    """Start a relay autotune with the selected tuning rule.
+
+    The selection returns to Off when the experiment ends; the measured
+    ultimate gain and period and the proposed gains are attributes.
+    """
+
+    def __init__(self, hass, entry, key, name, coordinator):
+        super().__init__(coordinator)
+        BasePIDEntity.__init__(self, hass, entry, key, name)
+        self._attr_options = AUTOTUNE_OPTIONS
+        self._attr_entity_category = EntityCategory.CONFIG
+
+    @property
+    def current_option(self) -> str:
+        if (tuner := self._handle.autotuner) is not None:
+            return tuner.rule
+        return AUTOTUNE_OFF
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        if (tuner := self._handle.autotuner) is not None:
+            return tuner.stats()
+        if (result := self._handle.autotune_result) is not None:
+            return {"result": result.as_dict()}
+        return {}
+
+    async def async_select_option(self, option: str) -> None:
+        """Start or stop the relay experiment."""
+        if option == AUTOTUNE_OFF:
+            self._handle.stop_autotune()
+        else:
+            self._handle.start_autotune(option)
+        self.async_write_ha_state()
+        await self.coordinator.async_request_refresh()
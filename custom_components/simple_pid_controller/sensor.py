@@ -2,30 +2,64 @@
 
 from __future__ import annotations
 
+from collections.abc import Mapping
+from functools import partial
 import logging
 
 from homeassistant.components.sensor import SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import UnitOfTime
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.restore_state import RestoreEntity
 
-from datetime import timedelta
-from time import perf_counter
-from simple_pid import PID
+from time import perf_counter, perf_counter_ns, time
 from typing import Any
 
-from . import PIDDeviceHandle
-from .entity import BasePIDEntity
-from .coordinator import PIDDataCoordinator
+from . import PIDDeviceHandle, PIDStepResult
+from .entity import BasePIDEntity, PublishFilterMixin
+from .coordinator import PIDDataCoordinator, scheduling_options
+from .autotune import AUTOTUNE_RUNNING
+from .engine import async_get_pid_engine, async_release_pid_engine
+from .pid import PID
+from .profiling import PHASE_TOTAL
+from .const import (
+    CONF_DIAGNOSTIC_DEADBAND,
+    CONF_MIN_PUBLISH_INTERVAL,
+    CONF_OUTPUT_DEADBAND,
+    DEFAULT_DIAGNOSTIC_DEADBAND,
+    DEFAULT_MIN_PUBLISH_INTERVAL,
+    DEFAULT_OUTPUT_DEADBAND,
+)
 
 # Coordinator is used to centralize the data updates
 PARALLEL_UPDATES = 0
 
 _LOGGER = logging.getLogger(__name__)
 
+# PIDStepResult field shown by each contribution sensor
+CONTRIBUTION_FIELDS = {
+    "pid_p_contrib": "p",
+    "pid_i_contrib": "i",
+    "pid_d_contrib": "d",
+    "error": "error",
+    "pid_i_delta": "i_delta",
+    "filtered_input": "filtered_input",
+}
+
+# key in LoopMetrics.values(), name and unit of the metric sensors
+METRIC_SENSORS = (
+    ("iae", "IAE", None),
+    ("ise", "ISE", None),
+    ("itae", "ITAE", None),
+    ("oscillations", "Oscillations", None),
+    ("saturation", "Time in Saturation", "%"),
+    ("mean_sample_time", "Mean Sample Time", "s"),
+    ("p95_sample_time", "Sample Time p95", "s"),
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -35,67 +69,83 @@ async def async_setup_entry(
     """Set up PID output and diagnostic sensors."""
     handle: PIDDeviceHandle = entry.runtime_data.handle
 
-    # Init PID with default values
-    handle.pid = PID(1.0, 0.1, 0.05, setpoint=50, sample_time=None, auto_mode=False)
-
+    # Init PID with default values, in a slot of the engine shared by all entries
+    handle.pid = PID(
+        1.0,
+        0.1,
+        0.05,
+        setpoint=50,
+        sample_time=None,
+        auto_mode=False,
+        engine=async_get_pid_engine(hass),
+    )
+    entry.async_on_unload(partial(async_release_pid_engine, hass, handle.pid.slot))
     handle.pid.output_limits = (-10.0, 10.0)
-    handle.last_contributions = (0, 0, 0, 0)
+    handle.last_step = None
     handle.last_known_output = None
 
+    # resume the integrator and the last step from before the restart
+    await handle.async_restore_state()
+
     async def update_pid():
         """Update the PID output using current sensor and parameter values."""
+        profiler = handle.profiler
+        if profiler is not None:
+            start_ns = perf_counter_ns()
         input_value = handle.get_input_sensor_value()
         if input_value is None:
+            coordinator.waiting_for_input = True
             raise ValueError("Input sensor not available")
 
-        handle.input_history.append(input_value)
-
-        # Read parameters from UI
-        kp = handle.get_number("kp")
-        ki = handle.get_number("ki")
-        kd = handle.get_number("kd")
-        setpoint = handle.get_number("setpoint")
-        starting_output = handle.get_number("starting_output")
-        start_mode = handle.get_select("start_mode")
-        sample_time = handle.get_number("sample_time")
-        out_min = handle.get_number("output_min")
-        out_max = handle.get_number("output_max")
-        auto_mode = handle.get_switch("auto_mode")
-        p_on_m = handle.get_switch("proportional_on_measurement")
-        windup_protection = handle.get_switch("windup_protection")
-
-        # adapt PID settings
-        handle.pid.tunings = (kp, ki, kd)
-        handle.pid.setpoint = setpoint
-
-        handle.pid_parameter_history.append(
-            {
-                "kp": kp,
-                "ki": ki,
-                "kd": kd,
-                "setpoint": setpoint,
-            }
-        )
-
-        if windup_protection:
-            handle.pid.output_limits = (out_min, out_max)
-        else:
-            handle.pid.output_limits = (None, None)
-
+        # the PID sees the filtered input, history and trace the measured one
+        filtered_input = None
+        pid_input = input_value
+        if (input_filter := handle.input_filter) is not None:
+            pid_input = filtered_input = input_filter.update(
+                input_value, time(), handle.get_input_sample_time()
+            )
+
+        if profiler is not None:
+            input_ns = perf_counter_ns()
+
+        # Parameters are pushed into the snapshot by the entities
+        params = handle.params
+        kp = params.kp
+        ki = params.ki
+        kd = params.kd
+        setpoint = params.setpoint
+        starting_output = params.starting_output
+        start_mode = params.start_mode
+        sample_time = params.sample_time
+        out_min = params.output_min
+        out_max = params.output_max
+        auto_mode = params.auto_mode
+        p_on_m = params.proportional_on_measurement
+        windup_protection = params.windup_protection
+
+        # bumpless start value, used when switching from manual to auto
         _LOGGER.debug("Start mode = %s (type: %s)", start_mode, type(start_mode))
-        if not handle.pid.auto_mode and auto_mode:
-            if start_mode == "Zero start":
-                handle.pid.set_auto_mode(True, 0)
-            elif start_mode == "Last known value":
-                handle.pid.set_auto_mode(True, handle.last_known_output)
-            elif start_mode == "Startup value":
-                handle.pid.set_auto_mode(True, starting_output)
-            else:
-                handle.pid.set_auto_mode(True)
+        if start_mode == "Zero start":
+            start_output = 0
+        elif start_mode == "Last known value":
+            start_output = handle.last_known_output
+        elif start_mode == "Startup value":
+            start_output = starting_output
         else:
-            handle.pid.auto_mode = auto_mode
+            start_output = None
+
+        # adapt PID settings in one call
+        handle.pid.configure(
+            (kp, ki, kd),
+            setpoint,
+            (out_min, out_max) if windup_protection else (None, None),
+            auto_mode,
+            p_on_m,
+            start_output,
+        )
 
-        handle.pid.proportional_on_measurement = p_on_m
+        if profiler is not None:
+            parameters_ns = perf_counter_ns()
 
         now = perf_counter()
         if handle.last_update_timestamp is None:
@@ -104,58 +154,116 @@ async def async_setup_entry(
             handle.last_measured_sample_time = now - handle.last_update_timestamp
         handle.last_update_timestamp = now
 
-        handle.sample_time_history.append(handle.last_measured_sample_time)
+        if (tuner := handle.autotuner) is not None and not auto_mode:
+            # a manual output is never overridden by the relay
+            _LOGGER.warning("Autotune of %s aborted in manual mode", handle.name)
+            handle.stop_autotune()
+            tuner = None
+        if tuner is not None:
+            # the relay experiment drives the output instead of the PID
+            output = tuner.step(pid_input, now)
+            p_term = i_term = d_term = i_delta = None
+            if tuner.state != AUTOTUNE_RUNNING:
+                handle.autotuner = None
+                hass.async_create_task(handle.async_apply_autotune(tuner, output))
+        else:
+            # stepped together with the other controllers of this tick
+            output, p_term, i_term, d_term = await handle.pid.async_step(pid_input)
+
+            # change of the I contribution since the last PID step
+            last = handle.last_step
+            last_i = last.i if last is not None and last.i is not None else 0.0
+            i_delta = i_term - last_i
 
-        output = handle.pid(input_value)
+        if profiler is not None:
+            compute_ns = perf_counter_ns()
 
         # save last know output
         handle.last_known_output = output
-        handle.output_history.append(output)
 
-        # save last I contribution
-        last_i = handle.last_contributions[1]
-
-        # save all latest contributions
-        handle.last_contributions = (
-            handle.pid.components[0],
-            handle.pid.components[1],
-            handle.pid.components[2],
-            handle.pid.components[1] - last_i,
+        timestamp = time()
+        # one immutable record per step, read by all sensors
+        handle.last_step = PIDStepResult(
+            timestamp,
+            input_value,
+            setpoint,
+            output,
+            p_term,
+            i_term,
+            d_term,
+            i_delta,
+            None if setpoint is None else pid_input - setpoint,
+            handle.last_measured_sample_time,
+            filtered_input,
         )
-
-        handle.pid_contribution_history.append(
-            {
-                "p": handle.last_contributions[0],
-                "i": handle.last_contributions[1],
-                "d": handle.last_contributions[2],
-                "i_delta": handle.last_contributions[3],
-            }
+        handle.history.append(
+            timestamp,
+            input_value,
+            output,
+            setpoint,
+            kp,
+            ki,
+            kd,
+            p_term,
+            i_term,
+            d_term,
+            i_delta,
+            handle.last_measured_sample_time,
         )
+        # in manual mode the PID has no output until its first auto step
+        if setpoint is not None and output is not None:
+            handle.metrics.update(
+                timestamp,
+                setpoint - pid_input,
+                (out_min is not None and output <= out_min)
+                or (out_max is not None and output >= out_max),
+                handle.last_measured_sample_time,
+            )
+        if handle.trace is not None:
+            handle.trace.append(
+                timestamp,
+                input_value,
+                setpoint,
+                output,
+                p_term,
+                i_term,
+                d_term,
+                handle.last_measured_sample_time,
+            )
 
         _LOGGER.debug(
-            "PID input=%s setpoint=%s kp=%s ki=%s kd=%s => output=%s [P=%s, I=%s, D=%s, dI=%s]",
+            "PID input=%s filtered=%s setpoint=%s kp=%s ki=%s kd=%s => output=%s [P=%s, I=%s, D=%s, dI=%s]",
             input_value,
-            handle.pid.setpoint,
-            handle.pid.Kp,
-            handle.pid.Ki,
-            handle.pid.Kd,
+            filtered_input,
+            setpoint,
+            kp,
+            ki,
+            kd,
             output,
-            handle.last_contributions[0],
-            handle.last_contributions[1],
-            handle.last_contributions[2],
-            handle.last_contributions[3],
+            p_term,
+            i_term,
+            d_term,
+            i_delta,
         )
 
-        if coordinator.update_interval.total_seconds() != sample_time:
-            _LOGGER.debug("Updating coordinator interval to %.2f seconds", sample_time)
-            coordinator.update_interval = timedelta(seconds=sample_time)
+        handle.state_store.async_schedule_save()
+        coordinator.set_sample_time(sample_time)
 
+        if profiler is not None:
+            profiler.record_step(
+                start_ns, input_ns, parameters_ns, compute_ns, perf_counter_ns()
+            )
         return output
 
     # Setup Coordinator
     if entry.runtime_data.coordinator is None:
         entry.runtime_data.coordinator = PIDDataCoordinator(
-            hass, handle.name, update_pid, interval=10
+            hass,
+            handle.name,
+            update_pid,
+            interval=10,
+            profiler=handle.profiler,
+            **scheduling_options(entry.options or {}),
         )
     coordinator = entry.runtime_data.coordinator
 
@@ -168,64 +276,67 @@ async def async_setup_entry(
         hass.bus.async_listen_once("homeassistant_started", start_refresh)
     )
 
-    async_add_entities(
-        [
-            PIDOutputSensor(hass, entry, coordinator),
-            PIDContributionSensor(
-                hass, entry, "pid_p_contrib", "P contribution", coordinator
-            ),
-            PIDContributionSensor(
-                hass, entry, "pid_i_contrib", "I contribution", coordinator
-            ),
-            PIDContributionSensor(
-                hass, entry, "pid_d_contrib", "D contribution", coordinator
-            ),
-            PIDContributionSensor(hass, entry, "error", "Error", coordinator),
-            PIDContributionSensor(hass, entry, "pid_i_delta", "I delta", coordinator),
-            PIDSampleTimeSensor(
-                hass, entry, "actual_sample_time", "Actual Sample Time", coordinator
-            ),
-        ]
-    )
-
-    # Put listeners on inputs
-    def make_listener(entity_id: str):
-        def _listener(event):
-            if event.data.get("entity_id") == entity_id:
-                _LOGGER.debug("Update detected on %s", entity_id)
-                coordinator.async_request_refresh()
-
-        return _listener
-
-    for key in [
-        "kp",
-        "ki",
-        "kd",
-        "setpoint",
-        "output_min",
-        "output_max",
-        "sample_time",
-    ]:
-        unsub = hass.bus.async_listen(
-            "state_changed", make_listener(f"number.{entry.entry_id}_{key}")
+    entities: list[SensorEntity] = [
+        PIDOutputSensor(hass, entry, coordinator),
+        PIDContributionSensor(
+            hass, entry, "pid_p_contrib", "P contribution", coordinator
+        ),
+        PIDContributionSensor(
+            hass, entry, "pid_i_contrib", "I contribution", coordinator
+        ),
+        PIDContributionSensor(
+            hass, entry, "pid_d_contrib", "D contribution", coordinator
+        ),
+        PIDContributionSensor(hass, entry, "error", "Error", coordinator),
+        PIDContributionSensor(hass, entry, "pid_i_delta", "I delta", coordinator),
+        PIDContributionSensor(
+            hass, entry, "filtered_input", "Filtered Input", coordinator
+        ),
+        PIDSampleTimeSensor(
+            hass, entry, "actual_sample_time", "Actual Sample Time", coordinator
+        ),
+        *(
+            PIDMetricSensor(hass, entry, key, name, unit, coordinator)
+            for key, name, unit in METRIC_SENSORS
+        ),
+    ]
+    if handle.profiler is not None:
+        entities.append(
+            PIDStepDurationSensor(
+                hass, entry, "step_duration", "Step Duration p95", coordinator
+            )
         )
-        entry.async_on_unload(unsub)
 
-    for key in ["auto_mode", "proportional_on_measurement", "windup_protection"]:
-        unsub = hass.bus.async_listen(
-            "state_changed", make_listener(f"switch.{entry.entry_id}_{key}")
-        )
-        entry.async_on_unload(unsub)
+    @callback
+    def set_publish_filters(options: Mapping[str, Any]) -> None:
+        """Apply the deadbands and publish interval of the options."""
+        # the output deadband is in output units; the diagnostic sensors have
+        # unrelated units, so their deadband is relative to each own value
+        interval = options.get(CONF_MIN_PUBLISH_INTERVAL, DEFAULT_MIN_PUBLISH_INTERVAL)
+        for entity in entities:
+            if isinstance(entity, PIDOutputSensor):
+                entity.set_publish_filter(
+                    options.get(CONF_OUTPUT_DEADBAND, DEFAULT_OUTPUT_DEADBAND),
+                    interval,
+                )
+            else:
+                entity.set_publish_filter(
+                    options.get(CONF_DIAGNOSTIC_DEADBAND, DEFAULT_DIAGNOSTIC_DEADBAND),
+                    interval,
+                    relative=True,
+                )
 
-    for key in ["start_mode"]:
-        unsub = hass.bus.async_listen(
-            "state_changed", make_listener(f"select.{entry.entry_id}_{key}")
-        )
-        entry.async_on_unload(unsub)
+    set_publish_filters(entry.options or {})
+    handle.published_sensors = {entity._key: entity for entity in entities}
+    entry.async_on_unload(handle.async_add_options_listener(set_publish_filters))
+    async_add_entities(entities)
 
 
 class PIDOutputSensor(
-    CoordinatorEntity[PIDDataCoordinator], RestoreEntity, SensorEntity
+    PublishFilterMixin,
+    CoordinatorEntity[PIDDataCoordinator],
+    RestoreEntity,
+    SensorEntity,
 ):
     """Sensor representing the PID output."""
 
@@ -244,6 +355,9 @@ class PIDOutputSensor(
 
     async def async_added_to_hass(self):
         await super().async_added_to_hass()
+        if self._handle.state_restored:
+            # the saved controller state holds the unrounded output
+            return
         if (state := await self.async_get_last_state()) is not None:
             try:
                 value = float(state.state)
@@ -258,7 +372,9 @@ class PIDOutputSensor(
         return round(self.coordinator.data, 2)
 
 
-class PIDContributionSensor(CoordinatorEntity[PIDDataCoordinator], SensorEntity):
+class PIDContributionSensor(
+    PublishFilterMixin, CoordinatorEntity[PIDDataCoordinator], SensorEntity
+):
     """Sensor representing P, I or D contribution."""
 
     def __init__(
@@ -277,29 +393,20 @@ class PIDContributionSensor(CoordinatorEntity[PIDDataCoordinator], SensorEntity)
         self._attr_entity_registry_enabled_default = False
         self._attr_state_class = SensorStateClass.MEASUREMENT
         self._key = key
+        self._field = CONTRIBUTION_FIELDS.get(key)
 
     @property
     def native_value(self):
-        contributions = self._handle.last_contributions
-        input_value = self._handle.get_input_sensor_value()
-        setpoint = self._handle.get_number("setpoint")
-
-        if input_value is None or setpoint is None:
-            error = 0
-        else:
-            error = input_value - setpoint
-
-        value = {
-            "pid_p_contrib": contributions[0],
-            "pid_i_contrib": contributions[1],
-            "pid_d_contrib": contributions[2],
-            "error": error,
-            "pid_i_delta": contributions[3],
-        }.get(self._key)
+        step = self._handle.last_step
+        if step is None or self._field is None:
+            return None
+        value = getattr(step, self._field)
         return round(value, 3) if value is not None else None
 
 
-class PIDSampleTimeSensor(CoordinatorEntity[PIDDataCoordinator], SensorEntity):
+class PIDSampleTimeSensor(
+    PublishFilterMixin, CoordinatorEntity[PIDDataCoordinator], SensorEntity
+):
     """Sensor exposing the measured sample time between PID updates."""
 
     def __init__(
@@ -321,7 +428,72 @@ class PIDSampleTimeSensor(CoordinatorEntity[PIDDataCoordinator], SensorEntity):
 
     @property
     def native_value(self) -> float | None:
-        sample_time = self._handle.last_measured_sample_time
-        if sample_time is None:
+        step = self._handle.last_step
+        if step is None or step.dt is None:
             return None
-        return round(sample_time, 3)
+        return round(step.dt, 3)
+
+
+class PIDMetricSensor(
+    PublishFilterMixin, CoordinatorEntity[PIDDataCoordinator], SensorEntity
+):
+    """Sensor exposing a performance metric over the metrics window."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        key: str,
+        name: str,
+        unit: str | None,
+        coordinator: PIDDataCoordinator,
+    ) -> None:
+        super().__init__(coordinator)
+
+        BasePIDEntity.__init__(self, hass, entry, f"metric_{key}", name)
+
+        self._metric = key
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_entity_registry_enabled_default = False
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = unit
+
+    @property
+    def native_value(self) -> float | int | None:
+        value = self._handle.metrics.values()[self._metric]
+        if value is None or isinstance(value, int):
+            return value
+        return round(value, 3)
+
+
+class PIDStepDurationSensor(
+    PublishFilterMixin, CoordinatorEntity[PIDDataCoordinator], SensorEntity
+):
+    """Sensor exposing the p95 step duration, with all phases as attributes."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        key: str,
+        name: str,
+        coordinator: PIDDataCoordinator,
+    ) -> None:
+        super().__init__(coordinator)
+
+        BasePIDEntity.__init__(self, hass, entry, key, name)
+
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = UnitOfTime.MICROSECONDS
+        # the phase statistics change with every step; only the p95 counts
+        self.publish_attributes = False
+
+    @property
+    def native_value(self) -> float | None:
+        value = self._handle.profiler.quantile(PHASE_TOTAL, 0.95)
+        return None if value is None else round(value, 1)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        return self._handle.profiler.stats()
@@ -0,0 +1,362 @@
+"""Offline replay and closed loop simulation for tuning."""
+
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+import math
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from .engine import BatchPIDEngine
+from .history import HistoryBuffer
+from .tracelog import TraceReader, rotated_paths
+
+FloatArray = NDArray[np.float64]
+
+# the measured value is settled once it stays within this fraction of the step
+SETTLING_BAND = 0.02
+MAX_DEAD_TIME_STEPS = 20
+
+
+@dataclass(slots=True)
+class Trace:
+    """Recorded samples of one controller, oldest first."""
+
+    timestamp: FloatArray
+    input: FloatArray
+    setpoint: FloatArray
+    output: FloatArray
+
+    def __post_init__(self) -> None:
+        if len(self.timestamp) < 2:
+            raise ValueError("A trace needs at least two samples")
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @property
+    def dt(self) -> FloatArray:
+        """Return the time step of every sample; the first one is the median."""
+        steps = np.diff(self.timestamp)
+        return np.concatenate(([float(np.median(steps))], steps))
+
+    @property
+    def sample_time(self) -> float:
+        """Return the median time step."""
+        return float(np.median(np.diff(self.timestamp)))
+
+    @classmethod
+    def from_columns(cls, columns: dict[str, ArrayLike]) -> Trace:
+        """Build a trace from columns, dropping samples without an input."""
+        arrays = {
+            field: np.asarray(columns[field], dtype=np.float64)
+            for field in ("timestamp", "input", "setpoint", "output")
+        }
+        valid = ~np.isnan(arrays["input"]) & ~np.isnan(arrays["timestamp"])
+        return cls(**{field: array[valid] for field, array in arrays.items()})
+
+    @classmethod
+    def from_history(cls, history: HistoryBuffer) -> Trace:
+        """Copy the in-memory history of a controller."""
+        return cls.from_columns(
+            {
+                field: (
+                    np.concatenate(
+                        [np.frombuffer(s, dtype=np.float64) for s in segments]
+                    )
+                    if (segments := history.segments(field))
+                    else np.empty(0)
+                )
+                for field in ("timestamp", "input", "setpoint", "output")
+            }
+        )
+
+    @classmethod
+    def from_trace_file(cls, path: Path) -> Trace:
+        """Read a trace file and its rotated backups."""
+        parts = []
+        for file_path in rotated_paths(path):
+            if file_path.exists():
+                with TraceReader(file_path) as reader:
+                    parts.append(reader.records.copy())
+        if not parts:
+            raise ValueError(f"No trace found at {path}")
+        records = np.concatenate(parts)
+        return cls.from_columns(
+            {field: records[field] for field in records.dtype.names}
+        )
+
+    @classmethod
+    def from_csv(cls, path: Path) -> Trace:
+        """Read a CSV file with timestamp, input, setpoint and output columns."""
+        with path.open(newline="") as file:
+            rows = list(csv.DictReader(file))
+        return cls.from_columns(
+            {
+                field: [float(row[field]) if row[field] else math.nan for row in rows]
+                for field in ("timestamp", "input", "setpoint", "output")
+            }
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class FOPDTModel:
+    """First order plus dead time process, discretized with sample time ``dt``.
+
+    ``y[k+1] = a * y[k] + (1 - a) * (bias + gain * u[k - delay])`` with
+    ``a = exp(-dt / time_constant)``.
+    """
+
+    gain: float
+    time_constant: float
+    dead_time: float
+    bias: float
+    dt: float
+
+    @property
+    def delay_steps(self) -> int:
+        return round(self.dead_time / self.dt)
+
+    @classmethod
+    def fit(cls, trace: Trace, max_delay: int = MAX_DEAD_TIME_STEPS) -> FOPDTModel:
+        """Fit the model to a trace with least squares, trying each dead time."""
+        y = trace.input
+        u = np.nan_to_num(trace.output)
+        dt = trace.sample_time
+        best: tuple[float, int, FloatArray] | None = None
+        for delay in range(min(max_delay, len(y) - 3) + 1):
+            regressors = np.column_stack(
+                (y[delay:-1], u[: len(u) - 1 - delay], np.ones(len(y) - 1 - delay))
+            )
+            target = y[delay + 1 :]
+            coef, *_ = np.linalg.lstsq(regressors, target, rcond=None)
+            residual = float(np.sum((regressors @ coef - target) ** 2))
+            if best is None or residual < best[0]:
+                best = (residual, delay, coef)
+        assert best is not None
+        _, delay, (a, b, c) = best
+        if not 0 < a < 1:
+            raise ValueError("The trace does not show a stable first order response")
+        return cls(
+            gain=float(b / (1 - a)),
+            time_constant=float(-dt / math.log(a)),
+            dead_time=delay * dt,
+            bias=float(c / (1 - a)),
+            dt=dt,
+        )
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "gain": self.gain,
+            "time_constant": self.time_constant,
+            "dead_time": self.dead_time,
+            "bias": self.bias,
+            "dt": self.dt,
+        }
+
+
+def performance_metrics(
+    time: FloatArray, measured: FloatArray, setpoint: FloatArray | float
+) -> dict[str, FloatArray]:
+    """Return IAE, ISE, overshoot (%) and settling time per row of ``measured``.
+
+    ``measured`` has shape (samples,) or (candidates, samples). Overshoot and
+    settling time refer to the step from the first measured value to the
+    final setpoint.
+    """
+    measured = np.atleast_2d(measured)
+    setpoint = np.broadcast_to(np.asarray(setpoint, dtype=np.float64), measured.shape)
+    error = setpoint - measured
+    dt = np.diff(time, prepend=time[0])
+    iae = np.sum(np.abs(error) * dt, axis=-1)
+    ise = np.sum(error**2 * dt, axis=-1)
+
+    target = setpoint[:, -1]
+    step = target - measured[:, 0]
+    direction = np.where(step >= 0, 1.0, -1.0)
+    excursion = np.max((measured - target[:, None]) * direction[:, None], axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        overshoot = np.where(
+            step != 0, np.maximum(excursion, 0.0) / np.abs(step) * 100.0, 0.0
+        )
+
+    band = np.maximum(np.abs(step) * SETTLING_BAND, 1e-9)
+    outside = np.abs(measured - target[:, None]) > band[:, None]
+    # index of the last sample outside the band, -1 when always inside
+    last_outside = np.where(
+        outside.any(axis=-1),
+        outside.shape[-1] - 1 - np.argmax(outside[:, ::-1], axis=-1),
+        -1,
+    )
+    settled = last_outside < outside.shape[-1] - 1
+    settle_index = np.minimum(last_outside + 1, len(time) - 1)
+    settling_time = np.where(settled, time[settle_index] - time[0], np.inf)
+    return {
+        "iae": iae,
+        "ise": ise,
+        "overshoot": overshoot,
+        "settling_time": settling_time,
+    }
+
+
+def _engine_for(
+    tunings: FloatArray,
+    setpoint: float,
+    output_limits: tuple[float | None, float | None],
+    proportional_on_measurement: bool,
+    start_output: float,
+) -> tuple[BatchPIDEngine, NDArray[np.intp]]:
+    engine = BatchPIDEngine(capacity=len(tunings))
+    slots = np.array(
+        [
+            engine.add(
+                kp,
+                ki,
+                kd,
+                setpoint=setpoint,
+                output_limits=output_limits,
+                proportional_on_measurement=proportional_on_measurement,
+                starting_output=start_output,
+            )
+            for kp, ki, kd in tunings
+        ],
+        dtype=np.intp,
+    )
+    return engine, slots
+
+
+@dataclass(slots=True)
+class SimulationResult:
+    """Outputs, terms and metrics for every candidate tuning."""
+
+    tunings: FloatArray
+    time: FloatArray
+    measured: FloatArray
+    output: FloatArray
+    p: FloatArray
+    i: FloatArray
+    d: FloatArray
+    metrics: dict[str, FloatArray]
+
+    def summary(self, index: int = 0) -> dict[str, Any]:
+        """Return the tunings, metrics and output statistics of one candidate.
+
+        ``output_travel`` is the summed absolute change of the output, a
+        measure of actuator wear.
+        """
+        kp, ki, kd = (float(v) for v in self.tunings[index])
+        output = self.output[index]
+        return {
+            "kp": kp,
+            "ki": ki,
+            "kd": kd,
+            **{name: float(values[index]) for name, values in self.metrics.items()},
+            "output_mean": float(np.nanmean(output)),
+            "output_travel": float(np.nansum(np.abs(np.diff(output)))),
+        }
+
+
+def replay(
+    trace: Trace,
+    tunings: ArrayLike,
+    output_limits: tuple[float | None, float | None] = (None, None),
+    proportional_on_measurement: bool = False,
+    start_output: float = 0.0,
+) -> SimulationResult:
+    """Feed the recorded inputs and setpoints through candidate tunings.
+
+    The inputs are not affected by the new outputs, so the metrics describe
+    the recorded process; compare the outputs and terms between tunings.
+    """
+    tunings = np.atleast_2d(np.asarray(tunings, dtype=np.float64))
+    engine, slots = _engine_for(
+        tunings,
+        float(trace.setpoint[0]),
+        output_limits,
+        proportional_on_measurement,
+        start_output,
+    )
+    shape = (len(tunings), len(trace))
+    output, p, i, d = (np.empty(shape) for _ in range(4))
+    inputs = np.empty(len(tunings))
+    for k, (value, setpoint, dt) in enumerate(
+        zip(trace.input, trace.setpoint, trace.dt)
+    ):
+        engine.setpoint[slots] = setpoint
+        inputs.fill(value)
+        output[:, k] = engine.step(slots, inputs, dt=dt)
+        p[:, k] = engine.proportional[slots]
+        i[:, k] = engine.integral[slots]
+        d[:, k] = engine.derivative[slots]
+    measured = np.broadcast_to(trace.input, shape)
+    return SimulationResult(
+        tunings,
+        trace.timestamp - trace.timestamp[0],
+        measured,
+        output,
+        p,
+        i,
+        d,
+        performance_metrics(trace.timestamp, measured, trace.setpoint),
+    )
+
+
+def simulate(
+    model: FOPDTModel,
+    tunings: ArrayLike,
+    setpoint: float,
+    duration: float,
+    initial: float | None = None,
+    output_limits: tuple[float | None, float | None] = (None, None),
+    proportional_on_measurement: bool = False,
+    start_output: float | None = None,
+) -> SimulationResult:
+    """Simulate the closed loop of the model with every candidate tuning at once.
+
+    The process starts in steady state at ``initial`` (the model bias by
+    default) and the setpoint steps to ``setpoint`` at time zero.
+    """
+    tunings = np.atleast_2d(np.asarray(tunings, dtype=np.float64))
+    count = len(tunings)
+    steps = max(int(duration / model.dt), 2)
+    y0 = model.bias if initial is None else initial
+    # the output that holds the process at y0
+    u0 = (y0 - model.bias) / model.gain if model.gain else 0.0
+    if start_output is None:
+        start_output = u0
+    engine, slots = _engine_for(
+        tunings, setpoint, output_limits, proportional_on_measurement, start_output
+    )
+
+    a = math.exp(-model.dt / model.time_constant)
+    delay = model.delay_steps
+    pending = np.full((count, delay + 1), u0)
+    y = np.full(count, float(y0))
+    shape = (count, steps)
+    measured, output, p, i, d = (np.empty(shape) for _ in range(5))
+    for k in range(steps):
+        measured[:, k] = y
+        u = engine.step(slots, y, dt=model.dt)
+        output[:, k] = u
+        p[:, k] = engine.proportional[slots]
+        i[:, k] = engine.integral[slots]
+        d[:, k] = engine.derivative[slots]
+        pending = np.roll(pending, -1, axis=1)
+        pending[:, -1] = u
+        y = a * y + (1 - a) * (model.bias + model.gain * pending[:, 0])
+
+    time = np.arange(steps) * model.dt
+    return SimulationResult(
+        tunings,
+        time,
+        measured,
+        output,
+        p,
+        i,
+        d,
+        performance_metrics(time, measured, setpoint),
+    )
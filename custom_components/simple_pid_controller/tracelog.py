@@ -0,0 +1,277 @@
+"""Append-only binary trace of PID steps."""
+
+from __future__ import annotations
+
+import asyncio
+from itertools import pairwise
+import logging
+import mmap
+import os
+from pathlib import Path
+import struct
+from typing import Any, Self
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+import numpy as np
+
+_LOGGER = logging.getLogger(__name__)
+
+TRACE_MAGIC = b"PIDTRACE"
+TRACE_VERSION = 1
+TRACE_FIELDS = ("timestamp", "input", "setpoint", "output", "p", "i", "d", "dt")
+
+# magic, format version, record size
+_HEADER = struct.Struct("<8sII")
+_RECORD = struct.Struct("<" + "d" * len(TRACE_FIELDS))
+HEADER_SIZE = _HEADER.size
+RECORD_SIZE = _RECORD.size
+RECORD_DTYPE = np.dtype([(field, "<f8") for field in TRACE_FIELDS])
+
+# records are written in chunks, or after FLUSH_INTERVAL when fewer arrived
+CHUNK_RECORDS = 256
+FLUSH_INTERVAL = 30.0
+TRACE_BACKUPS = 2
+
+_NAN = float("nan")
+
+
+def rotated_paths(path: Path, backups: int = TRACE_BACKUPS) -> list[Path]:
+    """Return the trace file and its rotated backups, oldest first."""
+    return [
+        *(path.with_name(f"{path.name}.{n}") for n in range(backups, 0, -1)),
+        path,
+    ]
+
+
+def remove_trace(path: Path, backups: int = TRACE_BACKUPS) -> None:
+    """Delete the trace file and its rotated backups."""
+    for file_path in rotated_paths(path, backups):
+        file_path.unlink(missing_ok=True)
+
+
+class TraceWriter:
+    """Buffer PID steps and append them to a trace file in the executor.
+
+    The file starts with a small header followed by fixed size records of
+    little endian doubles. When a chunk would make the file larger than
+    ``max_bytes`` it is rotated to ``<name>.1`` and older backups shift up.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        path: Path,
+        max_bytes: int,
+        backups: int = TRACE_BACKUPS,
+    ) -> None:
+        self.hass = hass
+        self.path = path
+        self.max_bytes = max(max_bytes, HEADER_SIZE + RECORD_SIZE * CHUNK_RECORDS)
+        self.backups = backups
+        self._buffer = bytearray()
+        # held by every write, so they never overlap and stay in order
+        self._write_lock = asyncio.Lock()
+        self._write_task: asyncio.Task[None] | None = None
+        self._unsub_flush: CALLBACK_TYPE | None = None
+        self.records_written = 0
+        self.rotations = 0
+
+    @callback
+    def append(self, *values: float | None) -> None:
+        """Buffer one step, given in the order of ``TRACE_FIELDS``."""
+        self._buffer += _RECORD.pack(*(_NAN if v is None else v for v in values))
+        if len(self._buffer) >= RECORD_SIZE * CHUNK_RECORDS:
+            self._async_flush()
+        elif self._unsub_flush is None:
+            self._unsub_flush = async_call_later(
+                self.hass, FLUSH_INTERVAL, self._async_flush_later
+            )
+
+    @callback
+    def _async_flush_later(self, _now: Any) -> None:
+        self._unsub_flush = None
+        self._async_flush()
+
+    @callback
+    def _async_flush(self) -> None:
+        """Write the buffered records in the background, one task at a time."""
+        if self._write_task is not None or not self._buffer:
+            return
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        self._write_task = self.hass.async_create_background_task(
+            self._async_write(), name=f"trace {self.path.name}"
+        )
+
+    async def _async_write(self) -> None:
+        try:
+            await self._async_write_buffer()
+        except OSError as err:
+            _LOGGER.warning("Unable to write PID trace %s: %s", self.path, err)
+        finally:
+            self._write_task = None
+        if len(self._buffer) >= RECORD_SIZE * CHUNK_RECORDS:
+            self._async_flush()
+
+    async def _async_write_buffer(self) -> None:
+        """Hand the buffered records to the executor once the file is free.
+
+        The buffer is taken while holding the lock, so records that arrive
+        during a write follow it in the file.
+        """
+        async with self._write_lock:
+            if not self._buffer:
+                return
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            await self.hass.async_add_executor_job(self._write, data)
+
+    def _write(self, data: bytes) -> None:
+        """Append records to the file, rotating it first when it would be too big."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size and size + len(data) > self.max_bytes:
+            self._rotate()
+            size = 0
+        with self.path.open("ab") as file:
+            if size == 0:
+                file.write(_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, RECORD_SIZE))
+            file.write(data)
+        self.records_written += len(data) // RECORD_SIZE
+
+    def _rotate(self) -> None:
+        paths = rotated_paths(self.path, self.backups)
+        if self.backups == 0:
+            self.path.unlink(missing_ok=True)
+        else:
+            for older, newer in pairwise(paths):
+                if newer.exists():
+                    os.replace(newer, older)
+        self.rotations += 1
+
+    async def async_flush(self) -> None:
+        """Write all buffered records and wait for it."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        await self._async_write_buffer()
+
+    async def async_close(self) -> None:
+        """Flush the remaining records when the entry unloads."""
+        try:
+            await self.async_flush()
+        except OSError as err:
+            _LOGGER.warning("Unable to write PID trace %s: %s", self.path, err)
+
+    def stats(self) -> dict[str, Any]:
+        """Return writer statistics."""
+        return {
+            "path": str(self.path),
+            "max_bytes": self.max_bytes,
+            "records_written": self.records_written,
+            "records_buffered": len(self._buffer) // RECORD_SIZE,
+            "rotations": self.rotations,
+        }
+
+
+class TraceReader:
+    """Memory-mapped, read-only view of a trace file.
+
+    ``records`` is a NumPy structured array backed by the mapping, so scanning
+    a column only pages in the data that is touched.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file = path.open("rb")
+        try:
+            header = self._file.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE:
+                raise ValueError(f"{path} is not a PID trace")
+            magic, version, record_size = _HEADER.unpack(header)
+            if magic != TRACE_MAGIC or record_size != RECORD_SIZE:
+                raise ValueError(f"{path} is not a PID trace")
+            if version != TRACE_VERSION:
+                raise ValueError(f"Unsupported trace version {version}")
+            size = os.fstat(self._file.fileno()).st_size
+            count = (size - HEADER_SIZE) // RECORD_SIZE
+            self._mmap: mmap.mmap | None = None
+            if count:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.records = np.frombuffer(
+                    self._mmap, dtype=RECORD_DTYPE, count=count, offset=HEADER_SIZE
+                )
+            else:
+                self.records = np.empty(0, dtype=RECORD_DTYPE)
+        except BaseException:
+            self._file.close()
+            raise
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def close(self) -> None:
+        """Release the mapping and the file."""
+        self.records = np.empty(0, dtype=RECORD_DTYPE)
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # views handed out are still alive; the mapping is released
+                # when they are garbage collected
+                pass
+            self._mmap = None
+        self._file.close()
+
+    def between(self, start: float | None = None, end: float | None = None) -> Any:
+        """Return the records with start <= timestamp < end, as a view.
+
+        The timestamps are searched with bisection, so they are assumed to be
+        in write order.
+        """
+        timestamps = self.records["timestamp"]
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, "left"))
+        hi = (
+            len(timestamps)
+            if end is None
+            else int(np.searchsorted(timestamps, end, "left"))
+        )
+        return self.records[lo:hi]
+
+
+def trace_summary(path: Path, last: int = 100) -> dict[str, Any]:
+    """Summarize the trace files of a controller and return its newest records."""
+    files = []
+    tail: list[dict[str, float | None]] = []
+    for file_path in rotated_paths(path):
+        if not file_path.exists():
+            continue
+        with TraceReader(file_path) as reader:
+            records = reader.records
+            files.append(
+                {
+                    "path": str(file_path),
+                    "records": len(records),
+                    "first": float(records["timestamp"][0]) if len(records) else None,
+                    "last": float(records["timestamp"][-1]) if len(records) else None,
+                }
+            )
+            tail.extend(
+                {
+                    field: None if np.isnan(value) else float(value)
+                    for field, value in zip(TRACE_FIELDS, record)
+                }
+                for record in records[-last:].tolist()
+            )
+    return {"files": files, "last_records": tail[-last:]}
@@ -3,6 +3,11 @@ from pytest_homeassistant_custom_component.common import MockConfigEntry
 from homeassistant.helpers.device_registry import DeviceRegistry
 from custom_components.simple_pid_controller.const import DOMAIN, CONF_SENSOR_ENTITY_ID
 import custom_components.simple_pid_controller.sensor as sensor_mod
+from custom_components.simple_pid_controller.history import HISTORY_FIELDS
+from custom_components.simple_pid_controller.pid import PIDResult, PIDState
+from custom_components.simple_pid_controller.simulation import FOPDTModel, Trace
+import math
+import numpy as np
 
 from homeassistant.const import CONF_NAME
 
@@ -13,7 +18,14 @@ def dummy_pid_class():
 
     class DummyPID:
         def __init__(
-            self, kp=0, ki=0, kd=0, setpoint=0, sample_time=None, auto_mode=False
+            self,
+            kp=0,
+            ki=0,
+            kd=0,
+            setpoint=0,
+            sample_time=None,
+            auto_mode=False,
+            engine=None,
         ):
             self.Kp = kp
             self.Ki = ki
@@ -26,12 +38,46 @@ def dummy_pid_class():
             self.output_limits = (123, 456)
             self._output = 42.0
             self.components = (1.0, 2.0, 3.0)
+            self.slot = 0
 
         def set_auto_mode(self, enabled, last_output=None):
             self.auto_mode = enabled
             if last_output is not None:
                 self._output = last_output
 
+        def configure(
+            self,
+            tunings,
+            setpoint,
+            output_limits,
+            auto_mode,
+            proportional_on_measurement,
+            last_output=None,
+        ):
+            self.tunings = tunings
+            self.setpoint = setpoint
+            self.output_limits = output_limits
+            if auto_mode and not self.auto_mode:
+                self.set_auto_mode(True, last_output)
+            else:
+                self.auto_mode = auto_mode
+            self.proportional_on_measurement = proportional_on_measurement
+            return True
+
+        def step(self, input_value):
+            return PIDResult(self._output, *self.components)
+
+        async def async_step(self, input_value):
+            return self.step(input_value)
+
+        @property
+        def state(self):
+            return PIDState(self.components[1], None, self._output, self.auto_mode)
+
+        def restore(self, state, dt=None):
+            self._output = state.last_output
+            self.auto_mode = state.auto_mode
+
         def __call__(self, input_value):
             return self._output
 
@@ -91,3 +137,46 @@ async def sensor_entities(hass, config_entry):
     # wait till all items are created
     await hass.async_block_till_done()
     return created
+
+
+@pytest.fixture
+def process_model():
+    return FOPDTModel(gain=2.0, time_constant=30.0, dead_time=10.0, bias=15.0, dt=5.0)
+
+
+@pytest.fixture
+def open_loop_trace(process_model):
+    """Drive the process model with a pseudo random output and record it."""
+    model = process_model
+    samples = 200
+    rng = np.random.default_rng(1)
+    output = np.repeat(rng.uniform(0, 10, samples // 10), 10)
+    a = math.exp(-model.dt / model.time_constant)
+    y = np.empty(samples)
+    y[0] = model.bias
+    for k in range(samples - 1):
+        u = output[k - model.delay_steps] if k >= model.delay_steps else 0.0
+        y[k + 1] = a * y[k] + (1 - a) * (model.bias + model.gain * u)
+    return Trace(
+        timestamp=1000.0 + np.arange(samples) * model.dt,
+        input=y,
+        setpoint=np.full(samples, 20.0),
+        output=output,
+    )
+
+
+@pytest.fixture
+def recorded_history(setup_integration, config_entry, open_loop_trace):
+    """Fill the history of the loaded controller with the open loop trace."""
+    history = config_entry.runtime_data.handle.history
+    trace = open_loop_trace
+    for k in range(len(trace)):
+        values = dict.fromkeys(HISTORY_FIELDS)
+        values.update(
+            timestamp=trace.timestamp[k],
+            input=trace.input[k],
+            output=trace.output[k],
+            setpoint=trace.setpoint[k],
+        )
+        history.append(*(values[field] for field in HISTORY_FIELDS))
+    return history
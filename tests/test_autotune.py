@@ -0,0 +1,204 @@
+import math
+
+from homeassistant.exceptions import HomeAssistantError
+import numpy as np
+import pytest
+
+from custom_components.simple_pid_controller import PIDParameters
+from custom_components.simple_pid_controller.autotune import (
+    AUTOTUNE_DONE,
+    AUTOTUNE_FAILED,
+    AUTOTUNE_RUNNING,
+    AUTOTUNE_TYREUS_LUYBEN,
+    AUTOTUNE_ZIEGLER_NICHOLS,
+    AutotuneResult,
+    RelayAutotuner,
+)
+from custom_components.simple_pid_controller.simulation import simulate
+
+
+def run_relay(model, tuner, steps=2000):
+    """Close the loop of the process model over the relay."""
+    a = math.exp(-model.dt / model.time_constant)
+    pending = [0.0] * (model.delay_steps + 1)
+    y = model.bias
+    for k in range(steps):
+        u = tuner.step(y, k * model.dt)
+        if tuner.state != AUTOTUNE_RUNNING:
+            return k
+        pending = pending[1:] + [u]
+        y = a * y + (1 - a) * (model.bias + model.gain * pending[0])
+    return steps
+
+
+def test_relay_finds_ultimate_gain_and_period(process_model):
+    tuner = RelayAutotuner(
+        AUTOTUNE_ZIEGLER_NICHOLS, 25.0, 0.0, 10.0, hysteresis=0.1, now=0.0
+    )
+    run_relay(process_model, tuner)
+
+    assert tuner.state == AUTOTUNE_DONE
+    result = tuner.result
+    # a relay test on a first order process with dead time oscillates with
+    # a period of a few dead times
+    assert 2 * process_model.dead_time < result.ultimate_period < 60
+    assert result.ultimate_gain > 0
+    assert tuner.stats()["cycles"] >= 4
+
+    # both proposals give a settling closed loop on the process
+    for rule in (AUTOTUNE_ZIEGLER_NICHOLS, AUTOTUNE_TYREUS_LUYBEN):
+        check = simulate(process_model, [result.gains(rule)], 25.0, 1500, 15.0)
+        assert np.isfinite(check.metrics["settling_time"][0])
+
+
+def test_relay_reverse_acting(process_model):
+    reverse = type(process_model)(
+        gain=-process_model.gain,
+        time_constant=process_model.time_constant,
+        dead_time=process_model.dead_time,
+        bias=15.0,
+        dt=process_model.dt,
+    )
+    tuner = RelayAutotuner(
+        AUTOTUNE_TYREUS_LUYBEN, 5.0, 0.0, 10.0, 0.1, now=0.0, reverse=True
+    )
+    run_relay(reverse, tuner)
+    assert tuner.state == AUTOTUNE_DONE
+    assert all(gain < 0 for gain in tuner.result.gains(AUTOTUNE_TYREUS_LUYBEN))
+
+
+def test_relay_times_out_without_oscillation():
+    tuner = RelayAutotuner(AUTOTUNE_ZIEGLER_NICHOLS, 25.0, 0.0, 10.0, 0.1, now=0.0)
+    assert tuner.step(20.0, 1.0) == 10.0
+    tuner.step(20.0, 5 * 3600.0)
+    assert tuner.state == AUTOTUNE_FAILED
+
+
+def test_tuning_rules():
+    result = AutotuneResult(ultimate_gain=2.0, ultimate_period=40.0, amplitude=1.0)
+    assert result.gains(AUTOTUNE_ZIEGLER_NICHOLS) == pytest.approx((1.2, 0.06, 6.0))
+    kp, ki, kd = result.gains(AUTOTUNE_TYREUS_LUYBEN)
+    assert kp == pytest.approx(2.0 / 2.2)
+    assert ki == pytest.approx(kp / 88.0)
+    assert kd == pytest.approx(kp * 40.0 / 6.3)
+    with pytest.raises(ValueError):
+        result.gains("Cohen-Coon")
+
+
+@pytest.mark.usefixtures("setup_integration")
+async def test_autotune_select_drives_output_and_applies_gains(
+    hass, config_entry, process_model, monkeypatch
+):
+    handle = config_entry.runtime_data.handle
+    coordinator = config_entry.runtime_data.coordinator
+    handle.params = PIDParameters(
+        kp=1.0,
+        ki=0.1,
+        kd=0.0,
+        setpoint=25.0,
+        sample_time=5.0,
+        output_min=0.0,
+        output_max=10.0,
+    )
+    select_id = f"select.{config_entry.entry_id.lower()}_autotune"
+
+    with pytest.raises(HomeAssistantError):
+        handle.params.setpoint = None
+        await hass.services.async_call(
+            "select",
+            "select_option",
+            {"entity_id": select_id, "option": AUTOTUNE_ZIEGLER_NICHOLS},
+            blocking=True,
+        )
+    handle.params.setpoint = 25.0
+
+    await hass.services.async_call(
+        "select",
+        "select_option",
+        {"entity_id": select_id, "option": AUTOTUNE_ZIEGLER_NICHOLS},
+        blocking=True,
+    )
+    assert hass.states.get(select_id).state == AUTOTUNE_ZIEGLER_NICHOLS
+
+    # feed the relay output through the process model, one step per refresh
+    model = process_model
+    a = math.exp(-model.dt / model.time_constant)
+    pending = [0.0] * (model.delay_steps + 1)
+    clock = iter(np.arange(0.0, 10000.0, model.dt))
+    monkeypatch.setattr(
+        "custom_components.simple_pid_controller.sensor.perf_counter",
+        lambda: next(clock),
+    )
+    y = model.bias
+    tuner = handle.autotuner
+    tuner.started = 0.0
+    for _ in range(500):
+        handle.get_input_sensor_value = lambda value=y: value
+        await coordinator.async_refresh()
+        if handle.autotuner is None:
+            break
+        pending = pending[1:] + [coordinator.data]
+        y = a * y + (1 - a) * (model.bias + model.gain * pending[0])
+    await hass.async_block_till_done()
+
+    assert tuner.state == AUTOTUNE_DONE
+    state = hass.states.get(select_id)
+    assert state.state == "Off"
+    assert "ultimate_gain" in state.attributes["result"]
+    kp, ki, kd = tuner.result.gains(AUTOTUNE_ZIEGLER_NICHOLS)
+    assert handle.params.kp == round(kp, 4)
+    assert handle.params.ki == round(ki, 4)
+    assert handle.params.kd == round(kd, 4)
+    assert handle.pid.auto_mode
+
+
+@pytest.mark.usefixtures("setup_integration")
+async def test_autotune_requires_and_keeps_auto_mode(hass, config_entry):
+    handle = config_entry.runtime_data.handle
+    coordinator = config_entry.runtime_data.coordinator
+    handle.params = PIDParameters(
+        kp=1.0,
+        ki=0.1,
+        kd=0.0,
+        setpoint=30.0,
+        sample_time=5.0,
+        output_min=0.0,
+        output_max=10.0,
+        auto_mode=False,
+    )
+    with pytest.raises(HomeAssistantError):
+        handle.start_autotune(AUTOTUNE_ZIEGLER_NICHOLS)
+
+    handle.params.auto_mode = True
+    handle.params.output_max = 0.0
+    with pytest.raises(HomeAssistantError) as err:
+        handle.start_autotune(AUTOTUNE_ZIEGLER_NICHOLS)
+    assert err.value.translation_key == "autotune_output_limits"
+    assert handle.autotuner is None
+
+    handle.params.output_max = 10.0
+    handle.start_autotune(AUTOTUNE_ZIEGLER_NICHOLS)
+    await coordinator.async_refresh()
+    # the input is below the setpoint, so the relay is high
+    assert coordinator.data == 10.0
+
+    # switching to manual aborts the experiment instead of driving the output
+    handle.params.auto_mode = False
+    await coordinator.async_refresh()
+    assert handle.autotuner is None
+    assert handle.last_step.p is not None
+
+
+@pytest.mark.usefixtures("setup_integration")
+async def test_autotune_gains_are_limited_to_the_number_range(hass, config_entry):
+    handle = config_entry.runtime_data.handle
+    tuner = RelayAutotuner(AUTOTUNE_ZIEGLER_NICHOLS, 30.0, 0.0, 10.0, 0.1, now=0.0)
+    tuner.result = AutotuneResult(
+        ultimate_gain=5000.0, ultimate_period=0.001, amplitude=1.0
+    )
+    await handle.async_apply_autotune(tuner, 5.0)
+    await hass.async_block_till_done()
+
+    assert handle.params.kp == 1000.0
+    assert handle.params.ki == 1000.0
+    assert handle.params.kd == round(tuner.result.gains(AUTOTUNE_ZIEGLER_NICHOLS)[2], 4)
@@ -0,0 +1,187 @@
+"""Benchmarks of the control loop hot path.
+
+Skipped by default. Run them with::
+
+    PID_BENCHMARK=1 pytest tests/test_benchmark.py --no-cov -p no:cacheprovider
+
+The results are written as JSON to ``PID_BENCHMARK_OUTPUT`` (default
+``benchmark-results.json``) so they can be compared across releases.
+``PID_BENCHMARK_SIZES`` sets the numbers of config entries (default
+``1,10,100,1000``).
+"""
+
+import gc
+import json
+import os
+from pathlib import Path
+import platform
+import statistics
+from time import perf_counter_ns
+import tracemalloc
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.simple_pid_controller.const import (
+    CONF_NAME,
+    CONF_SENSOR_ENTITY_ID,
+    DOMAIN,
+)
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("PID_BENCHMARK"), reason="set PID_BENCHMARK=1 to run"
+)
+
+SIZES = [
+    int(size)
+    for size in os.environ.get("PID_BENCHMARK_SIZES", "1,10,100,1000").split(",")
+]
+LATENCY_TICKS = 2000
+LOOP_TICKS = 20
+INPUT_EVENTS = 20
+
+RESULTS: dict = {}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def write_results():
+    """Write the collected results once all benchmarks have run."""
+    yield
+    if not RESULTS:
+        return
+    manifest = json.loads(
+        Path("custom_components/simple_pid_controller/manifest.json").read_text()
+    )
+    output = Path(os.environ.get("PID_BENCHMARK_OUTPUT", "benchmark-results.json"))
+    output.write_text(
+        json.dumps(
+            {
+                "version": manifest["version"],
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": RESULTS,
+            },
+            indent=2,
+        )
+    )
+
+
+def summarize(samples_ns: list[int]) -> dict[str, float]:
+    """Return latency statistics in microseconds."""
+    samples = sorted(samples_ns)
+    return {
+        "mean_us": statistics.fmean(samples) / 1000,
+        "median_us": statistics.median(samples) / 1000,
+        "p95_us": samples[int(len(samples) * 0.95) - 1] / 1000,
+        "max_us": samples[-1] / 1000,
+    }
+
+
+async def setup_entries(hass, count: int) -> list[MockConfigEntry]:
+    """Set up ``count`` controllers, each with its own input sensor."""
+    entries = []
+    for n in range(count):
+        input_sensor = f"sensor.bench_input_{n}"
+        hass.states.async_set(input_sensor, "20.0")
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            entry_id=f"bench{n}",
+            title=f"Bench {n}",
+            data={CONF_SENSOR_ENTITY_ID: input_sensor, CONF_NAME: f"bench{n}"},
+        )
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        entries.append(entry)
+    await hass.async_block_till_done()
+    return entries
+
+
+async def unload_entries(hass, entries: list[MockConfigEntry]) -> None:
+    for entry in entries:
+        await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_update_pid_latency(hass):
+    """Latency of one update_pid call."""
+    (entry,) = await setup_entries(hass, 1)
+    update = entry.runtime_data.coordinator.update_method
+
+    samples = []
+    for _ in range(LATENCY_TICKS):
+        start = perf_counter_ns()
+        await update()
+        samples.append(perf_counter_ns() - start)
+
+    RESULTS["update_pid_latency"] = {"ticks": LATENCY_TICKS, **summarize(samples)}
+    await unload_entries(hass, entries=[entry])
+
+
+@pytest.mark.parametrize("count", SIZES)
+async def test_ticks_per_second(hass, count):
+    """Throughput of full coordinator refreshes for ``count`` controllers."""
+    entries = await setup_entries(hass, count)
+    coordinators = [entry.runtime_data.coordinator for entry in entries]
+
+    start = perf_counter_ns()
+    for _ in range(LOOP_TICKS):
+        for coordinator in coordinators:
+            await coordinator.async_refresh()
+    elapsed = perf_counter_ns() - start
+
+    ticks = LOOP_TICKS * count
+    RESULTS.setdefault("ticks_per_second", {})[str(count)] = {
+        "ticks": ticks,
+        "ticks_per_second": ticks / (elapsed / 1e9),
+        "mean_tick_us": elapsed / ticks / 1000,
+    }
+    await unload_entries(hass, entries)
+
+
+@pytest.mark.parametrize("count", SIZES)
+async def test_state_change_listener_cost(hass, count):
+    """Event loop time spent on input state changes, against no controllers."""
+
+    async def storm() -> int:
+        start = perf_counter_ns()
+        for event in range(INPUT_EVENTS):
+            for n in range(count):
+                hass.states.async_set(f"sensor.bench_input_{n}", str(20 + event % 2))
+            await hass.async_block_till_done()
+        return perf_counter_ns() - start
+
+    for n in range(count):
+        hass.states.async_set(f"sensor.bench_input_{n}", "20.0")
+    baseline = await storm()
+
+    entries = await setup_entries(hass, count)
+    loaded = await storm()
+
+    events = INPUT_EVENTS * count
+    RESULTS.setdefault("state_change_listeners", {})[str(count)] = {
+        "events": events,
+        "baseline_us_per_event": baseline / events / 1000,
+        "loaded_us_per_event": loaded / events / 1000,
+        "listener_us_per_event": (loaded - baseline) / events / 1000,
+    }
+    await unload_entries(hass, entries)
+
+
+@pytest.mark.parametrize("count", SIZES)
+async def test_memory_per_controller(hass, count):
+    """Python heap allocated per controller, including its entities."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    entries = await setup_entries(hass, count)
+    for entry in entries:
+        await entry.runtime_data.coordinator.async_refresh()
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    RESULTS.setdefault("memory_per_controller", {})[str(count)] = {
+        "bytes": allocated / count
+    }
+    await unload_entries(hass, entries)
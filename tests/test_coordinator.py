@@ -1,5 +1,15 @@
 import pytest
+from datetime import timedelta
+from unittest.mock import AsyncMock
+from homeassistant.util.dt import utcnow
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
 from custom_components.simple_pid_controller.coordinator import PIDDataCoordinator
+from custom_components.simple_pid_controller.const import (
+    CONTROL_MODE_HYBRID,
+    CONTROL_MODE_ON_INPUT_CHANGE,
+    CONTROL_MODE_PERIODIC,
+    SCHEDULE_POLICY_CATCH_UP,
+)
 from homeassistant.helpers.update_coordinator import UpdateFailed
 
 
@@ -24,3 +34,235 @@ async def test_async_update_data_failure(hass):
     with pytest.raises(UpdateFailed) as excinfo:
         await coordinator._async_update_data()
     assert "PID update failed: test error" in str(excinfo.value)
+
+
+@pytest.mark.parametrize(
+    "control_mode, expected",
+    [
+        (CONTROL_MODE_PERIODIC, timedelta(seconds=5)),
+        (CONTROL_MODE_HYBRID, timedelta(seconds=30)),
+        (CONTROL_MODE_ON_INPUT_CHANGE, None),
+    ],
+)
+async def test_set_sample_time_per_control_mode(hass, control_mode, expected):
+    """The polling interval follows the sample time only in periodic mode."""
+    coordinator = PIDDataCoordinator(
+        hass, "test", None, interval=1, control_mode=control_mode, max_interval=30
+    )
+    coordinator.set_sample_time(5)
+    assert coordinator.update_interval == expected
+
+
+async def test_input_change_ignored_in_periodic_mode(hass, monkeypatch):
+    """Input changes do not trigger a step when polling periodically."""
+    coordinator = PIDDataCoordinator(hass, "test", None, interval=1)
+    refresh = AsyncMock()
+    monkeypatch.setattr(coordinator, "async_refresh", refresh)
+
+    coordinator.async_handle_input_change()
+    await hass.async_block_till_done()
+
+    assert refresh.await_count == 0
+
+
+async def test_input_change_steps_immediately_then_debounces(hass, monkeypatch):
+    """The first input change steps at once, a burst within min_interval once later."""
+    coordinator = PIDDataCoordinator(
+        hass,
+        "test",
+        None,
+        interval=1,
+        control_mode=CONTROL_MODE_ON_INPUT_CHANGE,
+        min_interval=2,
+    )
+    refresh = AsyncMock()
+    monkeypatch.setattr(coordinator, "async_refresh", refresh)
+
+    coordinator.async_handle_input_change()
+    await hass.async_block_till_done()
+    assert refresh.await_count == 1
+
+    # pretend that step just ran
+    coordinator._last_step = hass.loop.time()
+    coordinator.async_handle_input_change()
+    coordinator.async_handle_input_change()
+    await hass.async_block_till_done()
+    assert refresh.await_count == 1
+
+    async_fire_time_changed(hass, utcnow() + timedelta(seconds=3))
+    await hass.async_block_till_done()
+    assert refresh.await_count == 2
+
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.usefixtures("setup_integration")
+async def test_input_sensor_change_runs_pid_step(hass, config_entry, monkeypatch):
+    """A new input sample is forwarded to the coordinator of the entry."""
+    coordinator = config_entry.runtime_data.coordinator
+    called = []
+    monkeypatch.setattr(
+        coordinator, "async_handle_input_change", lambda: called.append(True)
+    )
+    # the subscription holds the bound method, so resubscribe with the patch
+    handle = config_entry.runtime_data.handle
+    handle._async_unsubscribe_input()
+    handle.async_subscribe_input(coordinator.async_handle_input_change)
+
+    hass.states.async_set("sensor.test_input", "unavailable")
+    await hass.async_block_till_done()
+    assert not called
+
+    hass.states.async_set("sensor.test_input", "26.0")
+    await hass.async_block_till_done()
+    assert called
+
+
+async def test_request_refresh_bursts_are_coalesced(hass):
+    """Four back-to-back requests run a single PID step after the window."""
+    steps = []
+
+    async def fake_update():
+        steps.append(True)
+        return 1.0
+
+    coordinator = PIDDataCoordinator(
+        hass, "test", fake_update, interval=1, coalesce_window=0.5
+    )
+    for _ in range(4):
+        await coordinator.async_request_refresh()
+    await hass.async_block_till_done()
+    assert not steps
+
+    async_fire_time_changed(hass, utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+
+    assert len(steps) == 1
+    assert coordinator.coalescing_stats() == {
+        "window": 0.5,
+        "requested": 4,
+        "executed": 1,
+    }
+    await coordinator.async_shutdown()
+
+
+async def test_tick_during_running_step_counts_overrun(hass, monkeypatch):
+    """With the skip policy a tick that overlaps a running step is dropped."""
+    coordinator = PIDDataCoordinator(hass, "test", None, interval=1)
+    handled = AsyncMock()
+    monkeypatch.setattr(coordinator, "_handle_refresh_interval", handled)
+    coordinator._schedule_refresh()
+    group = coordinator._tick_member.group
+
+    # the mocked step never reschedules, so it is still running at the next tick
+    group.timer._fire()
+    await hass.async_block_till_done()
+    assert handled.await_count == 1
+    group.timer._fire()
+    await hass.async_block_till_done()
+    assert coordinator.scheduler_stats()["overruns"] == 1
+    assert handled.await_count == 1
+
+    coordinator._schedule_refresh()
+    group.timer._fire()
+    await hass.async_block_till_done()
+    assert handled.await_count == 2
+    await coordinator.async_shutdown()
+
+
+async def test_catch_up_policy_runs_missed_tick_on_rearm(hass, monkeypatch):
+    """With the catch_up policy a missed tick runs as soon as the step finishes."""
+    coordinator = PIDDataCoordinator(
+        hass, "test", None, interval=1, schedule_policy=SCHEDULE_POLICY_CATCH_UP
+    )
+    handled = AsyncMock()
+    monkeypatch.setattr(coordinator, "_handle_refresh_interval", handled)
+    coordinator._schedule_refresh()
+    group = coordinator._tick_member.group
+
+    group.timer._fire()
+    await hass.async_block_till_done()
+    group.timer._fire()
+    coordinator._schedule_refresh()
+    await hass.async_block_till_done()
+
+    assert handled.await_count == 2
+    assert coordinator.scheduler_stats()["missed_ticks"] == 0
+    await coordinator.async_shutdown()
+
+
+async def test_input_step_overlapping_tick_is_not_missed(hass):
+    """A tick during an input triggered step is not caught up afterwards."""
+    steps = []
+
+    async def fake_update():
+        steps.append(True)
+        # the next tick of the group fires while this step runs
+        group.timer._fire()
+        return 1.0
+
+    coordinator = PIDDataCoordinator(
+        hass,
+        "test",
+        fake_update,
+        interval=1,
+        control_mode=CONTROL_MODE_HYBRID,
+        schedule_policy=SCHEDULE_POLICY_CATCH_UP,
+    )
+    unsub = coordinator.async_add_listener(lambda: None)
+    group = coordinator._tick_member.group
+
+    coordinator.async_handle_input_change()
+    await hass.async_block_till_done()
+
+    assert len(steps) == 1
+    stats = coordinator.scheduler_stats()
+    assert (stats["overruns"], stats["missed_ticks"]) == (0, 0)
+    unsub()
+    await coordinator.async_shutdown()
+
+
+async def test_retry_after_delays_the_next_step(hass):
+    """A failed update with retry_after waits that long before the next step."""
+    steps = []
+
+    async def failing_update():
+        steps.append(True)
+        raise UpdateFailed("busy", retry_after=30)
+
+    coordinator = PIDDataCoordinator(hass, "test", failing_update, interval=1)
+    unsub = coordinator.async_add_listener(lambda: None)
+    await coordinator.async_refresh()
+    assert len(steps) == 1
+    assert coordinator.scheduler_stats()["period"] is None
+
+    async_fire_time_changed(hass, utcnow() + timedelta(seconds=5))
+    await hass.async_block_till_done()
+    assert len(steps) == 1
+
+    async_fire_time_changed(hass, utcnow() + timedelta(seconds=32))
+    await hass.async_block_till_done()
+    assert len(steps) == 2
+    unsub()
+    await coordinator.async_shutdown()
+
+
+async def test_tick_step_serves_pending_requests(hass, monkeypatch):
+    """A step that runs within the window drops the coalesced request."""
+    steps = []
+
+    async def fake_update():
+        steps.append(True)
+        return 1.0
+
+    coordinator = PIDDataCoordinator(
+        hass, "test", fake_update, interval=1, coalesce_window=0.5
+    )
+    await coordinator.async_request_refresh()
+    await coordinator.async_refresh()
+    async_fire_time_changed(hass, utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+
+    assert len(steps) == 1
+    assert coordinator.coalescing_stats()["executed"] == 0
+    await coordinator.async_shutdown()
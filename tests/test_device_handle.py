@@ -15,133 +15,82 @@ class DummyRegistry:
         return None
 
 
-@pytest.mark.parametrize(
-    "state_value, expected",
-    [
-        ("12.34", 12.34),  # valid number
-        ("abc", None),  # no number → exception
-        ("unknown", None),  # unknown → skip
-        ("unavailable", None),  # unavailable → skip
-    ],
-)
-def test_get_number_various_states(
-    monkeypatch, hass, config_entry, state_value, expected
-):
-    """Cover lines 45–54 of get_number."""
-    # 1) Stel een fake entity in de state machine
-    fake_eid = "number.pid_entry_test"
-    hass.states.async_set(fake_eid, state_value)
-
-    # 2) Mock de registry so _get_entity_id gives fake_eid
-    monkeypatch.setattr(er, "async_get", lambda hass_: DummyRegistry(fake_eid))
-
-    # 3) Create handle and call get_number
+def test_get_input_sensor_value_invalid(hass, config_entry):
+    """Cover the ValueError branch in get_input_sensor_value (lines 73–77)."""
     handle = PIDDeviceHandle(hass, config_entry)
-    result = handle.get_number("test")
+    # Set the sensor_entity_id
+    handle.sensor_entity_id = "sensor.pid_entry_test"
 
-    assert result == expected
+    # Provide a non-numeric value
+    hass.states.async_set(handle.sensor_entity_id, "not_a_number")
 
+    # Should handle gracefully and return None
+    assert handle.get_input_sensor_value() is None
 
-def test_get_number_no_entity(monkeypatch, hass, config_entry):
-    """If _get_entity_id is None, get_number should be None."""
-    # Mock registry zonder entity
-    monkeypatch.setattr(er, "async_get", lambda hass_: DummyRegistry(None))
 
-    handle = PIDDeviceHandle(hass, config_entry)
-    assert handle.get_number("anything") is None
+def test_get_entity_id_is_cached(monkeypatch, hass, config_entry):
+    """The registry is only queried on the first lookup of a key."""
+    lookups = []
+
+    class CountingRegistry:
+        def async_get_entity_id(self, platform, domain, unique_id):
+            lookups.append(unique_id)
+            return "number.pid_entry_kp"
 
+    monkeypatch.setattr(er, "async_get", lambda hass_: CountingRegistry())
 
-def test_get_switch_on_off(monkeypatch, hass, config_entry):
-    """Cover on/off in get_switch."""
-    fake_entity = "switch.pid_entry_test"
-    # Force _get_entity_id terug te geven
     handle = PIDDeviceHandle(hass, config_entry)
-    monkeypatch.setattr(handle, "_get_entity_id", lambda platform, key: fake_entity)
+    for _ in range(3):
+        assert handle._get_entity_id("number", "kp") == "number.pid_entry_kp"
 
-    # Eerst “on” → True
-    hass.states.async_set(fake_entity, "on")
-    assert handle.get_switch("any_key") is True
+    assert len(lookups) == 1
+    assert handle.entity_id_cache_stats() == {"size": 1, "hits": 2, "misses": 1}
 
-    # Dan “off” → False
-    hass.states.async_set(fake_entity, "off")
-    assert handle.get_switch("any_key") is False
 
+def test_missing_entity_id_is_not_cached(monkeypatch, hass, config_entry):
+    """A failed lookup is retried, so late-registered entities are found."""
+    registry = DummyRegistry(None)
+    monkeypatch.setattr(er, "async_get", lambda hass_: registry)
 
-def test_get_input_sensor_value_invalid(hass, config_entry):
-    """Cover the ValueError branch in get_input_sensor_value (lines 73–77)."""
     handle = PIDDeviceHandle(hass, config_entry)
-    # Set the sensor_entity_id
-    handle.sensor_entity_id = "sensor.pid_entry_test"
-
-    # Provide a non-numeric value
-    hass.states.async_set(handle.sensor_entity_id, "not_a_number")
+    assert handle._get_entity_id("number", "kp") is None
 
-    # Should handle gracefully and return None
-    assert handle.get_input_sensor_value() is None
+    registry._entity_id = "number.pid_entry_kp"
+    assert handle._get_entity_id("number", "kp") == "number.pid_entry_kp"
 
 
-@pytest.mark.parametrize("state", ["unknown", "unavailable"])
-async def test_get_switch_returns_true_when_state_unavailable(
-    hass, config_entry, state
-):
-    """Regel 79: get_switch returns True if state 'unknown' or 'unavailable'."""
-    fake_entity = f"switch.{config_entry.entry_id}_test_key"
-    handle = PIDDeviceHandle(hass, config_entry)
-    # Force existence of entity_id
-    handle._get_entity_id = lambda platform, key: fake_entity
-    # State to 'unknown' or 'unavailable'
-    hass.states.async_set(fake_entity, state)
-    assert handle.get_switch("test_key") is True
+@pytest.mark.usefixtures("setup_integration")
+async def test_entity_id_index_invalidated_on_rename(hass, config_entry):
+    """Renaming a parameter entity drops the stale id from the index."""
+    handle = config_entry.runtime_data.handle
+    old_id = f"number.{config_entry.entry_id.lower()}_kp"
+    assert handle._get_entity_id("number", "kp") == old_id
 
+    registry = er.async_get(hass)
+    registry.async_update_entity(old_id, new_entity_id="number.renamed_kp")
+    await hass.async_block_till_done()
 
-async def test_get_switch_returns_true_when_no_entity_configured(hass, config_entry):
-    """Regel 74: get_switch must return True if _get_entity_id None."""
-    handle = PIDDeviceHandle(hass, config_entry)
-    # Force no  entity_id
-    handle._get_entity_id = lambda platform, key: None
-    assert handle.get_switch("any_key") is True
-
-
-@pytest.mark.parametrize(
-    "state_value, expected",
-    [
-        ("Zero start", "Zero start"),  # valid select option
-        ("unknown", None),  # invalid
-        ("unavailable", None),  # invalid
-        (None, None),  # no state
-    ],
-)
-def test_get_select_various_states(
-    monkeypatch, hass, config_entry, state_value, expected
-):
-    """Test PIDDeviceHandle.get_select behavior for valid and invalid entity states."""
-
-    fake_eid = "select.pid_entry_start_mode"
-
-    # Inject fake state
-    if state_value is not None:
-        hass.states.async_set(fake_eid, state_value)
-
-    # Patch entity_registry.async_get(hass) → returns dummy registry object
-    class DummyRegistry:
-        def async_get_entity_id(self, platform, domain, unique_id):
-            if domain == DOMAIN and unique_id.endswith("start_mode"):
-                return fake_eid
-            return None
+    assert handle._get_entity_id("number", "kp") == "number.renamed_kp"
 
-    monkeypatch.setattr(er, "async_get", lambda hass: DummyRegistry())
 
-    handle = PIDDeviceHandle(hass, config_entry)
-    result = handle.get_select("start_mode")
+@pytest.mark.usefixtures("setup_integration")
+async def test_entity_id_index_kept_on_other_updates(hass, config_entry):
+    """A name or icon change keeps the index and the subscription."""
+    handle = config_entry.runtime_data.handle
+    entity_id = handle._get_entity_id("number", "kp")
+    unsub = handle._unsub_parameters
 
-    assert result == expected
+    registry = er.async_get(hass)
+    registry.async_update_entity(entity_id, name="Gain", icon="mdi:tune")
+    await hass.async_block_till_done()
 
+    assert handle._entity_id_index[("number", "kp")] == entity_id
+    assert handle._unsub_parameters is unsub
 
-def test_get_select_no_entity(monkeypatch, hass, config_entry):
-    """If _get_entity_id returns None, get_select should return None."""
-    # Patch de registry zo dat er geen entity_id wordt gevonden
-    monkeypatch.setattr(er, "async_get", lambda hass_: DummyRegistry(None))
 
-    handle = PIDDeviceHandle(hass, config_entry)
-    # Key mag willekeurig zijn, er is immers geen entity
-    assert handle.get_select("nonexistent_key") is None
+@pytest.mark.usefixtures("setup_integration")
+async def test_entity_ids_resolved_at_setup(hass, config_entry):
+    """All parameter entities are resolved once setup has finished."""
+    handle = config_entry.runtime_data.handle
+    stats = handle.entity_id_cache_stats()
+    assert stats["size"] == stats["misses"] == 12
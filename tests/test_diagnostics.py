@@ -2,6 +2,7 @@ import pytest
 from custom_components.simple_pid_controller.diagnostics import (
     async_get_config_entry_diagnostics,
 )
+from custom_components.simple_pid_controller.history import HISTORY_FIELDS
 from custom_components.simple_pid_controller.const import (
     DOMAIN,
     CONF_SENSOR_ENTITY_ID,
@@ -36,3 +37,8 @@ async def test_config_entry_diagnostics(hass, config_entry):
     assert data["input_range_max"] == DEFAULT_INPUT_RANGE_MAX
     assert data["output_range_min"] == DEFAULT_OUTPUT_RANGE_MIN
     assert data["output_range_max"] == DEFAULT_OUTPUT_RANGE_MAX
+    assert set(data["history"]) == set(HISTORY_FIELDS)
+    assert data["trace"] is None
+    assert data["entity_id_cache"]["size"] > 0
+    assert set(data["refresh_coalescing"]) == {"window", "requested", "executed"}
+    assert data["pid_engine"]["controllers"] == 1
@@ -0,0 +1,222 @@
+import asyncio
+import random
+
+from homeassistant.const import CONF_NAME
+import numpy as np
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from simple_pid import PID
+
+from custom_components.simple_pid_controller import PIDParameters
+from custom_components.simple_pid_controller.const import (
+    CONF_SENSOR_ENTITY_ID,
+    DOMAIN,
+)
+from custom_components.simple_pid_controller.engine import PID_ENGINE, BatchPIDEngine
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+CONFIGS = [
+    {},
+    {"kp": 2.0, "ki": 0.5, "kd": 0.1, "setpoint": 20.0},
+    {"kp": 1.5, "ki": 0.2, "kd": 0.3, "setpoint": 50.0, "limits": (0.0, 100.0)},
+    {"kp": 0.8, "ki": 0.05, "kd": 0.0, "setpoint": 21.0, "limits": (-5.0, 5.0)},
+    {"kp": 3.0, "ki": 1.0, "kd": 0.5, "setpoint": 10.0, "p_on_m": True},
+    {
+        "kp": 1.0,
+        "ki": 0.4,
+        "kd": 0.2,
+        "setpoint": 30.0,
+        "limits": (None, 40.0),
+        "starting_output": 60.0,
+    },
+    {"kp": 1.0, "ki": 0.1, "kd": 0.0, "setpoint": 5.0, "sample_time": 2.0},
+]
+
+
+def make_pair(clock, engine, config):
+    """Create a simple_pid controller and an engine slot with the same config."""
+    kwargs = {
+        "setpoint": config.get("setpoint", 0.0),
+        "sample_time": config.get("sample_time"),
+        "output_limits": config.get("limits", (None, None)),
+        "proportional_on_measurement": config.get("p_on_m", False),
+        "starting_output": config.get("starting_output", 0.0),
+    }
+    gains = (config.get("kp", 1.0), config.get("ki", 0.0), config.get("kd", 0.0))
+    pid = PID(*gains, time_fn=clock, **kwargs)
+    slot = engine.add(*gains, **kwargs)
+    return pid, slot
+
+
+def as_none(value):
+    return None if np.isnan(value) else value
+
+
+def test_batch_step_matches_simple_pid():
+    """Every controller of a batch follows simple_pid exactly."""
+    clock = FakeClock()
+    engine = BatchPIDEngine(capacity=2, time_fn=clock)
+    pairs = [make_pair(clock, engine, config) for config in CONFIGS]
+    slots = [slot for _, slot in pairs]
+    rng = random.Random(42)
+
+    for _ in range(200):
+        clock.now += rng.choice([0.0, 0.5, 1.0, 1.7, 3.0])
+        inputs = [rng.uniform(-20.0, 80.0) for _ in pairs]
+        outputs = engine.step(slots, inputs)
+        for (pid, slot), value, output in zip(pairs, inputs, outputs):
+            assert as_none(output) == pid(value)
+            assert engine.components(slot) == pid.components
+
+
+def test_explicit_dt_matches_simple_pid():
+    clock = FakeClock()
+    engine = BatchPIDEngine(time_fn=clock)
+    pid, slot = make_pair(clock, engine, CONFIGS[2])
+
+    for value, dt in ((45.0, 1.0), (47.5, 0.25), (52.0, 4.0)):
+        assert engine.step([slot], [value], dt=dt)[0] == pid(value, dt=dt)
+        assert engine.components(slot) == pid.components
+
+    with pytest.raises(ValueError):
+        engine.step([slot], [1.0], dt=0)
+
+
+def test_auto_mode_and_limits_match_simple_pid():
+    """Manual mode, bumpless re-enable and limit changes behave like simple_pid."""
+    clock = FakeClock()
+    engine = BatchPIDEngine(time_fn=clock)
+    pid, slot = make_pair(clock, engine, CONFIGS[1])
+
+    def step(value):
+        clock.now += 1.0
+        output = engine.step([slot], [value])[0]
+        assert as_none(output) == pid(value)
+        assert engine.components(slot) == pid.components
+
+    step(18.0)
+    pid.auto_mode = False
+    engine.set_auto_mode(slot, False)
+    step(19.0)
+
+    pid.set_auto_mode(True, 7.5)
+    engine.set_auto_mode(slot, True, 7.5)
+    step(19.5)
+
+    pid.output_limits = (-1.0, 1.0)
+    engine.set_output_limits(slot, (-1.0, 1.0))
+    step(25.0)
+
+    pid.tunings = (0.3, 0.1, 0.05)
+    engine.set_tunings(slot, 0.3, 0.1, 0.05)
+    step(21.0)
+
+    with pytest.raises(ValueError):
+        engine.set_output_limits(slot, (2.0, 1.0))
+
+
+def test_only_given_slots_are_stepped():
+    clock = FakeClock()
+    engine = BatchPIDEngine(time_fn=clock)
+    first = engine.add(1.0, 0.0, 0.0, setpoint=10.0)
+    second = engine.add(1.0, 0.0, 0.0, setpoint=10.0)
+
+    clock.now += 1.0
+    engine.step([second], [4.0])
+
+    assert np.isnan(engine.last_output[first])
+    assert engine.last_output[second] == 6.0
+
+
+def test_slots_are_reused_and_capacity_grows():
+    engine = BatchPIDEngine(capacity=1)
+    slots = [engine.add() for _ in range(5)]
+    assert len(engine) == 5
+    assert engine.capacity >= 5
+    assert sorted(slots) == list(range(5))
+
+    engine.remove(slots[1])
+    assert engine.add() == slots[1]
+    with pytest.raises(KeyError):
+        engine.remove(engine.capacity - 1)
+
+
+async def test_steps_requested_in_a_batch_run_together():
+    clock = FakeClock()
+    engine = BatchPIDEngine(time_fn=clock)
+    slots = [engine.add(1.0, 0.0, 0.0, setpoint=10.0) for _ in range(3)]
+    clock.now += 1.0
+    loop = asyncio.get_running_loop()
+
+    with engine.batch():
+        tasks = [
+            asyncio.Task(engine.async_step(slot, value), loop=loop, eager_start=True)
+            for slot, value in zip(slots, (4.0, 6.0, 8.0))
+        ]
+        assert not any(task.done() for task in tasks)
+    results = await asyncio.gather(*tasks)
+
+    assert [result[0] for result in results] == [6.0, 4.0, 2.0]
+    assert engine.stats() == {
+        "controllers": 3,
+        "batches": 1,
+        "batched_steps": 3,
+        "mean_batch_size": 3.0,
+    }
+
+    # outside a batch a step runs right away
+    assert (await engine.async_step(slots[0], 9.0))[0] == 1.0
+    assert engine.stats()["batches"] == 1
+
+
+async def test_scheduler_tick_steps_controllers_in_one_batch(hass, config_entry):
+    """Controllers woken by the same tick share one step of the engine."""
+    second = MockConfigEntry(
+        domain=DOMAIN,
+        entry_id="PID3",
+        title="Second PID Controller",
+        data={CONF_SENSOR_ENTITY_ID: "sensor.test_input", CONF_NAME: "PID3"},
+    )
+    second.add_to_hass(hass)
+    # setting up the integration loads both entries
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    for entry in (config_entry, second):
+        entry.runtime_data.handle.params = PIDParameters(
+            kp=1.0,
+            ki=0.0,
+            kd=0.0,
+            setpoint=30.0,
+            sample_time=5.0,
+            output_min=0.0,
+            output_max=100.0,
+            auto_mode=True,
+            windup_protection=True,
+            start_mode="Zero start",
+        )
+        await entry.runtime_data.coordinator.async_refresh()
+
+    engine = hass.data[PID_ENGINE]
+    batches = engine.batches
+    group = config_entry.runtime_data.coordinator._tick_member.group
+    assert second.runtime_data.coordinator._tick_member.group is group
+    group.timer._fire()
+    await hass.async_block_till_done()
+
+    assert engine.batches == batches + 1
+    assert engine.stats()["controllers"] == 2
+    for entry in (config_entry, second):
+        assert entry.runtime_data.handle.last_step.output == 5.0
+
+    for entry in (config_entry, second):
+        await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+    assert PID_ENGINE not in hass.data
@@ -0,0 +1,194 @@
+import csv
+import io
+import json
+
+from homeassistant.setup import async_setup_component
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.simple_pid_controller.const import (
+    CONF_NAME,
+    CONF_SENSOR_ENTITY_ID,
+    CONF_TRACE_ENABLED,
+    DOMAIN,
+)
+from custom_components.simple_pid_controller.export import (
+    EXPORT_URL,
+    async_iter_history,
+)
+from custom_components.simple_pid_controller.history import (
+    HISTORY_FIELDS,
+    HistoryBuffer,
+)
+
+
+def fill(history, count):
+    for n in range(count):
+        values = {field: float(n) for field in HISTORY_FIELDS}
+        values["timestamp"] = 1000.0 + n
+        values["sample_time"] = None
+        history.append(*(values[field] for field in HISTORY_FIELDS))
+
+
+async def collect(chunks):
+    return b"".join([chunk async for chunk in chunks])
+
+
+async def test_history_is_exported_in_chunks(monkeypatch):
+    monkeypatch.setattr(
+        "custom_components.simple_pid_controller.export.EXPORT_CHUNK_ROWS", 4
+    )
+    history = HistoryBuffer(8)
+    fill(history, 10)
+
+    chunks = [
+        chunk
+        async for chunk in async_iter_history(
+            history, ("timestamp", "output", "sample_time"), None, None, "jsonl"
+        )
+    ]
+    assert len(chunks) == 2
+    lines = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    assert [line["output"] for line in lines] == [float(n) for n in range(2, 10)]
+    assert lines[0]["sample_time"] is None
+
+
+async def test_history_time_range(monkeypatch):
+    history = HistoryBuffer(20)
+    fill(history, 10)
+    data = await collect(
+        async_iter_history(history, ("timestamp", "input"), 1003.0, 1005.0, "csv")
+    )
+    assert data == b"1003.0,3.0\n1004.0,4.0\n"
+
+
+@pytest.fixture
+async def http_client(hass, hass_client):
+    assert await async_setup_component(hass, "http", {})
+    return await hass_client()
+
+
+@pytest.fixture
+def export_url(config_entry):
+    return EXPORT_URL.format(entry_id=config_entry.entry_id)
+
+
+async def test_export_view_streams_csv(hass, http_client, config_entry, export_url):
+    # no scheduled steps besides the three below
+    hass.config_entries.async_update_entry(config_entry, pref_disable_polling=True)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = config_entry.runtime_data.coordinator
+    for _ in range(3):
+        await coordinator.async_refresh()
+
+    response = await http_client.get(
+        export_url, params={"format": "csv", "fields": "input,output"}
+    )
+    assert response.status == 200
+    assert response.headers["Content-Type"].startswith("text/csv")
+    assert (
+        response.headers["Content-Disposition"]
+        == 'attachment; filename="pid2_history.csv"'
+    )
+    rows = list(csv.reader(io.StringIO(await response.text())))
+    assert rows[0] == ["timestamp", "input", "output"]
+    assert len(rows) == 4
+    assert all(float(row[1]) == 25.0 for row in rows[1:])
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.parametrize(
+    "params, status",
+    [
+        ({"format": "xml"}, 400),
+        ({"fields": "bogus"}, 400),
+        ({"start": "yesterday"}, 400),
+        ({"source": "trace"}, 404),
+    ],
+)
+async def test_export_view_rejects_bad_requests(
+    hass, http_client, config_entry, export_url, params, status
+):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    response = await http_client.get(export_url, params=params)
+    assert response.status == status
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_export_view_requires_admin(
+    hass, http_client, config_entry, export_url, hass_admin_user
+):
+    hass_admin_user.groups = []
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    response = await http_client.get(export_url)
+    assert response.status == 401
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_export_filename_is_slugified(hass, http_client):
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        entry_id="PID3",
+        data={CONF_SENSOR_ENTITY_ID: "sensor.test_input", CONF_NAME: 'Büro "Süd"'},
+    )
+    entry.add_to_hass(hass)
+    hass.states.async_set("sensor.test_input", "25.0")
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    response = await http_client.get(EXPORT_URL.format(entry_id=entry.entry_id))
+    assert response.status == 200
+    assert (
+        response.headers["Content-Disposition"]
+        == 'attachment; filename="buro_sud_history.jsonl"'
+    )
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_export_view_unknown_entry(hass, http_client, config_entry):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    response = await http_client.get(EXPORT_URL.format(entry_id="missing"))
+    assert response.status == 404
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_export_view_streams_trace(hass, http_client, config_entry, tmp_path):
+    hass.config.config_dir = str(tmp_path)
+    hass.config_entries.async_update_entry(
+        config_entry, options={CONF_TRACE_ENABLED: True}
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = config_entry.runtime_data.coordinator
+    for _ in range(2):
+        await coordinator.async_refresh()
+
+    response = await http_client.get(
+        EXPORT_URL.format(entry_id=config_entry.entry_id),
+        params={"source": "trace", "fields": "input,dt"},
+    )
+    assert response.status == 200
+    lines = [json.loads(line) for line in (await response.text()).splitlines()]
+    assert len(lines) >= 2
+    assert set(lines[-1]) == {"timestamp", "input", "dt"}
+    assert lines[-1]["input"] == 25.0
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
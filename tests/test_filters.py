@@ -0,0 +1,146 @@
+"""Filters applied to the input before the PID step."""
+
+import math
+
+import pytest
+
+from custom_components.simple_pid_controller import PIDParameters
+from custom_components.simple_pid_controller.const import (
+    CONF_FILTER_MEDIAN_SIZE,
+    CONF_FILTER_SPIKE_THRESHOLD,
+    CONF_METRICS_WINDOW,
+)
+from custom_components.simple_pid_controller.filters import (
+    SPIKE_MAX_REJECTIONS,
+    EMAFilter,
+    InputFilter,
+    MedianFilter,
+    RateLimiter,
+    SpikeFilter,
+)
+
+
+def test_spike_is_rejected_but_a_lasting_step_is_accepted():
+    spike = SpikeFilter(5.0)
+    assert [spike.update(v, 0.0) for v in (20.0, 22.0, 90.0, 23.0)] == [
+        20.0,
+        22.0,
+        22.0,
+        23.0,
+    ]
+    values = [spike.update(50.0, 0.0) for _ in range(SPIKE_MAX_REJECTIONS + 1)]
+    assert values == [23.0] * SPIKE_MAX_REJECTIONS + [50.0]
+    assert spike.rejected == SPIKE_MAX_REJECTIONS + 1
+
+
+def test_median_of_sliding_window():
+    median = MedianFilter(3)
+    values = [median.update(v, 0.0) for v in (5.0, 1.0, 9.0, 9.0, 2.0, 1.0)]
+    assert values == [5.0, 3.0, 5.0, 9.0, 9.0, 2.0]
+    assert median._sorted == [1.0, 2.0, 9.0]
+
+
+def test_ema_depends_on_elapsed_time():
+    ema = EMAFilter(10.0)
+    assert ema.update(0.0, 0.0) == 0.0
+    assert ema.update(1.0, 10.0) == pytest.approx(1 - math.exp(-1))
+
+    # two half steps give the same result as one full step
+    halves = EMAFilter(10.0)
+    halves.update(0.0, 0.0)
+    halves.update(1.0, 5.0)
+    assert halves.update(1.0, 10.0) == pytest.approx(1 - math.exp(-1))
+
+
+def test_rate_limit():
+    limiter = RateLimiter(0.5)
+    assert limiter.update(20.0, 0.0) == 20.0
+    assert limiter.update(30.0, 4.0) == 22.0
+    assert limiter.update(10.0, 6.0) == 21.0
+    assert limiter.update(21.2, 8.0) == 21.2
+
+
+def test_pipeline_leaves_out_disabled_stages():
+    assert not InputFilter()
+    pipeline = InputFilter(spike_threshold=5.0, median_size=3, rate_limit=1.0)
+    assert pipeline.stats() == {
+        "stages": ["SpikeFilter", "MedianFilter", "RateLimiter"],
+        "rejected_spikes": 0,
+    }
+    values = [
+        pipeline.update(v, t)
+        for t, v in enumerate((20.0, 21.0, 60.0, 22.0, 25.0, 26.0))
+    ]
+    assert values == [20.0, 20.5, 21.0, 21.0, 22.0, 23.0]
+    assert pipeline.stats()["rejected_spikes"] == 1
+
+
+def test_sample_stages_count_readings_not_steps():
+    pipeline = InputFilter(spike_threshold=5.0, median_size=3)
+    # a reading at t=0 and a spike at t=2, each repeated by later steps
+    steps = [(20.0, 0.0), (20.0, 0.0), (60.0, 2.0), (60.0, 2.0), (60.0, 2.0)]
+    values = [pipeline.update(v, t, sample) for t, (v, sample) in enumerate(steps)]
+    assert values == [20.0] * 5
+    assert pipeline.stats()["rejected_spikes"] == 1
+    assert pipeline.sample_stages[1]._sorted == [20.0, 20.0]
+
+    # new reports of the same value count: the jump is accepted after three
+    # rejections, and shows once it is the median of the window
+    values = [pipeline.update(60.0, 5.0 + n, 3.0 + n) for n in range(4)]
+    assert values == [20.0, 20.0, 20.0, 60.0]
+    assert pipeline.stats()["rejected_spikes"] == 3
+
+
+async def test_controller_steps_on_filtered_input(hass, config_entry):
+    options = {CONF_FILTER_SPIKE_THRESHOLD: 5.0, CONF_FILTER_MEDIAN_SIZE: 1}
+    hass.config_entries.async_update_entry(config_entry, options=options)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    handle = config_entry.runtime_data.handle
+    coordinator = config_entry.runtime_data.coordinator
+    handle.params = PIDParameters(
+        kp=1.0,
+        ki=0.0,
+        kd=0.0,
+        setpoint=30.0,
+        sample_time=5.0,
+        output_min=0.0,
+        output_max=100.0,
+        auto_mode=True,
+        windup_protection=True,
+        start_mode="Zero start",
+    )
+    await coordinator.async_refresh()
+
+    hass.states.async_set("sensor.test_input", "80.0")
+    for _ in range(4):
+        await coordinator.async_refresh()
+    step = handle.last_step
+    assert step.input == 80.0
+    assert step.filtered_input == 25.0
+    assert step.error == -5.0
+    assert handle.history.as_dict(last=1)["input"] == [80.0]
+
+    # steps do not count as readings, reports of the same value do
+    for _ in range(3):
+        hass.states.async_set("sensor.test_input", "80.0")
+        await coordinator.async_refresh()
+    assert handle.last_step.filtered_input == 80.0
+
+    # only a change of a filter option restarts the filters
+    input_filter = handle.input_filter
+    options = {**options, CONF_METRICS_WINDOW: 600.0}
+    hass.config_entries.async_update_entry(config_entry, options=options)
+    await hass.async_block_till_done()
+    assert handle.input_filter is input_filter
+    hass.config_entries.async_update_entry(
+        config_entry, options={**options, CONF_FILTER_SPIKE_THRESHOLD: 0.0}
+    )
+    await hass.async_block_till_done()
+    assert handle.input_filter is None
+    await coordinator.async_refresh()
+    assert handle.last_step.filtered_input is None
+    assert handle.last_step.input == 80.0
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,163 @@
+"""Fusion of several input sensors."""
+
+import pytest
+
+from custom_components.simple_pid_controller.const import (
+    CONF_EXTRA_SENSOR_ENTITY_IDS,
+    CONF_FUSION_MAX_AGE,
+    CONF_FUSION_MODE,
+    CONF_FUSION_WEIGHTS,
+    FUSION_MAX,
+    FUSION_MEAN,
+    FUSION_MEDIAN,
+    FUSION_MIN,
+    FUSION_WEIGHTED_MEAN,
+)
+from custom_components.simple_pid_controller.fusion import InputFusion, parse_weights
+
+MEMBERS = ["sensor.a", "sensor.b", "sensor.c"]
+
+
+@pytest.mark.parametrize(
+    "mode, expected",
+    [
+        (FUSION_MEAN, 20.0),
+        (FUSION_WEIGHTED_MEAN, (10.0 + 2 * 20.0 + 30.0) / 4),
+        (FUSION_MEDIAN, 20.0),
+        (FUSION_MIN, 10.0),
+        (FUSION_MAX, 30.0),
+    ],
+)
+def test_modes(mode, expected):
+    fusion = InputFusion(MEMBERS, mode, weights=[1.0, 2.0, 1.0])
+    for entity_id, value in zip(MEMBERS, (30.0, 10.0, 20.0)):
+        fusion.update(entity_id, value, 0.0)
+    # replacing a value keeps the running sums and order consistent
+    fusion.update("sensor.a", 10.0, 1.0)
+    fusion.update("sensor.b", 20.0, 1.0)
+    fusion.update("sensor.c", 30.0, 1.0)
+    assert fusion.value(1.0) == pytest.approx(expected)
+
+
+def test_even_median_and_unavailable_member():
+    fusion = InputFusion(MEMBERS, FUSION_MEDIAN)
+    fusion.update("sensor.a", 1.0, 0.0)
+    fusion.update("sensor.b", 4.0, 0.0)
+    fusion.update("sensor.c", 8.0, 0.0)
+    fusion.update("sensor.c", None, 1.0)
+    assert len(fusion) == 2
+    assert fusion.value(1.0) == 2.5
+    fusion.update("sensor.unknown", 100.0, 1.0)
+    assert fusion.value(1.0) == 2.5
+
+
+def test_stale_members_are_excluded_until_they_report():
+    fusion = InputFusion(MEMBERS, FUSION_MEAN, max_age=60.0)
+    fusion.update("sensor.a", 10.0, 0.0)
+    fusion.update("sensor.b", 20.0, 30.0)
+    fusion.update("sensor.c", 30.0, 50.0)
+    assert fusion.value(55.0) == 20.0
+
+    # sensor.a is stale, sensor.b reported an unchanged value
+    fusion.report("sensor.b", 70.0)
+    assert fusion.last_report == 70.0
+    assert fusion.value(100.0) == 25.0
+    assert fusion.stats(100.0)["excluded"] == ["sensor.a"]
+
+    assert fusion.value(200.0) is None
+    fusion.update("sensor.a", 12.0, 200.0)
+    assert fusion.value(200.0) == 12.0
+
+
+def test_members_seeded_out_of_time_order_expire():
+    """A stale member seeded after a fresh one is still excluded."""
+    fusion = InputFusion(["a", "b"], FUSION_MEAN, max_age=60)
+    fusion.update("a", 10.0, 1000.0)
+    fusion.update("b", 50.0, 100.0)
+    assert fusion.last_report == 1000.0
+    assert fusion.value(1000.0) == 10.0
+    assert fusion.stats(1000.0)["excluded"] == ["b"]
+
+    fusion = InputFusion(MEMBERS, FUSION_MEAN, max_age=60)
+    fusion.update("sensor.a", 10.0, 500.0)
+    fusion.update("sensor.b", 20.0, 520.0)
+    fusion.report("sensor.c", 0.0)
+    fusion.update("sensor.c", 30.0, 450.0)
+    assert fusion.value(530.0) == 15.0
+    assert fusion.value(575.0) == 20.0
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [("", [1.0, 1.0]), ("1, 3", [1.0, 3.0]), ("0,2", [0.0, 2.0])],
+)
+def test_parse_weights(text, expected):
+    assert parse_weights(text, 2) == expected
+
+
+@pytest.mark.parametrize("text", ["1", "1,2,3", "1,-1", "0,0", "a,b"])
+def test_parse_weights_invalid(text):
+    with pytest.raises(ValueError):
+        parse_weights(text, 2)
+
+
+async def test_controller_uses_fused_input(hass, config_entry):
+    hass.states.async_set("sensor.extra_1", "27.0")
+    hass.states.async_set("sensor.extra_2", "unavailable")
+    hass.config_entries.async_update_entry(
+        config_entry,
+        options={
+            CONF_EXTRA_SENSOR_ENTITY_IDS: ["sensor.extra_1", "sensor.extra_2"],
+            CONF_FUSION_MODE: FUSION_MEAN,
+        },
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    handle = config_entry.runtime_data.handle
+    assert handle.input_entity_ids == [
+        "sensor.test_input",
+        "sensor.extra_1",
+        "sensor.extra_2",
+    ]
+    assert handle.get_input_sensor_value() == 26.0
+
+    samples = []
+    handle._input_action = lambda: samples.append(handle.get_input_sensor_value())
+    hass.states.async_set("sensor.extra_2", "29.0")
+    hass.states.async_set("sensor.test_input", "nan")
+    await hass.async_block_till_done()
+    assert samples == [27.0, 28.0]
+
+    # switching the mode is applied in place
+    hass.config_entries.async_update_entry(
+        config_entry,
+        options={
+            CONF_EXTRA_SENSOR_ENTITY_IDS: ["sensor.extra_1", "sensor.extra_2"],
+            CONF_FUSION_MODE: FUSION_WEIGHTED_MEAN,
+            CONF_FUSION_WEIGHTS: "1, 1, 3",
+            CONF_FUSION_MAX_AGE: 60,
+        },
+    )
+    await hass.async_block_till_done()
+    assert handle.fusion.mode == FUSION_WEIGHTED_MEAN
+    assert handle.get_input_sensor_value() == pytest.approx((27.0 + 3 * 29.0) / 4)
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_options_flow_rejects_wrong_weight_count(hass, config_entry):
+    result = await hass.config_entries.options.async_init(config_entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={
+            "sensor_entity_id": "sensor.test_input",
+            "input_range_min": 0.0,
+            "input_range_max": 100.0,
+            "output_range_min": 0.0,
+            "output_range_max": 100.0,
+            CONF_EXTRA_SENSOR_ENTITY_IDS: ["sensor.extra_1"],
+            CONF_FUSION_WEIGHTS: "1, 2, 3",
+        },
+    )
+    assert result["errors"] == {"base": "fusion_weights"}
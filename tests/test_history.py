@@ -0,0 +1,79 @@
+import math
+
+import pytest
+
+from custom_components.simple_pid_controller.history import (
+    HISTORY_FIELDS,
+    HistoryBuffer,
+)
+
+
+def sample(n, **overrides):
+    values = {field: float(n) for field in HISTORY_FIELDS}
+    values.update(overrides)
+    return [values[field] for field in HISTORY_FIELDS]
+
+
+def test_append_and_wrap_around():
+    """The buffer keeps the newest samples, oldest first."""
+    history = HistoryBuffer(4)
+    for n in range(6):
+        history.append(*sample(n))
+
+    assert len(history) == 4
+    assert list(history.values("input")) == [2.0, 3.0, 4.0, 5.0]
+    assert list(history.values("output", last=2)) == [4.0, 5.0]
+    assert history.latest("timestamp") == 5.0
+
+
+def test_segments_are_zero_copy_views():
+    history = HistoryBuffer(4)
+    for n in range(6):
+        history.append(*sample(n))
+
+    segments = history.segments("input")
+    assert [list(s) for s in segments] == [[2.0, 3.0], [4.0, 5.0]]
+    assert all(isinstance(s, memoryview) for s in segments)
+    # the views share memory with the column
+    history.append(*sample(6))
+    assert list(segments[0]) == [6.0, 3.0]
+
+
+def test_none_is_stored_as_nan():
+    history = HistoryBuffer(3)
+    history.append(*sample(1, sample_time=None))
+
+    assert math.isnan(history.segments("sample_time")[0][0])
+    assert history.as_dict()["sample_time"] == [None]
+    assert history.latest("sample_time") is None
+
+
+def test_empty_and_invalid():
+    history = HistoryBuffer(2)
+    assert history.segments("input") == ()
+    assert history.latest("input") is None
+    assert history.as_dict() == {field: [] for field in HISTORY_FIELDS}
+
+    with pytest.raises(ValueError):
+        history.append(1.0)
+    with pytest.raises(ValueError):
+        HistoryBuffer(0)
+
+    history.append(*sample(1))
+    history.clear()
+    assert len(history) == 0
+
+
+def test_rows_page_by_sequence_number():
+    """Pages continue where they stopped, skipping overwritten samples."""
+    history = HistoryBuffer(4)
+    for n in range(3):
+        history.append(*sample(n))
+
+    seq, rows = history.rows(("timestamp", "input"), history.first_seq, 2)
+    assert (seq, rows) == (2, [(0.0, 0.0), (1.0, 1.0)])
+
+    for n in range(3, 8):
+        history.append(*sample(n))
+    seq, rows = history.rows(("input",), seq, 10)
+    assert (seq, rows) == (8, [(4.0,), (5.0,), (6.0,), (7.0,)])
@@ -2,10 +2,9 @@ import logging
 
 import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.config_entries import ConfigEntryState
 
 from custom_components.simple_pid_controller import (
-    async_setup_entry,
     async_unload_entry,
 )
 from custom_components.simple_pid_controller.const import (
@@ -44,9 +43,8 @@ async def test_setup_and_unload_entry(hass, config_entry):
     assert DOMAIN not in hass.data
 
 
-@pytest.mark.asyncio
-async def test_setup_entry_not_ready_when_sensor_missing(hass, caplog):
-    """async_setup_entry should raise when the sensor state is missing."""
+async def test_setup_waits_for_missing_sensor(hass, caplog):
+    """Setup completes without the sensor and the first sample starts control."""
 
     entry = MockConfigEntry(
         domain=DOMAIN,
@@ -56,8 +54,46 @@ async def test_setup_entry_not_ready_when_sensor_missing(hass, caplog):
     )
     entry.add_to_hass(hass)
 
-    caplog.set_level(logging.WARNING)
-    with pytest.raises(ConfigEntryNotReady):
-        await async_setup_entry(hass, entry)
+    caplog.set_level(logging.INFO)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
 
+    assert entry.state is ConfigEntryState.LOADED
     assert "Sensor sensor.missing not ready" in caplog.text
+    coordinator = entry.runtime_data.coordinator
+    assert coordinator.waiting_for_input
+
+    handle = entry.runtime_data.handle
+    handle.params.auto_mode = True
+    hass.states.async_set("sensor.missing", "unknown")
+    await hass.async_block_till_done()
+    assert coordinator.waiting_for_input
+
+    hass.states.async_set("sensor.missing", "21.5")
+    await hass.async_block_till_done()
+    assert not coordinator.waiting_for_input
+    assert coordinator.last_update_success
+    assert handle.last_step.input == 21.5
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_input_outage_waits_for_next_sample(hass, config_entry):
+    """A step without input waits; the next sample steps in periodic mode too."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = config_entry.runtime_data.coordinator
+
+    hass.states.async_set("sensor.test_input", "unavailable")
+    await coordinator.async_refresh()
+    assert coordinator.waiting_for_input
+    assert not coordinator.last_update_success
+
+    hass.states.async_set("sensor.test_input", "24.0")
+    await hass.async_block_till_done()
+    assert not coordinator.waiting_for_input
+    assert coordinator.last_update_success
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
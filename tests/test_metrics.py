@@ -0,0 +1,144 @@
+import math
+import random
+
+from homeassistant.helpers import entity_registry as er
+import pytest
+
+from custom_components.simple_pid_controller import PIDParameters
+from custom_components.simple_pid_controller.metrics import LogHistogram, LoopMetrics
+from custom_components.simple_pid_controller.sensor import METRIC_SENSORS
+
+
+def reference(steps, window):
+    """Recompute the metrics of the window from scratch."""
+    now = steps[-1][0]
+    inside = [
+        (t, e, sat, dt, t - steps[k - 1][0] if k else 0.0)
+        for k, (t, e, sat, dt) in enumerate(steps)
+        if t >= now - window
+    ]
+    start = inside[0][0]
+    return {
+        "iae": sum(abs(e) * step for _, e, _, _, step in inside),
+        "ise": sum(e * e * step for _, e, _, _, step in inside),
+        "itae": sum((t - start) * abs(e) * step for t, e, _, _, step in inside),
+        "mean_sample_time": sum(dt for *_, dt, _ in inside) / len(inside),
+    }
+
+
+def test_sliding_window_matches_recomputation():
+    rng = random.Random(4)
+    metrics = LoopMetrics(window=100.0)
+    steps = []
+    t = 1.7e9
+    for _ in range(500):
+        t += rng.uniform(1.0, 9.0)
+        steps.append((t, rng.uniform(-5, 5), False, rng.uniform(1.0, 9.0)))
+        metrics.update(*steps[-1])
+
+    values = metrics.values()
+    expected = reference([(s[0] - 1.7e9, *s[1:]) for s in steps], 100.0)
+    for key, value in expected.items():
+        assert values[key] == pytest.approx(value, rel=1e-6), key
+    assert len(metrics) < 100
+
+
+def test_oscillations_and_saturation():
+    metrics = LoopMetrics(window=1000.0, deadband=0.5)
+    errors = [2.0, 0.2, -0.3, -2.0, -1.0, 1.0, 3.0, -2.0]
+    for n, error in enumerate(errors):
+        metrics.update(10.0 * n, error, saturated=n >= 6, sample_time=10.0)
+
+    values = metrics.values()
+    # 2 -> (small) -> -2, -1 -> 1, 3 -> -2
+    assert values["oscillations"] == 3
+    assert values["saturation"] == pytest.approx(20 / 70 * 100)
+    assert values["mean_sample_time"] == 10.0
+    assert values["p95_sample_time"] == pytest.approx(10.0, rel=0.1)
+
+
+def test_empty_metrics():
+    metrics = LoopMetrics(window=60.0)
+    values = metrics.values()
+    assert values["iae"] == 0.0
+    assert values["saturation"] is None
+    assert values["p95_sample_time"] is None
+    with pytest.raises(ValueError):
+        LoopMetrics(window=0)
+
+
+def test_log_histogram_quantiles():
+    histogram = LogHistogram()
+    for value in range(1, 101):
+        histogram.add(float(value))
+    assert histogram.quantile(0.95) == pytest.approx(95.0, rel=0.1)
+    assert histogram.quantile(0.5) == pytest.approx(50.0, rel=0.1)
+    for value in range(51, 101):
+        histogram.remove(float(value))
+    assert histogram.quantile(0.95) == pytest.approx(48.0, rel=0.1)
+    histogram.add(0.0)
+    histogram.add(math.inf)
+    assert histogram.count == 52
+
+
+@pytest.mark.usefixtures("setup_integration")
+async def test_metric_sensors(hass, config_entry):
+    handle = config_entry.runtime_data.handle
+    coordinator = config_entry.runtime_data.coordinator
+    registry = er.async_get(hass)
+    entity_ids = {}
+    for key, _, _ in METRIC_SENSORS:
+        entity_id = registry.async_get_entity_id(
+            "sensor", "simple_pid_controller", f"{config_entry.entry_id}_metric_{key}"
+        )
+        entry = registry.async_get(entity_id)
+        assert entry.disabled_by is er.RegistryEntryDisabler.INTEGRATION
+        registry.async_update_entity(entity_id, disabled_by=None)
+        entity_ids[key] = entity_id
+    await hass.config_entries.async_reload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    handle = config_entry.runtime_data.handle
+    coordinator = config_entry.runtime_data.coordinator
+    handle.params = PIDParameters(
+        kp=1.0,
+        ki=0.0,
+        kd=0.0,
+        setpoint=30.0,
+        sample_time=5.0,
+        output_min=0.0,
+        output_max=2.0,
+    )
+    for _ in range(3):
+        await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    # the input is 25, so the output is clamped at 2
+    assert hass.states.get(entity_ids["oscillations"]).state == "0"
+    saturation = hass.states.get(entity_ids["saturation"])
+    assert saturation.attributes["unit_of_measurement"] == "%"
+    assert float(saturation.state) == 100.0
+    assert float(hass.states.get(entity_ids["iae"]).state) > 0
+
+
+@pytest.mark.usefixtures("setup_integration")
+async def test_manual_mode_cold_start(hass, config_entry):
+    """Without an auto step the PID has no output, which is not saturation."""
+    handle = config_entry.runtime_data.handle
+    coordinator = config_entry.runtime_data.coordinator
+    handle.params = PIDParameters(
+        kp=1.0,
+        ki=0.0,
+        kd=0.0,
+        setpoint=30.0,
+        sample_time=5.0,
+        output_min=0.0,
+        output_max=2.0,
+        auto_mode=False,
+    )
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert handle.last_step.output is None
+    assert handle.metrics.values()["saturation"] is None
@@ -222,3 +222,19 @@ async def test_control_number_step_defaults(hass, config_entry, desc):
     """Test that ControlParameterNumber falls back to DEFAULT_STEPS when no option is set."""
     num = ControlParameterNumber(hass, config_entry, desc)
     assert num._attr_native_step == DEFAULT_STEPS[desc["key"]]
+
+
+@pytest.mark.usefixtures("setup_integration")
+async def test_number_values_pushed_to_parameter_snapshot(hass, config_entry):
+    """Restored and updated number values are written into handle.params."""
+    handle = config_entry.runtime_data.handle
+    assert handle.params.kp == PID_NUMBER_ENTITIES[0]["default"]
+    assert handle.params.output_max == DEFAULT_OUTPUT_RANGE_MAX
+
+    await hass.services.async_call(
+        "number",
+        "set_value",
+        {"entity_id": f"number.{config_entry.entry_id.lower()}_kp", "value": 2.5},
+        blocking=True,
+    )
+    assert handle.params.kp == 2.5
@@ -0,0 +1,190 @@
+"""Bumpless restore of the controller state across restarts."""
+
+from datetime import timedelta
+
+from homeassistant.util.dt import utcnow
+import pytest
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.simple_pid_controller import (
+    PIDParameters,
+    async_remove_entry,
+)
+from custom_components.simple_pid_controller.persistence import SAVE_INTERVAL
+from custom_components.simple_pid_controller.pid import PID
+
+STORAGE_KEY = "simple_pid_controller.PID2"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def run(pid, clock, inputs, dt=5.0):
+    outputs = []
+    for value in inputs:
+        clock.now += dt
+        outputs.append(pid.step(value).output)
+    return outputs
+
+
+def make_pid(clock):
+    return PID(
+        2.0,
+        0.3,
+        1.0,
+        setpoint=20,
+        sample_time=None,
+        output_limits=(0, 100),
+        time_fn=clock,
+    )
+
+
+def test_restore_continues_like_the_saved_controller():
+    clock = FakeClock()
+    pid = make_pid(clock)
+    run(pid, clock, [15.0, 16.0, 17.5])
+    state = pid.state
+
+    restored_clock = FakeClock()
+    restored_clock.now = 9000.0
+    restored = make_pid(restored_clock)
+    restored.set_auto_mode(False)
+    restored.restore(state, dt=5.0)
+
+    assert restored.auto_mode
+    # the first step after the restart runs right away, dt after the last one
+    first = restored.step(18.0).output
+    assert [first, *run(restored, restored_clock, [19.0])] == run(
+        pid, clock, [18.0, 19.0]
+    )
+
+
+def test_restore_without_dt_has_no_derivative_kick():
+    clock = FakeClock()
+    pid = make_pid(clock)
+    run(pid, clock, [15.0, 16.0])
+
+    restored = make_pid(clock)
+    restored.restore(pid.state)
+    result = restored.step(30.0)
+
+    assert result.d == 0.0
+    assert result.i == pytest.approx(pid.state.integral + 0.3 * -10.0 * 1e-16)
+
+
+@pytest.fixture
+async def running_controller(hass, config_entry):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    handle = config_entry.runtime_data.handle
+    handle.params = PIDParameters(
+        kp=1.0,
+        ki=0.5,
+        kd=0.0,
+        setpoint=30.0,
+        sample_time=5.0,
+        output_min=0.0,
+        output_max=100.0,
+        auto_mode=True,
+        windup_protection=True,
+        start_mode="Zero start",
+    )
+    return handle, config_entry.runtime_data.coordinator
+
+
+async def test_state_is_restored_after_reload(
+    hass, config_entry, hass_storage, running_controller
+):
+    handle, coordinator = running_controller
+    for _ in range(3):
+        await coordinator.async_refresh()
+    saved = handle.pid.state
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    data = hass_storage[STORAGE_KEY]["data"]
+    assert data["integral"] == saved.integral
+    assert data["last_output"] == saved.last_output
+    assert data["auto_mode"] is True
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    handle = config_entry.runtime_data.handle
+    assert handle.state_restored
+    assert handle.pid.state == saved
+    assert handle.last_known_output == saved.last_output
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_writes_are_throttled(
+    hass, config_entry, hass_storage, running_controller
+):
+    handle, coordinator = running_controller
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+    assert STORAGE_KEY not in hass_storage
+
+    async_fire_time_changed(hass, utcnow() + timedelta(seconds=SAVE_INTERVAL + 1))
+    await hass.async_block_till_done()
+    assert hass_storage[STORAGE_KEY]["data"]["integral"] == handle.pid.state.integral
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_saved_integral_outside_initial_limits(hass, config_entry, hass_storage):
+    hass_storage[STORAGE_KEY] = {
+        "version": 1,
+        "key": STORAGE_KEY,
+        "data": {
+            "integral": 60.0,
+            "last_input": 24.0,
+            "last_output": 61.0,
+            "auto_mode": True,
+            "dt": 5.0,
+        },
+    }
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    handle = config_entry.runtime_data.handle
+    assert handle.pid.state.integral == 60.0
+    assert handle.last_known_output == 61.0
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_invalid_state_is_ignored(hass, config_entry, hass_storage, caplog):
+    hass_storage[STORAGE_KEY] = {
+        "version": 1,
+        "key": STORAGE_KEY,
+        "data": {"integral": "abc"},
+    }
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert not config_entry.runtime_data.handle.state_restored
+    assert "Ignoring invalid saved state" in caplog.text
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_remove_entry_deletes_state(hass, config_entry, hass_storage, tmp_path):
+    hass.config.config_dir = str(tmp_path)
+    trace = tmp_path / "simple_pid_controller" / "PID2.trace"
+    trace.parent.mkdir()
+    trace.write_bytes(b"")
+    trace.with_name("PID2.trace.1").write_bytes(b"")
+    hass_storage[STORAGE_KEY] = {"version": 1, "key": STORAGE_KEY, "data": {}}
+    await async_remove_entry(hass, config_entry)
+    assert STORAGE_KEY not in hass_storage
+    assert list(trace.parent.iterdir()) == []
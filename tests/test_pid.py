@@ -0,0 +1,154 @@
+"""Conformance of the native PID core with simple-pid==2.0.1."""
+
+from importlib.metadata import version
+import random
+
+import pytest
+import simple_pid
+
+from custom_components.simple_pid_controller.pid import PID, PIDResult
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 500.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_pair(clock, **kwargs):
+    return (
+        simple_pid.PID(time_fn=clock, **kwargs),
+        PID(time_fn=clock, **kwargs),
+    )
+
+
+def assert_same(reference, pid):
+    assert pid.components == reference.components
+    assert pid.last_output == reference._last_output
+    assert pid.auto_mode == reference.auto_mode
+    assert pid.output_limits == reference.output_limits
+
+
+def test_simple_pid_version():
+    assert version("simple-pid") == "2.0.1"
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"Kp": 2.0, "Ki": 0.5, "Kd": 0.1, "setpoint": 20, "sample_time": None},
+        {
+            "Kp": 1.5,
+            "Ki": 0.2,
+            "Kd": 0.3,
+            "setpoint": 50,
+            "sample_time": None,
+            "output_limits": (0, 100),
+        },
+        {"Kp": 3.0, "Ki": 1.0, "Kd": 0.5, "proportional_on_measurement": True},
+        {
+            "Kp": 1.0,
+            "Ki": 0.4,
+            "Kd": 0.2,
+            "setpoint": 30,
+            "sample_time": 2.0,
+            "output_limits": (None, 40),
+            "starting_output": 60,
+        },
+        {"Kp": 1.0, "Ki": 0.1, "auto_mode": False},
+    ],
+)
+def test_random_sequence_matches_simple_pid(kwargs):
+    clock = FakeClock()
+    reference, pid = make_pair(clock, **kwargs)
+    rng = random.Random(7)
+
+    for _ in range(300):
+        clock.now += rng.choice([0.0, 0.25, 1.0, 2.5])
+        value = rng.uniform(-20.0, 80.0)
+        expected = reference(value)
+        result = pid.step(value)
+        assert result == PIDResult(expected, *reference.components)
+        assert_same(reference, pid)
+
+
+def test_explicit_dt_matches_simple_pid():
+    clock = FakeClock()
+    reference, pid = make_pair(clock, Kp=1.2, Ki=0.3, Kd=0.4, sample_time=None)
+
+    for value, dt in ((10.0, 1.0), (12.0, 0.5), (9.0, 3.0)):
+        assert pid(value, dt=dt) == reference(value, dt=dt)
+        assert_same(reference, pid)
+
+    with pytest.raises(ValueError):
+        pid(1.0, dt=-1)
+
+
+def test_configure_matches_simple_pid_setters():
+    """A parameter set applied with configure equals the simple_pid setters."""
+    clock = FakeClock()
+    reference, pid = make_pair(
+        clock, Kp=1.0, Ki=0.1, Kd=0.05, setpoint=50, sample_time=None, auto_mode=False
+    )
+    rng = random.Random(3)
+
+    for n in range(200):
+        tunings = (rng.uniform(0, 3), rng.uniform(0, 1), rng.uniform(0, 0.5))
+        setpoint = rng.choice([20.0, 50.0])
+        limits = rng.choice([(0.0, 100.0), (-10.0, 10.0), (None, None)])
+        auto_mode = n % 17 not in (5, 6)
+        p_on_m = n % 23 > 20
+        start = rng.choice([None, 0, 42.0])
+
+        # the order update_pid used with simple_pid
+        reference.tunings = tunings
+        reference.setpoint = setpoint
+        reference.output_limits = limits
+        if not reference.auto_mode and auto_mode:
+            reference.set_auto_mode(True, start)
+        else:
+            reference.auto_mode = auto_mode
+        reference.proportional_on_measurement = p_on_m
+        pid.configure(tunings, setpoint, limits, auto_mode, p_on_m, start)
+
+        clock.now += 1.0
+        value = rng.uniform(0.0, 80.0)
+        assert pid(value) == reference(value)
+        assert_same(reference, pid)
+
+
+def test_configure_reports_changes():
+    pid = PID(1.0, 0.1, 0.0, setpoint=5, sample_time=None)
+    assert not pid.configure((1.0, 0.1, 0.0), 5, (None, None), True, False)
+    assert pid.configure((1.0, 0.1, 0.0), 6, (None, None), True, False)
+    assert pid.configure((1.0, 0.1, 0.0), 6, (0, 1), True, False)
+    assert not pid.configure((1.0, 0.1, 0.0), 6, (0, 1), True, False)
+
+
+def test_set_auto_mode_and_limits_match_simple_pid():
+    clock = FakeClock()
+    reference, pid = make_pair(clock, Kp=1.0, Ki=0.5, setpoint=10, sample_time=None)
+
+    for target in (reference, pid):
+        clock.now += 1.0
+        target(4.0)
+        target.set_auto_mode(False)
+        target.set_auto_mode(True, 250.0)
+        target.output_limits = (0, 100)
+    assert_same(reference, pid)
+
+    with pytest.raises(ValueError):
+        pid.output_limits = (5, 1)
+
+    pid.output_limits = None
+    reference.output_limits = None
+    assert_same(reference, pid)
+
+
+def test_slots_prevent_stray_attributes():
+    pid = PID()
+    with pytest.raises(AttributeError):
+        pid.error_map = abs
@@ -0,0 +1,106 @@
+from homeassistant.const import UnitOfTime
+import pytest
+
+from custom_components.simple_pid_controller.const import CONF_PROFILING
+from custom_components.simple_pid_controller.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from custom_components.simple_pid_controller.profiling import (
+    PHASE_COMPUTE,
+    PHASE_PUBLISH,
+    PHASE_TOTAL,
+    PHASES,
+    PhaseProfiler,
+)
+
+
+def test_phases_are_recorded_from_marks():
+    profiler = PhaseProfiler()
+    for _ in range(100):
+        profiler.record_step(0, 1_000, 3_000, 13_000, 14_000)
+        profiler.record_publish(6_000)
+
+    stats = profiler.stats()
+    assert set(stats) == set(PHASES)
+    assert stats[PHASE_COMPUTE]["count"] == 100
+    assert stats[PHASE_COMPUTE]["p50"] == pytest.approx(10.0, rel=0.1)
+    assert stats[PHASE_TOTAL]["p99"] == pytest.approx(20.0, rel=0.1)
+    assert stats[PHASE_TOTAL]["max"] == 20.0
+    assert stats["input"]["max"] == 1.0
+
+
+def test_publish_without_step_is_not_counted():
+    profiler = PhaseProfiler()
+    profiler.record_publish(6_000)
+    profiler.record_step(0, 1_000, 3_000, 13_000, 14_000)
+    profiler.record_publish(6_000)
+    profiler.record_publish(6_000)
+
+    stats = profiler.stats()
+    assert stats[PHASE_PUBLISH]["count"] == 1
+    assert stats[PHASE_TOTAL]["count"] == 1
+    assert stats[PHASE_TOTAL]["max"] == 20.0
+
+
+def test_empty_profiler():
+    stats = PhaseProfiler().stats()
+    assert stats[PHASE_TOTAL] == {
+        "count": 0,
+        "p50": None,
+        "p95": None,
+        "p99": None,
+        "max": 0.0,
+    }
+
+
+async def test_disabled_profiling_does_not_measure(hass, config_entry, monkeypatch):
+    def fail():
+        raise AssertionError("perf_counter_ns called")
+
+    monkeypatch.setattr(
+        "custom_components.simple_pid_controller.sensor.perf_counter_ns", fail
+    )
+    monkeypatch.setattr(
+        "custom_components.simple_pid_controller.coordinator.perf_counter_ns", fail
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = config_entry.runtime_data.coordinator
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert config_entry.runtime_data.handle.profiler is None
+    entity_id = f"sensor.{config_entry.entry_id.lower()}_step_duration_p95"
+    assert hass.states.get(entity_id) is None
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_profiling_sensor_and_diagnostics(hass, config_entry):
+    hass.config_entries.async_update_entry(config_entry, options={CONF_PROFILING: True})
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = config_entry.runtime_data.coordinator
+    for _ in range(5):
+        await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    state = hass.states.get(f"sensor.{config_entry.entry_id.lower()}_step_duration_p95")
+    assert state.attributes["unit_of_measurement"] == UnitOfTime.MICROSECONDS
+    assert float(state.state) > 0
+    # the attributes are written with a change of the p95, not every step
+    assert 1 <= state.attributes[PHASE_COMPUTE]["count"] <= 5
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, config_entry)
+    profiling = diagnostics["data"]["profiling"]
+    assert profiling[PHASE_TOTAL]["count"] == 5
+    assert profiling[PHASE_TOTAL]["p95"] >= profiling[PHASE_COMPUTE]["p50"]
+
+    # a manual output updates the listeners without a step
+    coordinator.async_set_updated_data(10.0)
+    profiler = config_entry.runtime_data.handle.profiler
+    assert profiler.stats()[PHASE_TOTAL]["count"] == 5
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
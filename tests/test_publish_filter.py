@@ -0,0 +1,188 @@
+from datetime import timedelta
+
+from homeassistant.util.dt import utcnow
+import pytest
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.simple_pid_controller import PIDParameters
+from custom_components.simple_pid_controller.const import (
+    CONF_DIAGNOSTIC_DEADBAND,
+    CONF_MIN_PUBLISH_INTERVAL,
+    CONF_OUTPUT_DEADBAND,
+    CONF_PROFILING,
+)
+from custom_components.simple_pid_controller.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from custom_components.simple_pid_controller.entity import PublishFilterMixin
+
+
+@pytest.fixture
+def output_writes(hass, config_entry):
+    """Collect the states written for the PID output sensor."""
+    entity_id = f"sensor.{config_entry.entry_id.lower()}_pid_output"
+    writes = []
+
+    def listener(event):
+        if event.data["entity_id"] == entity_id:
+            writes.append(event.data["new_state"].state)
+
+    hass.bus.async_listen("state_changed", listener)
+    return writes
+
+
+async def setup_with_options(hass, config_entry, options):
+    # only the steps of the test run, not the ticks of the sample time
+    hass.config_entries.async_update_entry(
+        config_entry, options=options, pref_disable_polling=True
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    handle = config_entry.runtime_data.handle
+    handle.params = PIDParameters(
+        kp=1.0,
+        ki=0.0,
+        kd=0.0,
+        setpoint=30.0,
+        sample_time=5.0,
+        output_min=-100.0,
+        output_max=100.0,
+    )
+    return handle, config_entry.runtime_data.coordinator
+
+
+async def step(hass, handle, coordinator, value):
+    handle.get_input_sensor_value = lambda: value
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+
+async def test_unchanged_states_are_not_written(hass, config_entry, output_writes):
+    handle, coordinator = await setup_with_options(hass, config_entry, {})
+    output_writes.clear()
+
+    for value in (25.0, 25.0, 25.0, 24.0):
+        await step(hass, handle, coordinator, value)
+
+    assert output_writes == ["5.0", "6.0"]
+    sensor = hass.data["sensor"].get_entity(
+        f"sensor.{config_entry.entry_id.lower()}_pid_output"
+    )
+    assert sensor.suppressed_writes == 2
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_output_deadband(hass, config_entry, output_writes):
+    handle, coordinator = await setup_with_options(
+        hass, config_entry, {CONF_OUTPUT_DEADBAND: 1.0}
+    )
+    output_writes.clear()
+
+    for value in (25.0, 24.5, 24.1, 23.9):
+        await step(hass, handle, coordinator, value)
+
+    # 5.5 and 5.9 are within 1 of 5.0; 6.1 is not
+    assert output_writes == ["5.0", "6.1"]
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_min_publish_interval_writes_the_last_value(
+    hass, config_entry, output_writes
+):
+    handle, coordinator = await setup_with_options(
+        hass, config_entry, {CONF_MIN_PUBLISH_INTERVAL: 10.0}
+    )
+    output_writes.clear()
+
+    for value in (25.0, 24.0, 23.0, 22.0):
+        await step(hass, handle, coordinator, value)
+    assert output_writes == ["5.0"]
+
+    async_fire_time_changed(hass, utcnow() + timedelta(seconds=11))
+    await hass.async_block_till_done()
+    assert output_writes == ["5.0", "8.0"]
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_availability_is_written_immediately(hass, config_entry, output_writes):
+    handle, coordinator = await setup_with_options(
+        hass, config_entry, {CONF_MIN_PUBLISH_INTERVAL: 60.0}
+    )
+    await step(hass, handle, coordinator, 25.0)
+    output_writes.clear()
+
+    await step(hass, handle, coordinator, None)
+    assert output_writes == ["unavailable"]
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+class FakeSensor(PublishFilterMixin):
+    """Publish filtered entity writing into a list."""
+
+    available = True
+
+    def __init__(self, hass):
+        self.hass = hass
+        self.native_value = None
+        self.extra_state_attributes = None
+        self.writes = []
+
+    def async_write_ha_state(self):
+        self.writes.append(self.native_value)
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    [
+        # 10 % of 100 and of 1: the deadband follows the scale of the value
+        ((100.0, 109.0, 111.0), [100.0, 111.0]),
+        ((1.0, 1.09, 1.11), [1.0, 1.11]),
+        ((0.0, 0.001), [0.0, 0.001]),
+    ],
+)
+async def test_relative_deadband(hass, values, expected):
+    sensor = FakeSensor(hass)
+    sensor.set_publish_filter(10.0, 0.0, relative=True)
+    for value in values:
+        sensor.native_value = value
+        sensor._handle_coordinator_update()
+    assert sensor.writes == expected
+
+
+async def test_ignored_attributes_do_not_force_a_write(hass):
+    sensor = FakeSensor(hass)
+    sensor.publish_attributes = False
+    for value, attributes in ((5.0, {"n": 1}), (5.0, {"n": 2}), (6.0, {"n": 3})):
+        sensor.native_value = value
+        sensor.extra_state_attributes = attributes
+        sensor._handle_coordinator_update()
+    assert sensor.writes == [5.0, 6.0]
+    assert sensor.suppressed_writes == 1
+
+
+async def test_step_duration_sensor_and_diagnostics(hass, config_entry):
+    handle, coordinator = await setup_with_options(
+        hass, config_entry, {CONF_PROFILING: True, CONF_DIAGNOSTIC_DEADBAND: 5.0}
+    )
+    sensors = handle.published_sensors
+    assert not sensors["step_duration"].publish_attributes
+    assert sensors["pid_output"].publish_deadband == 0.0
+    assert not sensors["pid_output"].publish_relative
+    assert sensors["error"].publish_deadband == 5.0
+    assert sensors["error"].publish_relative
+
+    for value in (25.0, 25.0):
+        await step(hass, handle, coordinator, value)
+    data = (await async_get_config_entry_diagnostics(hass, config_entry))["data"]
+    assert data["suppressed_writes"]["pid_output"] == 1
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
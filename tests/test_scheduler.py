@@ -0,0 +1,191 @@
+from datetime import timedelta
+
+import pytest
+
+from custom_components.simple_pid_controller.const import (
+    SCHEDULE_POLICY_CATCH_UP,
+    SCHEDULE_POLICY_SKIP,
+)
+from custom_components.simple_pid_controller.coordinator import PIDDataCoordinator
+from custom_components.simple_pid_controller.scheduler import (
+    TICK_SCHEDULER,
+    FixedRateTimer,
+    async_get_tick_scheduler,
+)
+
+
+class FakeLoop:
+    """Minimal loop clock that runs call_at callbacks when time is advanced."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.scheduled = []
+
+    def time(self):
+        return self.now
+
+    def call_at(self, when, callback):
+        handle = FakeHandle(when, callback)
+        self.scheduled.append(handle)
+        return handle
+
+    def advance_to(self, when):
+        """Run every pending callback due before ``when``, in deadline order."""
+        while True:
+            due = [h for h in self.scheduled if not h.cancelled and h.when <= when]
+            if not due:
+                break
+            handle = min(due, key=lambda h: h.when)
+            self.scheduled.remove(handle)
+            self.now = max(self.now, handle.when)
+            handle.callback()
+        self.now = when
+
+
+class FakeHandle:
+    def __init__(self, when, callback):
+        self.when = when
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def test_deadlines_do_not_drift():
+    """Each run re-arms on the absolute grid, regardless of its own duration."""
+    loop = FakeLoop()
+    fired = []
+    timer = None
+
+    def action():
+        fired.append(loop.time())
+        # the step takes 0.3 s before the timer is re-armed
+        loop.now += 0.3
+        timer.arm(1.0)
+
+    timer = FixedRateTimer(loop, action)
+    timer.arm(1.0)
+    loop.advance_to(110.5)
+
+    assert fired == pytest.approx([101.0 + n for n in range(10)])
+    assert timer.stats()["ticks"] == 10
+    assert timer.stats()["max_lateness"] == pytest.approx(0.0)
+
+
+def test_lateness_is_recorded():
+    """A wakeup after its deadline is reported as lateness."""
+    loop = FakeLoop()
+    timer = FixedRateTimer(loop, lambda: None)
+    timer.arm(1.0)
+
+    loop.now = 101.25
+    loop.scheduled[0].callback()
+
+    stats = timer.stats()
+    assert stats["last_lateness"] == pytest.approx(0.25)
+    assert stats["mean_lateness"] == pytest.approx(0.25)
+
+
+def test_rearm_keeps_phase_and_period_change_restarts_grid():
+    """Cancelling keeps the grid; a new period starts a new one."""
+    loop = FakeLoop()
+    timer = FixedRateTimer(loop, lambda: None)
+    timer.arm(1.0)
+    loop.now = 100.4
+    timer.cancel()
+    assert not timer.armed
+    timer.arm(1.0)
+    assert loop.scheduled[-1].when == pytest.approx(101.0)
+
+    timer.arm(2.0)
+    assert loop.scheduled[-1].when == pytest.approx(102.4)
+
+
+@pytest.mark.parametrize(
+    "policy, expected_when, expected_skipped",
+    [
+        (SCHEDULE_POLICY_SKIP, 104.0, 3),
+        (SCHEDULE_POLICY_CATCH_UP, 101.0, 0),
+    ],
+)
+def test_missed_deadlines_follow_policy(policy, expected_when, expected_skipped):
+    """Missed deadlines are skipped or fired immediately, depending on the policy."""
+    loop = FakeLoop()
+    timer = FixedRateTimer(loop, lambda: None, policy)
+    timer.arm(1.0)
+    timer.cancel()
+
+    # the loop was blocked past three deadlines
+    loop.now = 103.5
+    timer.arm(1.0)
+
+    assert loop.scheduled[-1].when == pytest.approx(expected_when)
+    assert timer.skipped_ticks == expected_skipped
+
+
+def test_reset_forgets_grid():
+    loop = FakeLoop()
+    timer = FixedRateTimer(loop, lambda: None)
+    timer.arm(1.0)
+    timer.reset()
+    assert timer.period is None
+    assert not timer.armed
+
+
+def test_aligned_timer_starts_on_multiple_of_period():
+    loop = FakeLoop()
+    loop.now = 100.3
+    timer = FixedRateTimer(loop, lambda: None, aligned=True)
+    timer.arm(2.0)
+    assert loop.scheduled[-1].when == pytest.approx(102.0)
+
+
+async def test_controllers_with_same_sample_time_share_one_wakeup(hass):
+    """Controllers with the same period are stepped from a single group timer."""
+    steps = []
+
+    def make_update(name):
+        async def update():
+            steps.append(name)
+            return 0.0
+
+        return update
+
+    coordinators = [
+        PIDDataCoordinator(hass, name, make_update(name), interval=interval)
+        for name, interval in (("a", 5), ("b", 5), ("c", 7))
+    ]
+    for coordinator in coordinators:
+        coordinator._schedule_refresh()
+
+    scheduler = async_get_tick_scheduler(hass)
+    assert sorted((g.period, len(g.members)) for g in scheduler.groups) == [
+        (5, 2),
+        (7, 1),
+    ]
+
+    # the deadlines of both groups are multiples of their period
+    group = coordinators[0]._tick_member.group
+    deadline = group.timer._deadline
+    assert deadline % 5 == pytest.approx(0) or deadline % 5 == pytest.approx(5)
+    group.timer._fire()
+    await hass.async_block_till_done()
+    assert sorted(steps) == ["a", "b"]
+    assert group.stats()["ticks"] == 1
+
+    for coordinator in coordinators:
+        await coordinator.async_shutdown()
+    assert TICK_SCHEDULER not in hass.data
+
+
+async def test_period_change_moves_controller_to_other_group(hass):
+    coordinator = PIDDataCoordinator(hass, "test", None, interval=5)
+    coordinator._schedule_refresh()
+    coordinator.update_interval = timedelta(seconds=2)
+    coordinator._schedule_refresh()
+
+    scheduler = async_get_tick_scheduler(hass)
+    assert [g.period for g in scheduler.groups] == [2]
+    await coordinator.async_shutdown()
+    assert TICK_SCHEDULER not in hass.data
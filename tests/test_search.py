@@ -0,0 +1,161 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+
+from homeassistant.exceptions import HomeAssistantError
+import numpy as np
+import pytest
+
+from custom_components.simple_pid_controller import SEARCH_POOL
+from custom_components.simple_pid_controller.const import DOMAIN
+from custom_components.simple_pid_controller.search import (
+    MAX_WORKERS,
+    SEARCH_GRID,
+    SEARCH_RANDOM,
+    SEARCH_REFINE,
+    default_bounds,
+    search_gains,
+)
+from custom_components.simple_pid_controller.simulation import FOPDTModel, simulate
+
+SEARCH = {"setpoint": 25.0, "duration": 1000, "initial": 15.0}
+
+
+def test_default_bounds_follow_process_gain_sign(process_model):
+    bounds = default_bounds(process_model)
+    assert all(lo == 0.0 and hi > 0.0 for lo, hi in bounds)
+    reverse = replace(process_model, gain=-process_model.gain)
+    assert all(lo < 0.0 and hi == 0.0 for lo, hi in default_bounds(reverse))
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"gain": 0.0},
+        {"gain": 1e-320},
+        {"gain": float("nan")},
+        {"time_constant": 0.0},
+    ],
+)
+def test_default_bounds_reject_degenerate_model(process_model, changes):
+    with pytest.raises(ValueError):
+        default_bounds(replace(process_model, **changes))
+
+
+@pytest.mark.parametrize("method", [SEARCH_GRID, SEARCH_RANDOM, SEARCH_REFINE])
+def test_search_finds_a_settling_tuning(process_model, method):
+    result = search_gains(
+        process_model, method=method, samples=200, workers=1, seed=3, **SEARCH
+    )
+
+    assert result.evaluated >= 200
+    assert result.top[0]["cost"] == result.cost
+    assert [entry["cost"] for entry in result.top] == sorted(
+        entry["cost"] for entry in result.top
+    )
+    check = simulate(
+        process_model, [(result.kp, result.ki, result.kd)], 25.0, 1000, 15.0
+    )
+    assert check.metrics["iae"][0] == pytest.approx(result.cost)
+    assert np.isfinite(check.metrics["settling_time"][0])
+
+
+def test_search_is_split_over_workers(process_model):
+    single = search_gains(process_model, samples=200, workers=1, **SEARCH)
+    with ThreadPoolExecutor(4) as executor:
+        split = search_gains(
+            process_model, samples=200, workers=4, executor=executor, **SEARCH
+        )
+    assert split == single
+
+
+def test_search_on_process_pool(process_model):
+    single = search_gains(process_model, samples=64, workers=1, **SEARCH)
+    pooled = search_gains(process_model, samples=64, workers=2, **SEARCH)
+    assert pooled == single
+
+
+@pytest.mark.usefixtures("recorded_history")
+async def test_tune_service_applies_gains(hass, config_entry):
+    handle = config_entry.runtime_data.handle
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "tune",
+        {
+            "entity_id": f"sensor.{config_entry.entry_id.lower()}_pid_output",
+            "samples": 100,
+            "kd_max": 0,
+            "workers": 1,
+            "apply": True,
+        },
+        blocking=True,
+        return_response=True,
+    )
+    await hass.async_block_till_done()
+
+    assert response["evaluated"] == 100
+    assert response["kd"] == 0.0
+    assert handle.params.kp == round(response["kp"], 4)
+    assert handle.params.ki == round(response["ki"], 4)
+    assert handle.params.kd == 0.0
+
+
+@pytest.mark.usefixtures("recorded_history")
+async def test_tune_service_rejects_flat_recording(hass, config_entry, monkeypatch):
+    async def fit_flat(hass, trace):
+        return FOPDTModel(
+            gain=0.0, time_constant=10.0, dead_time=0.0, bias=25.0, dt=1.0
+        )
+
+    monkeypatch.setattr(
+        "custom_components.simple_pid_controller._async_fit_model", fit_flat
+    )
+    with pytest.raises(HomeAssistantError, match="search bounds"):
+        await hass.services.async_call(
+            DOMAIN,
+            "tune",
+            {
+                "entity_id": f"sensor.{config_entry.entry_id.lower()}_pid_output",
+                "samples": 10,
+                "workers": 1,
+            },
+            blocking=True,
+            return_response=True,
+        )
+
+
+@pytest.mark.usefixtures("recorded_history")
+async def test_tune_service_reuses_one_capped_pool(hass, config_entry, monkeypatch):
+    pools = []
+
+    def create_pool(workers):
+        pools.append(ThreadPoolExecutor(workers))
+        return pools[-1]
+
+    monkeypatch.setattr(
+        "custom_components.simple_pid_controller.create_search_pool", create_pool
+    )
+    monkeypatch.setattr(
+        "custom_components.simple_pid_controller.search.os.cpu_count", lambda: 64
+    )
+    for _ in range(2):
+        response = await hass.services.async_call(
+            DOMAIN,
+            "tune",
+            {
+                "entity_id": f"sensor.{config_entry.entry_id.lower()}_pid_output",
+                "samples": 100,
+            },
+            blocking=True,
+            return_response=True,
+        )
+        assert response["evaluated"] == 100
+
+    assert len(pools) == 1
+    assert pools[0]._max_workers == MAX_WORKERS
+    assert hass.data[SEARCH_POOL] is pools[0]
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert SEARCH_POOL not in hass.data
+    assert pools[0]._shutdown
@@ -2,6 +2,7 @@ import pytest
 from datetime import timedelta
 from homeassistant.util.dt import utcnow
 from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from custom_components.simple_pid_controller import PIDParameters
 from custom_components.simple_pid_controller.select import (
     START_MODE_OPTIONS,
     PIDStartModeSelect,
@@ -18,6 +19,7 @@ async def test_pid_start_modes(hass, config_entry):
     setpoint = 50.0
 
     results = {}
+    now = utcnow()
 
     for start_mode in ["Zero start", "Startup value", "Last known value"]:
         # reset de PID state per iteratie
@@ -26,26 +28,25 @@ async def test_pid_start_modes(hass, config_entry):
         handle.last_known_output = 80.0
 
         handle.get_input_sensor_value = lambda: base_input
-        handle.get_select = lambda key: start_mode if key == "start_mode" else None
-        handle.get_number = lambda key: {
-            "kp": 1.0,
-            "ki": 0.1,
-            "kd": 0.01,
-            "setpoint": setpoint,
-            "starting_output": 50.0,
-            "sample_time": sample_time,
-            "output_min": 0.0,
-            "output_max": 100.0,
-        }[key]
-        handle.get_switch = lambda key: True
+        handle.params = PIDParameters(
+            kp=1.0,
+            ki=0.1,
+            kd=0.01,
+            setpoint=setpoint,
+            starting_output=50.0,
+            sample_time=sample_time,
+            output_min=0.0,
+            output_max=100.0,
+            start_mode=start_mode,
+        )
 
         # trigger initial update
         hass.bus.async_fire("homeassistant_started")
         await hass.async_block_till_done()
 
-        # simulate one PID update
-        future = utcnow() + timedelta(seconds=sample_time)
-        async_fire_time_changed(hass, future)
+        # simulate one PID update; ticks are on a fixed grid, so advance cumulatively
+        now += timedelta(seconds=sample_time)
+        async_fire_time_changed(hass, now)
         await hass.async_block_till_done()
 
         out_entity = f"sensor.{config_entry.entry_id}_pid_output"
@@ -93,9 +94,7 @@ async def test_async_select_option_applies_only_valid_options(
     write_calls.clear()
     await select.async_select_option("not_an_option")
     assert select._attr_current_option == valid_option
-    assert (
-        not write_calls
-    ), "async_write_ha_state should not be called for an invalid option"
+    assert not write_calls, "invalid option should not write the state"
 
 
 @pytest.mark.usefixtures("setup_integration")
@@ -158,3 +157,21 @@ async def test_async_added_to_hass_invalid_last_state(hass, config_entry, monkey
     await select.async_added_to_hass()
 
     assert select._attr_current_option == default_option
+
+
+@pytest.mark.usefixtures("setup_integration")
+async def test_select_option_pushed_to_parameter_snapshot(hass, config_entry):
+    """Selecting a start mode updates handle.params.start_mode."""
+    handle = config_entry.runtime_data.handle
+    assert handle.params.start_mode == START_MODE_OPTIONS[0]
+
+    await hass.services.async_call(
+        "select",
+        "select_option",
+        {
+            "entity_id": handle._get_entity_id("select", "start_mode"),
+            "option": START_MODE_OPTIONS[2],
+        },
+        blocking=True,
+    )
+    assert handle.params.start_mode == START_MODE_OPTIONS[2]
@@ -7,6 +7,7 @@ from custom_components.simple_pid_controller.sensor import (
     PIDOutputSensor,
 )
 from custom_components.simple_pid_controller.coordinator import PIDDataCoordinator
+from custom_components.simple_pid_controller import PIDParameters, PIDStepResult
 from custom_components.simple_pid_controller.sensor import async_setup_entry
 from custom_components.simple_pid_controller import async_unload_entry
 from custom_components.simple_pid_controller import sensor as sensor_module
@@ -21,20 +22,17 @@ async def test_pid_output_and_contributions_update(hass, config_entry):
     handle = config_entry.runtime_data.handle
 
     handle.get_input_sensor_value = lambda: 10.0
-    handle.get_select = lambda key: {
-        "start_mode": "Startup value",
-    }[key]
-    handle.get_number = lambda key: {
-        "kp": 1.0,
-        "ki": 0.1,
-        "kd": 0.01,
-        "setpoint": 20.0,
-        "starting_output": 50.0,
-        "sample_time": sample_time,
-        "output_min": 0.0,
-        "output_max": 100.0,
-    }[key]
-    handle.get_switch = lambda key: True
+    handle.params = PIDParameters(
+        kp=1.0,
+        ki=0.1,
+        kd=0.01,
+        setpoint=20.0,
+        starting_output=50.0,
+        sample_time=sample_time,
+        output_min=0.0,
+        output_max=100.0,
+        start_mode="Startup value",
+    )
 
     # 1) trigger initial update
     hass.bus.async_fire("homeassistant_started")
@@ -51,14 +49,33 @@ async def test_pid_output_and_contributions_update(hass, config_entry):
     assert state is not None
     assert float(state.state) != 0
 
+    # every step is recorded in the history
+    assert len(handle.history) >= 1
+    assert handle.history.latest("input") == 10.0
+    assert handle.history.latest("setpoint") == 20.0
+    assert handle.history.latest("output") == pytest.approx(
+        float(state.state), abs=0.01
+    )
+
 
 @pytest.mark.usefixtures("setup_integration")
 @pytest.mark.asyncio
 async def test_pid_contribution_native_value_rounding_and_none(hass, config_entry):
     """Test that PIDContributionSensor.native_value rounds correctly and returns None for unknown key."""
     handle = config_entry.runtime_data.handle
-    # Provide known contributions
-    handle.last_contributions = (0.1234, 1.9876, 2.5555, 3.3789)
+    # Provide a known step result
+    handle.last_step = PIDStepResult(
+        timestamp=0.0,
+        input=25.0,
+        setpoint=50.0,
+        output=5.0,
+        p=0.1234,
+        i=1.9876,
+        d=2.5555,
+        i_delta=3.3789,
+        error=-25.0,
+        dt=None,
+    )
     coordinator = PIDDataCoordinator(hass, "test", lambda: 0, interval=1)
 
     # Map contribution keys to expected values
@@ -107,46 +124,29 @@ async def test_pid_contribution_native_value_rounding_and_none(hass, config_entr
 @pytest.mark.usefixtures("setup_integration")
 @pytest.mark.asyncio
 async def test_listeners_trigger_refresh_sensor(hass, config_entry, monkeypatch):
-    """Lines 131-132: coordinator.async_request_refresh called on sensor state change."""
-    # Prepare handle
+    """coordinator.async_request_refresh is called only for parameter state changes."""
     handle = config_entry.runtime_data.handle
-    handle.get_input_sensor_value = lambda: 0.0
-    handle.get_number = lambda key: 0.0
-    handle.get_switch = lambda key: True
-
-    # Capture listeners
-    listeners = []
-    monkeypatch.setattr(
-        type(hass.bus),
-        "async_listen",
-        lambda self, event, cb: listeners.append((event, cb)),
-    )
-
-    # Run setup to register listeners
-    entities = []
-    await async_setup_entry(hass, config_entry, lambda ents: entities.extend(ents))
-    coordinator = entities[0].coordinator
+    coordinator = config_entry.runtime_data.coordinator
 
-    # Patch refresh method
     called = []
-    monkeypatch.setattr(
-        coordinator, "async_request_refresh", lambda: called.append(True)
-    )
 
-    # Simulate state change event for kp
-    entry_id = config_entry.entry_id
-    test_entity = f"number.{entry_id}_kp"
-    callback = next(cb for evt, cb in listeners if evt == "state_changed")
+    async def fake_refresh():
+        called.append(True)
 
-    from types import SimpleNamespace
+    # The subscription holds the bound method, so resubscribe with the fake
+    handle.async_subscribe_parameters(fake_refresh)
 
-    event = SimpleNamespace(data={"entity_id": test_entity})
-    callback(event)
-    assert (
-        called
-    ), "Coordinator.async_request_refresh was not called on sensor state change"
+    # Unrelated entities are not dispatched
+    hass.states.async_set("sensor.unrelated", "1")
+    await hass.async_block_till_done()
+    assert not called
 
-    await async_unload_entry(hass, config_entry)
+    kp_entity = handle._get_entity_id("number", "kp")
+    hass.states.async_set(kp_entity, "2.0")
+    await hass.async_block_till_done()
+    assert called, "no refresh was requested on the parameter state change"
+
+    handle.async_subscribe_parameters(coordinator.async_request_refresh)
 
 
 @pytest.mark.usefixtures("setup_integration")
@@ -156,9 +156,6 @@ async def test_update_pid_raises_on_missing_input(hass, config_entry):
     handle = config_entry.runtime_data.handle
     # Force no input value
     handle.get_input_sensor_value = lambda: None
-    # Provide defaults for numbers and switches
-    handle.get_number = lambda key: 0.0
-    handle.get_switch = lambda key: True
     # Setup entry to get coordinator with update_method
     entities: list = []
     await async_setup_entry(hass, config_entry, lambda e: entities.extend(e))
@@ -182,21 +179,20 @@ async def test_update_pid_output_limits_none_when_windup_protection_disabled(
 
     # init handle
     handle = config_entry.runtime_data.handle
-    handle.last_contributions = (0.0, 0.0, 0.0, 0.0)
     handle.last_known_output = 0.0
     handle.get_input_sensor_value = lambda: 10.0
-    handle.get_number = lambda key: {
-        "kp": 1.0,
-        "ki": 0.1,
-        "kd": 0.01,
-        "setpoint": 5.0,
-        "starting_output": 0.0,
-        "sample_time": 5.0,
-        "output_min": 0.0,
-        "output_max": 100.0,
-    }.get(key, 0.0)
-    handle.get_switch = lambda key: False if key == "windup_protection" else True
-    handle.get_select = lambda key: "Zero start" if key == "start_mode" else None
+    handle.params = PIDParameters(
+        kp=1.0,
+        ki=0.1,
+        kd=0.01,
+        setpoint=5.0,
+        starting_output=0.0,
+        sample_time=5.0,
+        output_min=0.0,
+        output_max=100.0,
+        windup_protection=False,
+        start_mode="Zero start",
+    )
 
     coordinator = config_entry.runtime_data.coordinator
     await coordinator.update_method()
@@ -270,21 +266,19 @@ async def test_update_pid_invalid_start_mode_defaults(
 
     # Prepare the handle
     handle = config_entry.runtime_data.handle
-    handle.last_contributions = (0.0, 0.0, 0.0, 0.0)
     handle.last_known_output = 99.9  # some non‐zero initial
     handle.get_input_sensor_value = lambda: 10.0
-    handle.get_number = lambda key: {
-        "kp": 1.0,
-        "ki": 0.1,
-        "kd": 0.01,
-        "setpoint": 5.0,
-        "starting_output": 0.0,
-        "sample_time": 5.0,
-        "output_min": 0.0,
-        "output_max": 100.0,
-    }[key]
-    handle.get_switch = lambda key: True
-    handle.get_select = lambda key: "Invalid Mode" if key == "start_mode" else None
+    handle.params = PIDParameters(
+        kp=1.0,
+        ki=0.1,
+        kd=0.01,
+        setpoint=5.0,
+        starting_output=0.0,
+        sample_time=5.0,
+        output_min=0.0,
+        output_max=100.0,
+        start_mode="Invalid Mode",
+    )
 
     # Run setup and trigger one PID update
     entities = []
@@ -322,20 +316,18 @@ async def test_update_pid_uses_last_known_value(
 
     handle = config_entry.runtime_data.handle
     handle.last_known_output = 73.5
-    handle.last_contributions = (0.0, 0.0, 0.0, 0.0)
     handle.get_input_sensor_value = lambda: 10.0
-    handle.get_number = lambda key: {
-        "kp": 1.0,
-        "ki": 0.1,
-        "kd": 0.01,
-        "setpoint": 5.0,
-        "starting_output": 0.0,
-        "sample_time": 5.0,
-        "output_min": 0.0,
-        "output_max": 100.0,
-    }[key]
-    handle.get_switch = lambda key: True
-    handle.get_select = lambda key: "Last known value" if key == "start_mode" else None
+    handle.params = PIDParameters(
+        kp=1.0,
+        ki=0.1,
+        kd=0.01,
+        setpoint=5.0,
+        starting_output=0.0,
+        sample_time=5.0,
+        output_min=0.0,
+        output_max=100.0,
+        start_mode="Last known value",
+    )
 
     entities = []
     await sensor_module.async_setup_entry(
@@ -352,29 +344,52 @@ async def test_update_pid_uses_last_known_value(
 
 
 @pytest.mark.usefixtures("setup_integration")
-def test_pid_contribution_error_when_input_or_setpoint_none(hass, config_entry):
-    """Line 258: native_value for 'error' should be 0 when input or setpoint is None."""
+def test_pid_contribution_error_without_step_or_setpoint(hass, config_entry):
+    """The error sensor is unknown before the first step and without a setpoint."""
     handle = config_entry.runtime_data.handle
-    handle.last_contributions = (1.0, 2.0, 3.0, 4.0)
     coordinator = PIDDataCoordinator(hass, "test", lambda: 0, interval=1)
-
-    # Case 1: input_value is None → error = 0
-    handle.get_input_sensor_value = lambda: None
-    handle.get_number = lambda key: 5.0
     sensor = PIDContributionSensor(
         hass, config_entry, "error", "Error Sensor", coordinator
     )
-    assert sensor._handle is handle
-    assert sensor.native_value == 0
 
-    # Case 2: setpoint is None → error = 0
-    handle.get_input_sensor_value = lambda: 10.0
-    handle.get_number = lambda key: None
-    sensor = PIDContributionSensor(
-        hass, config_entry, "error", "Error Sensor", coordinator
+    handle.last_step = None
+    assert sensor.native_value is None
+
+    handle.last_step = PIDStepResult(
+        0.0, 10.0, None, 1.0, 1.0, 2.0, 3.0, 4.0, None, None
     )
-    assert sensor._handle is handle
-    assert sensor.native_value == 0
+    assert sensor.native_value is None
+
+
+@pytest.mark.usefixtures("setup_integration")
+async def test_contribution_sensors_read_the_step_record(hass, config_entry):
+    """The sensors show the input and setpoint of the step, not the live states."""
+    handle = config_entry.runtime_data.handle
+    coordinator = config_entry.runtime_data.coordinator
+    handle.params = PIDParameters(
+        kp=1.0,
+        ki=0.0,
+        kd=0.0,
+        setpoint=30.0,
+        sample_time=5.0,
+        output_min=-100.0,
+        output_max=100.0,
+    )
+    handle.get_input_sensor_value = lambda: 25.0
+    await coordinator.async_refresh()
+
+    step = handle.last_step
+    assert (step.input, step.setpoint, step.error) == (25.0, 30.0, -5.0)
+    assert step.output == step.p == 5.0
+
+    # later changes of the input do not leak into the sensors of this step
+    handle.get_input_sensor_value = lambda: 99.0
+    error = PIDContributionSensor(hass, config_entry, "error", "Error", coordinator)
+    p_term = PIDContributionSensor(
+        hass, config_entry, "pid_p_contrib", "P contribution", coordinator
+    )
+    assert error.native_value == -5.0
+    assert p_term.native_value == 5.0
 
 
 @pytest.mark.usefixtures("setup_integration")
@@ -389,18 +404,17 @@ async def test_update_pid_adjusts_update_interval(hass, config_entry, monkeypatc
     sample_time = 5
 
     handle.get_input_sensor_value = lambda: 10.0
-    handle.get_select = lambda key: {"start_mode": "Startup value"}[key]
-    handle.get_number = lambda key: {
-        "kp": 1.0,
-        "ki": 0.1,
-        "kd": 0.01,
-        "setpoint": 20.0,
-        "starting_output": 0.0,
-        "sample_time": sample_time,
-        "output_min": 0.0,
-        "output_max": 100.0,
-    }[key]
-    handle.get_switch = lambda key: True
+    handle.params = PIDParameters(
+        kp=1.0,
+        ki=0.1,
+        kd=0.01,
+        setpoint=20.0,
+        starting_output=0.0,
+        sample_time=sample_time,
+        output_min=0.0,
+        output_max=100.0,
+        start_mode="Startup value",
+    )
 
     entities = []
     await async_setup_entry(hass, config_entry, lambda e: entities.extend(e))
@@ -412,6 +426,7 @@ async def test_update_pid_adjusts_update_interval(hass, config_entry, monkeypatc
     assert coordinator.update_interval == timedelta(seconds=sample_time)
 
     sample_time = 15
+    handle.params.sample_time = sample_time
     await coordinator.update_method()
     assert coordinator.update_interval == timedelta(seconds=sample_time)
 
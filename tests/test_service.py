@@ -24,7 +24,7 @@ async def test_set_output_manual(hass, config_entry):
     assert coordinator.data == 0.5
     # Ensure that the PID controller's internal output is updated when
     # auto mode is disabled.
-    assert handle.pid._last_output == 0.5
+    assert handle.pid.last_output == 0.5
 
 
 @pytest.mark.usefixtures("setup_integration")
@@ -47,7 +47,7 @@ async def test_set_output_manual_target(hass, config_entry):
 
     assert handle.last_known_output == 0.5
     assert coordinator.data == 0.5
-    assert handle.pid._last_output == 0.5
+    assert handle.pid.last_output == 0.5
 
 
 @pytest.mark.usefixtures("setup_integration")
@@ -84,11 +84,11 @@ async def test_set_output_preset_startup(monkeypatch, hass, config_entry):
         blocking=True,
     )
     await hass.async_block_till_done()
-    assert handle.get_number("starting_output") == 0.4
+    assert handle.params.starting_output == 0.4
 
     handle.pid.auto_mode = True
     mock_set = MagicMock()
-    handle.pid.set_auto_mode = mock_set
+    monkeypatch.setattr(type(handle.pid), "set_auto_mode", mock_set)
     mock_refresh = AsyncMock()
     coordinator.async_request_refresh = mock_refresh
 
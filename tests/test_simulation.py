@@ -0,0 +1,128 @@
+import math
+
+from homeassistant.exceptions import HomeAssistantError
+import numpy as np
+import pytest
+
+from custom_components.simple_pid_controller.const import DOMAIN
+from custom_components.simple_pid_controller.history import (
+    HISTORY_FIELDS,
+    HistoryBuffer,
+)
+from custom_components.simple_pid_controller.pid import PID
+from custom_components.simple_pid_controller.simulation import (
+    FOPDTModel,
+    Trace,
+    performance_metrics,
+    replay,
+    simulate,
+)
+
+
+def test_fit_recovers_model(process_model, open_loop_trace):
+    model = FOPDTModel.fit(open_loop_trace)
+    assert model.gain == pytest.approx(process_model.gain, rel=1e-6)
+    assert model.time_constant == pytest.approx(process_model.time_constant, rel=1e-6)
+    assert model.dead_time == process_model.dead_time
+    assert model.bias == pytest.approx(process_model.bias, rel=1e-6)
+
+
+def test_replay_matches_pid_core(open_loop_trace):
+    trace = open_loop_trace
+    result = replay(trace, [(1.0, 0.1, 0.5), (2.0, 0.0, 0.0)], output_limits=(0, 10))
+
+    pid = PID(1.0, 0.1, 0.5, setpoint=20.0, output_limits=(0, 10), sample_time=None)
+    expected = []
+    for value, dt in zip(trace.input, trace.dt):
+        expected.append(pid.step(value, dt=dt))
+    assert result.output[0].tolist() == [r.output for r in expected]
+    assert result.i[0].tolist() == [r.i for r in expected]
+    assert result.p[1].tolist() == [2.0 * (20.0 - v) for v in trace.input]
+
+
+def test_simulate_compares_candidates(process_model):
+    tunings = [(0.3, 0.01, 0.0), (0.6, 0.02, 0.0), (2.0, 0.05, 0.0), (0, 0, 0)]
+    result = simulate(
+        process_model, tunings, setpoint=25.0, duration=1500, initial=15.0
+    )
+
+    assert result.measured.shape == (4, 300)
+    # both moderate controllers settle, the faster one with a lower IAE
+    assert result.measured[0, -1] == pytest.approx(25.0, abs=0.01)
+    assert result.measured[1, -1] == pytest.approx(25.0, abs=0.01)
+    assert result.metrics["iae"][1] < result.metrics["iae"][0]
+    assert result.metrics["overshoot"][0] == 0.0
+    assert result.metrics["overshoot"][1] > 0.0
+    # too much gain for the dead time oscillates
+    assert result.metrics["settling_time"][2] == math.inf
+    # without gains the process stays where it is
+    assert np.all(result.measured[3] == 15.0)
+    assert result.summary(1)["kp"] == 0.6
+
+
+def test_performance_metrics():
+    time = np.arange(6.0)
+    measured = np.array([0.0, 5.0, 12.0, 10.5, 10.0, 10.0])
+    metrics = performance_metrics(time, measured, 10.0)
+    assert metrics["iae"][0] == pytest.approx(5 + 2 + 0.5)
+    assert metrics["ise"][0] == pytest.approx(25 + 4 + 0.25)
+    assert metrics["overshoot"][0] == pytest.approx(20.0)
+    assert metrics["settling_time"][0] == 4.0
+
+
+def test_trace_loaders(tmp_path):
+    history = HistoryBuffer(4)
+    for n in range(6):
+        values = {field: float(n) for field in HISTORY_FIELDS}
+        values["input"] = None if n == 3 else float(n)
+        history.append(*(values[field] for field in HISTORY_FIELDS))
+    trace = Trace.from_history(history)
+    assert trace.input.tolist() == [2.0, 4.0, 5.0]
+
+    path = tmp_path / "export.csv"
+    path.write_text(
+        "timestamp,input,output,setpoint\n1,20,0,21\n2,,1,21\n3,20.5,2,21\n"
+    )
+    trace = Trace.from_csv(path)
+    assert trace.timestamp.tolist() == [1.0, 3.0]
+    assert trace.output.tolist() == [0.0, 2.0]
+
+    with pytest.raises(ValueError):
+        Trace.from_trace_file(tmp_path / "missing.trace")
+
+
+@pytest.mark.usefixtures("recorded_history")
+async def test_simulate_service(hass, config_entry, process_model, open_loop_trace):
+    handle = config_entry.runtime_data.handle
+    entity_id = f"sensor.{config_entry.entry_id.lower()}_pid_output"
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "simulate",
+        {"entity_id": entity_id, "kp": 0.5, "ki": 0.01, "include_samples": True},
+        blocking=True,
+        return_response=True,
+    )
+    assert response["model"]["gain"] == pytest.approx(process_model.gain, rel=1e-3)
+    assert response["candidate"]["kp"] == 0.5
+    assert response["current"]["kp"] == handle.params.kp
+    assert len(response["series"]["output"]) == len(response["series"]["time"])
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "simulate",
+        {"entity_id": entity_id, "mode": "replay"},
+        blocking=True,
+        return_response=True,
+    )
+    assert response["samples"] == len(open_loop_trace)
+    assert response["candidate"]["iae"] == response["current"]["iae"]
+
+    with pytest.raises(HomeAssistantError):
+        await hass.services.async_call(
+            DOMAIN,
+            "simulate",
+            {"entity_id": entity_id, "source": "trace"},
+            blocking=True,
+            return_response=True,
+        )
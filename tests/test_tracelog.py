@@ -0,0 +1,168 @@
+import asyncio
+import math
+import threading
+import time
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.simple_pid_controller.const import (
+    CONF_NAME,
+    CONF_SENSOR_ENTITY_ID,
+    CONF_TRACE_ENABLED,
+    DOMAIN,
+)
+from custom_components.simple_pid_controller.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from custom_components.simple_pid_controller.tracelog import (
+    CHUNK_RECORDS,
+    HEADER_SIZE,
+    RECORD_SIZE,
+    TraceReader,
+    TraceWriter,
+    remove_trace,
+    rotated_paths,
+    trace_summary,
+)
+
+
+def record(n, dt=1.0):
+    return (1000.0 + n, 20.0, 21.0, 50.0 + n, 1.0, 2.0, 3.0, dt)
+
+
+async def test_written_records_are_read_back(hass, tmp_path):
+    path = tmp_path / "pid.trace"
+    writer = TraceWriter(hass, path, max_bytes=1024 * 1024)
+    writer.append(*record(0, dt=None))
+    for n in range(1, 5):
+        writer.append(*record(n))
+    await writer.async_flush()
+
+    with TraceReader(path) as reader:
+        assert len(reader) == 5
+        assert math.isnan(reader.records["dt"][0])
+        assert reader.records["output"].tolist() == [50.0, 51.0, 52.0, 53.0, 54.0]
+        assert reader.between(1001.0, 1003.0)["timestamp"].tolist() == [
+            1001.0,
+            1002.0,
+        ]
+    assert writer.stats()["records_written"] == 5
+
+
+async def test_full_chunk_is_written_in_background(hass, tmp_path):
+    path = tmp_path / "pid.trace"
+    writer = TraceWriter(hass, path, max_bytes=1024 * 1024)
+    for n in range(CHUNK_RECORDS):
+        writer.append(*record(n))
+    await hass.async_block_till_done()
+
+    assert path.stat().st_size == HEADER_SIZE + CHUNK_RECORDS * RECORD_SIZE
+    assert writer.stats()["records_buffered"] == 0
+
+
+async def test_trace_is_rotated_by_size(hass, tmp_path):
+    path = tmp_path / "pid.trace"
+    # the smallest size holds one chunk
+    writer = TraceWriter(hass, path, max_bytes=0)
+    for chunk in range(4):
+        for n in range(CHUNK_RECORDS):
+            writer.append(*record(chunk * CHUNK_RECORDS + n))
+        await writer.async_flush()
+
+    assert writer.rotations == 3
+    existing = [p for p in rotated_paths(path) if p.exists()]
+    assert [p.name for p in existing] == ["pid.trace.2", "pid.trace.1", "pid.trace"]
+
+    summary = trace_summary(path, last=3)
+    assert [f["records"] for f in summary["files"]] == [CHUNK_RECORDS] * 3
+    assert [r["timestamp"] for r in summary["last_records"]] == [
+        1000.0 + 4 * CHUNK_RECORDS - 3,
+        1000.0 + 4 * CHUNK_RECORDS - 2,
+        1000.0 + 4 * CHUNK_RECORDS - 1,
+    ]
+
+
+async def test_writes_never_overlap(hass, tmp_path):
+    path = tmp_path / "pid.trace"
+    writer = TraceWriter(
+        hass, path, max_bytes=HEADER_SIZE + 3 * CHUNK_RECORDS * RECORD_SIZE
+    )
+    lock = threading.Lock()
+    active = []
+    overlaps = []
+    write = writer._write
+
+    def slow_write(data):
+        with lock:
+            active.append(True)
+            overlaps.append(len(active))
+        time.sleep(0.01)
+        write(data)
+        with lock:
+            active.pop()
+
+    writer._write = slow_write
+    n = 0
+    flushes = []
+    for _ in range(6):
+        # a full chunk starts a background write, the flush races with it
+        for _ in range(CHUNK_RECORDS + 5):
+            writer.append(*record(n))
+            n += 1
+        flushes.append(hass.async_create_task(writer.async_flush()))
+        await asyncio.sleep(0)
+    await asyncio.gather(*flushes)
+    await hass.async_block_till_done()
+
+    assert max(overlaps) == 1
+    timestamps = []
+    for file_path in rotated_paths(path):
+        if file_path.exists():
+            with TraceReader(file_path) as reader:
+                timestamps += reader.records["timestamp"].tolist()
+    assert timestamps == sorted(timestamps)
+    assert timestamps[-1] == 1000.0 + n - 1
+
+
+def test_remove_trace(tmp_path):
+    path = tmp_path / "pid.trace"
+    for file_path in rotated_paths(path):
+        file_path.write_bytes(b"")
+    (tmp_path / "other.trace").write_bytes(b"")
+    remove_trace(path)
+    assert [p.name for p in tmp_path.iterdir()] == ["other.trace"]
+
+
+def test_reader_rejects_other_files(tmp_path):
+    path = tmp_path / "other.trace"
+    path.write_bytes(b"not a trace file at all")
+    with pytest.raises(ValueError):
+        TraceReader(path)
+
+
+async def test_steps_are_traced_when_enabled(hass, tmp_path):
+    hass.config.config_dir = str(tmp_path)
+    hass.states.async_set("sensor.trace_input", "20.0")
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        entry_id="trace1",
+        data={CONF_SENSOR_ENTITY_ID: "sensor.trace_input", CONF_NAME: "trace1"},
+        options={CONF_TRACE_ENABLED: True},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = entry.runtime_data.coordinator
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    trace = diagnostics["data"]["trace"]
+    assert trace["records_written"] >= 2
+    assert trace["last_records"][-1]["input"] == 20.0
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert (tmp_path / DOMAIN / "trace1.trace").exists()
@@ -1,29 +1,50 @@
 import pytest
 
-from custom_components.simple_pid_controller.sensor import async_setup_entry
+import custom_components.simple_pid_controller as pid_module
+from custom_components.simple_pid_controller.const import PARAMETER_ENTITIES
 
 
 @pytest.mark.usefixtures("setup_integration")
 @pytest.mark.asyncio
 async def test_listeners_removed_after_unload(hass, config_entry, monkeypatch):
-    """Ensure state change listeners are unsubscribed when the entry unloads."""
+    """Ensure state change subscriptions are removed when the entry unloads."""
     created = []
     called = []
 
-    def fake_listen(self, event, callback):
+    def fake_track(hass_, entity_ids, action):
+        created.append(list(entity_ids))
+
         def unsub():
             called.append(True)
 
-        created.append(unsub)
         return unsub
 
-    monkeypatch.setattr(type(hass.bus), "async_listen", fake_listen)
+    monkeypatch.setattr(pid_module, "async_track_state_change_event", fake_track)
 
-    await async_setup_entry(hass, config_entry, lambda e: None)
+    assert await hass.config_entries.async_reload(config_entry.entry_id)
+    await hass.async_block_till_done()
 
-    # Expect listeners created for all parameters
-    assert len(created) > 0
+    # One subscription covering every resolved parameter entity, one for the input
+    assert len(created) == 2
+    assert len(created[0]) == len(PARAMETER_ENTITIES)
+    assert created[1] == [config_entry.data["sensor_entity_id"]]
 
     await hass.config_entries.async_unload(config_entry.entry_id)
 
     assert len(called) == len(created)
+
+
+@pytest.mark.usefixtures("setup_integration")
+@pytest.mark.asyncio
+async def test_subscription_follows_renamed_entity(hass, config_entry):
+    """A renamed parameter entity is resubscribed under its new entity_id."""
+    from homeassistant.helpers import entity_registry as er
+
+    handle = config_entry.runtime_data.handle
+    old_id = handle._get_entity_id("number", "kd")
+
+    er.async_get(hass).async_update_entity(old_id, new_entity_id="number.renamed_kd")
+    await hass.async_block_till_done()
+
+    assert "number.renamed_kd" in handle._parameter_index
+    assert old_id not in handle._parameter_index
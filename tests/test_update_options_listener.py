@@ -1,7 +1,22 @@
 import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.simple_pid_controller.const import DOMAIN
+from custom_components.simple_pid_controller.const import (
+    CONF_COALESCE_WINDOW,
+    CONF_CONTROL_MODE,
+    CONF_FILTER_EMA_TIME_CONSTANT,
+    CONF_HISTORY_SIZE,
+    CONF_INPUT_RANGE_MAX,
+    CONF_INPUT_RANGE_MIN,
+    CONF_PROFILING,
+    CONF_SCHEDULE_POLICY,
+    CONF_SENSOR_ENTITY_ID,
+    CONF_STEP_PREFIX,
+    CONTROL_MODE_ON_INPUT_CHANGE,
+    DEFAULT_HISTORY_SIZE,
+    DOMAIN,
+    SCHEDULE_POLICY_CATCH_UP,
+)
 from custom_components.simple_pid_controller import _async_update_options_listener
 
 
@@ -19,3 +34,167 @@ async def test_async_update_options_listener_reload_called_once(hass, monkeypatc
     await _async_update_options_listener(hass, entry)
 
     assert calls == [entry.entry_id]
+
+
+@pytest.fixture
+def reloads(hass, monkeypatch):
+    """Record reloads instead of running them."""
+    calls = []
+
+    async def fake_reload(entry_id):
+        calls.append(entry_id)
+
+    monkeypatch.setattr(hass.config_entries, "async_reload", fake_reload)
+    return calls
+
+
+async def submit_options(hass, entry, **changes):
+    """Submit the options flow with the current values and ``changes``."""
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input=changes
+    )
+    await hass.async_block_till_done()
+    return result
+
+
+@pytest.mark.usefixtures("setup_integration")
+async def test_first_options_submit_applied_in_place(hass, config_entry, reloads):
+    """The flow writes the defaults of every option on an entry never edited."""
+    assert config_entry.options == {}
+    handle = config_entry.runtime_data.handle
+    pid = handle.pid
+
+    await submit_options(hass, config_entry, **{f"{CONF_STEP_PREFIX}kp": 0.5})
+
+    assert config_entry.options[CONF_HISTORY_SIZE] == DEFAULT_HISTORY_SIZE
+    assert reloads == []
+    assert handle.pid is pid
+    kp = hass.states.get(f"number.{config_entry.entry_id.lower()}_kp")
+    assert kp.attributes["step"] == 0.5
+
+    # submitting the same values again changes nothing
+    assert handle.changed_options(config_entry.options) == set()
+
+
+@pytest.mark.usefixtures("setup_integration")
+async def test_step_and_range_options_applied_in_place(hass, config_entry, reloads):
+    handle = config_entry.runtime_data.handle
+    pid = handle.pid
+    setpoint_id = f"number.{config_entry.entry_id.lower()}_setpoint"
+    assert float(hass.states.get(setpoint_id).state) == 50.0
+
+    await submit_options(
+        hass,
+        config_entry,
+        **{
+            f"{CONF_STEP_PREFIX}kp": 0.5,
+            f"{CONF_STEP_PREFIX}setpoint": 0.5,
+            CONF_INPUT_RANGE_MIN: 0.0,
+            CONF_INPUT_RANGE_MAX: 40.0,
+        },
+    )
+
+    assert reloads == []
+    assert handle.pid is pid
+    assert handle.input_range_max == 40.0
+    kp = hass.states.get(f"number.{config_entry.entry_id.lower()}_kp")
+    assert kp.attributes["step"] == 0.5
+    setpoint = hass.states.get(setpoint_id)
+    assert setpoint.attributes["step"] == 0.5
+    assert setpoint.attributes["max"] == 40.0
+    # the setpoint is clamped to the new range
+    assert float(setpoint.state) == 40.0
+    assert handle.params.setpoint == 40.0
+
+
+@pytest.mark.usefixtures("setup_integration")
+async def test_input_sensor_swap_resubscribes(hass, config_entry, reloads):
+    handle = config_entry.runtime_data.handle
+    hass.states.async_set("sensor.other_input", "10.0")
+    hass.config_entries.async_update_entry(
+        config_entry, options={CONF_SENSOR_ENTITY_ID: "sensor.other_input"}
+    )
+    await hass.async_block_till_done()
+
+    assert reloads == []
+    assert handle.sensor_entity_id == "sensor.other_input"
+    assert handle.get_input_sensor_value() == 10.0
+
+    samples = []
+    handle._input_action = lambda: samples.append(True)
+    hass.states.async_set("sensor.test_input", "26.0")
+    hass.states.async_set("sensor.other_input", "11.0")
+    await hass.async_block_till_done()
+    assert samples == [True]
+
+
+async def test_input_sensor_swap_has_no_derivative_kick(hass, config_entry, reloads):
+    """The first step on a new input neither kicks D nor uses the old filter."""
+    hass.config_entries.async_update_entry(
+        config_entry,
+        options={CONF_FILTER_EMA_TIME_CONSTANT: 60.0},
+        pref_disable_polling=True,
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    handle = config_entry.runtime_data.handle
+    coordinator = config_entry.runtime_data.coordinator
+    handle.params.kd = 5.0
+    await coordinator.async_refresh()
+    assert handle.last_step.filtered_input == 25.0
+
+    hass.states.async_set("sensor.other_input", "10.0")
+    hass.config_entries.async_update_entry(
+        config_entry,
+        options={
+            CONF_FILTER_EMA_TIME_CONSTANT: 60.0,
+            CONF_SENSOR_ENTITY_ID: "sensor.other_input",
+        },
+    )
+    await hass.async_block_till_done()
+    await coordinator.async_refresh()
+
+    assert reloads == []
+    assert handle.last_step.filtered_input == 10.0
+    assert handle.last_step.d == 0
+    assert handle.pid.components[2] == 0
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.usefixtures("setup_integration")
+async def test_scheduling_options_applied_in_place(hass, config_entry, reloads):
+    coordinator = config_entry.runtime_data.coordinator
+    hass.config_entries.async_update_entry(
+        config_entry,
+        options={
+            CONF_CONTROL_MODE: CONTROL_MODE_ON_INPUT_CHANGE,
+            CONF_COALESCE_WINDOW: 1.0,
+            CONF_SCHEDULE_POLICY: SCHEDULE_POLICY_CATCH_UP,
+        },
+    )
+    await hass.async_block_till_done()
+
+    assert reloads == []
+    assert coordinator is config_entry.runtime_data.coordinator
+    assert coordinator.control_mode == CONTROL_MODE_ON_INPUT_CHANGE
+    assert coordinator._coalescer.cooldown == 1.0
+    assert coordinator.schedule_policy == SCHEDULE_POLICY_CATCH_UP
+
+
+@pytest.mark.usefixtures("setup_integration")
+@pytest.mark.parametrize(
+    "key, value", [(CONF_PROFILING, True), (CONF_HISTORY_SIZE, 10)]
+)
+async def test_setup_options_reload(hass, config_entry, reloads, key, value):
+    await submit_options(hass, config_entry, **{key: value})
+    assert reloads == [config_entry.entry_id]
+
+
+@pytest.mark.usefixtures("setup_integration")
+async def test_unchanged_options_do_nothing(hass, config_entry, reloads):
+    hass.config_entries.async_update_entry(config_entry, title="Renamed")
+    await hass.async_block_till_done()
+    assert reloads == []